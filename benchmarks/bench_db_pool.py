@@ -0,0 +1,85 @@
+"""
+Monitor iterasyon latency benchmark'ı: her sorguda yeni bağlantı vs paylaşılan havuz.
+
+Kullanım:
+    python benchmarks/bench_db_pool.py --iterations 200
+
+Not: update_stock(0) çağrıldığı için consumption_history tablosuna satır yazar,
+sadece geliştirme veritabanında çalıştırın.
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import psycopg2
+import stock_monitor.monitor as monitor
+
+
+def direct_connection():
+    """Havuz öncesi davranış: her çağrıda yeni TCP+auth bağlantısı"""
+    return psycopg2.connect(
+        host=monitor.DB_HOST,
+        port=monitor.DB_PORT,
+        database=monitor.DB_NAME,
+        user=monitor.DB_USER,
+        password=monitor.DB_PASSWORD
+    )
+
+
+def run_iteration():
+    """Bir monitor iterasyonunun DB kısmı (okuma + güncelleme + eşik kontrolü)"""
+    monitor.get_current_stock()
+    monitor.update_stock(0)
+    monitor.check_threshold_breach()
+
+
+def measure(iterations):
+    latencies = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(iterations):
+            start = time.perf_counter()
+            run_iteration()
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def summarize(name, latencies):
+    ordered = sorted(latencies)
+    p95 = ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]
+    print(f"{name:<10} avg={statistics.mean(ordered):7.2f}ms  "
+          f"p50={statistics.median(ordered):7.2f}ms  p95={p95:7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DB connection pool benchmark')
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    original_get = monitor.get_db_connection
+    original_release = monitor.release_db_connection
+
+    monitor.get_db_connection = direct_connection
+    monitor.release_db_connection = lambda conn: conn.close()
+    try:
+        before = measure(args.iterations)
+    finally:
+        monitor.get_db_connection = original_get
+        monitor.release_db_connection = original_release
+
+    after = measure(args.iterations)
+
+    print(f"Iterations: {args.iterations}")
+    summarize('direct', before)
+    summarize('pooled', after)
+    print(f"Speedup (avg): {statistics.mean(before) / statistics.mean(after):.1f}x")
+    print(f"Pool stats: {monitor.db_pool.pool_stats()}")
+
+
+if __name__ == "__main__":
+    main()
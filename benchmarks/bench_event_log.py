@@ -0,0 +1,86 @@
+"""
+event_log yazma benchmark'ı: satır başına INSERT + commit (eski log_event) vs
+arka plan writer'ı (utils/event_log_writer.py, multi-row INSERT).
+
+Kullanım:
+    python benchmarks/bench_event_log.py --rows 2000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'utils')))
+
+import db_pool
+from event_log_writer import EventLogWriter
+
+EVENT_TYPE = 'BENCH_EVENT_LOG'
+
+
+def sync_insert(row):
+    """Önceki log_event: havuzdan bağlantı, tek satır INSERT, commit"""
+    conn = db_pool.get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO event_log
+            (event_type, direction, architecture, payload, status, error_message, latency_ms)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, row)
+        conn.commit()
+        cursor.close()
+    finally:
+        db_pool.release_connection(conn)
+
+
+def measure(log, rows):
+    latencies = []
+    for i in range(rows):
+        row = (EVENT_TYPE, 'OUTGOING', 'SOA', f'payload {i}', 'SUCCESS', None, i % 100)
+        start = time.perf_counter()
+        log(row)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies
+
+
+def summarize(name, latencies, total_s, rows):
+    ordered = sorted(latencies)
+    p99 = ordered[min(int(len(ordered) * 0.99), len(ordered) - 1)]
+    print(f"{name:<22} çağrı p50={statistics.median(ordered):8.1f}µs  p99={p99:8.1f}µs  "
+          f"| {rows / total_s:8.0f} satır/s (DB'ye yazılana kadar)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='event_log writer benchmark')
+    parser.add_argument('--rows', type=int, default=2000)
+    args = parser.parse_args()
+
+    try:
+        start = time.perf_counter()
+        sync = measure(sync_insert, args.rows)
+        sync_total = time.perf_counter() - start
+
+        writer = EventLogWriter()
+        start = time.perf_counter()
+        queued = measure(lambda row: writer.log(*row), args.rows)
+        writer.flush(timeout=60)
+        async_total = time.perf_counter() - start
+        stats = writer.stats()
+        writer.close()
+
+        print(f"Satır: {args.rows}")
+        summarize('sync INSERT + commit', sync, sync_total, args.rows)
+        summarize('EventLogWriter', queued, async_total, args.rows)
+        print(f"Writer: {stats['flushes']} flush, written={stats['written']}, "
+              f"dropped={stats['dropped']}, failed={stats['failed']}")
+    finally:
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM event_log WHERE event_type = %s", (EVENT_TYPE,))
+            conn.commit()
+
+
+if __name__ == "__main__":
+    main()
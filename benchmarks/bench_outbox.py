@@ -0,0 +1,88 @@
+"""
+Outbox relay throughput benchmark'ı: N mesaj outbox'a yazılır, 1..K paralel relay
+FOR UPDATE SKIP LOCKED ile boşaltır. Gönderici sahte (batch başına --send-ms gecikme);
+her mesajın tam bir kez gönderildiği kontrol edilir.
+
+Kullanım:
+    python benchmarks/bench_outbox.py --rows 5000 --workers 1 2 4 --send-ms 5
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'utils')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'stock_monitor')))
+
+import db_pool
+import outbox
+
+BENCH_KEY = 'bench_outbox'
+
+
+def fill(rows):
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        channels = (outbox.SOAP, outbox.EVENT_HUB)
+        outbox.enqueue(cursor, [(channels[i % 2], {BENCH_KEY: True, 'seq': i}) for i in range(rows)])
+        conn.commit()
+
+
+def cleanup():
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM outbox WHERE payload ? %s", (BENCH_KEY,))
+        conn.commit()
+
+
+def run(rows, workers, batch_size, send_ms):
+    cleanup()
+    fill(rows)
+    seen = Counter()
+    seen_lock = threading.Lock()
+
+    def sender(payloads):
+        time.sleep(send_ms / 1000)
+        with seen_lock:
+            seen.update(p['seq'] for p in payloads)
+        return [{'success': True}] * len(payloads)
+
+    relay = outbox.OutboxRelay({outbox.SOAP: sender, outbox.EVENT_HUB: sender}, batch_size=batch_size)
+    start = time.perf_counter()
+    threads = [threading.Thread(target=relay.drain) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    duplicates = sum(1 for count in seen.values() if count > 1)
+    stats = relay.stats()
+    print(f"workers={workers:<2} batch={batch_size:<4} {rows / elapsed:8.0f} satır/s "
+          f"| gönderilen={stats['relayed']} tekil={len(seen)} tekrar={duplicates} "
+          f"batch={stats['batches']}")
+    return duplicates == 0 and len(seen) == rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='outbox relay benchmark')
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--batch-size', type=int, default=outbox.OUTBOX_BATCH_SIZE)
+    parser.add_argument('--send-ms', type=float, default=5.0,
+                        help='sahte göndericinin kanal/batch başına gecikmesi')
+    args = parser.parse_args()
+
+    try:
+        print(f"Satır: {args.rows} | gönderim gecikmesi: {args.send_ms}ms/kanal/batch")
+        ok = all([run(args.rows, workers, args.batch_size, args.send_ms) for workers in args.workers])
+        print("Her mesaj tam bir kez gönderildi" if ok else "❌ Eksik ya da tekrar gönderim var")
+    finally:
+        cleanup()
+        db_pool.close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Çok SKU'lu tarama benchmark'ı: N InventoryLow event'i tekli /publish-event çağrılarıyla
+(paralel, eski yol) vs /publish-events ile (EVENT_BATCH_SIZE'lık istekler, tek INSERT + commit).
+StockMS gunicorn ile ayrı process'te başlatılır.
+
+Kullanım:
+    python benchmarks/bench_publish_events.py --events 500 --sweeps 5
+
+Not: event_log tablosuna satır yazar, sadece geliştirme veritabanında çalıştırın.
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from bench_serving import free_port, start_service, stop_service
+import stock_monitor.monitor as monitor
+
+
+def sweep_payloads(n):
+    return [monitor.build_event_payload({'product_code': f'SKU-{i:05d}', 'current_stock': 50,
+                                         'daily_consumption': 79, 'days_of_supply': 0.63})
+            for i in range(n)]
+
+
+def run_sweeps(bulk, events, sweeps, batch_size):
+    """Tarama başına süre (ms) listesi; bulk=False tekli yola zorlar"""
+    monitor._bulk_events_supported = bulk
+    timings = []
+    for _ in range(sweeps):
+        payloads = sweep_payloads(events)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = monitor.post_events(payloads, batch_size=batch_size)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert all(r['success'] for r in results), [r for r in results if not r['success']][:1]
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='/publish-event vs /publish-events')
+    parser.add_argument('--events', type=int, default=500)
+    parser.add_argument('--sweeps', type=int, default=5)
+    parser.add_argument('--batch-size', type=int, default=monitor.EVENT_BATCH_SIZE)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    process, url = start_service('stockms', 'production', free_port(), args.workers, args.threads, 0)
+    monitor.STOCKMS_URL = url
+    try:
+        run_sweeps(True, 50, 1, args.batch_size)
+        print(f"{args.events} event / tarama, {args.sweeps} tarama "
+              f"(StockMS {args.workers} worker x {args.threads} thread)")
+        for name, bulk in (('tekli /publish-event', False), ('/publish-events', True)):
+            timings = run_sweeps(bulk, args.events, args.sweeps, args.batch_size)
+            requests_per_sweep = args.events if not bulk else -(-args.events // args.batch_size)
+            print(f"{name:22} p50={statistics.median(timings):8.1f}ms  "
+                  f"{args.events / (statistics.median(timings) / 1000):8.0f} event/s  "
+                  f"| {requests_per_sweep} istek / tarama")
+    finally:
+        stop_service(process)
+
+
+if __name__ == "__main__":
+    main()
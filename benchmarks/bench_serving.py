@@ -0,0 +1,115 @@
+"""
+StockMS / OrderMS sunucu modu benchmark'ı: Flask dev sunucusu (debug) vs gunicorn (worker x thread).
+Servis ayrı process'te başlatılır; keep-alive client thread'leri sabit eşzamanlılıkla istek atar.
+
+Kullanım:
+    python benchmarks/bench_serving.py --service stockms --path /publish-event --requests 3000 --concurrency 16
+    python benchmarks/bench_serving.py --modes production --workers 4 --threads 8 --max-requests 200
+
+Not: /publish-event ve /receive-order event_log'a (orderms: orders tablosuna da) yazar,
+sadece geliştirme veritabanında çalıştırın.
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'standins'))
+
+from driver import run_load, summarize, print_summary
+
+EVENT = {'eventId': 'EVT-BENCH', 'eventType': 'InventoryLow', 'hospitalId': 'Hospital-C',
+         'productCode': 'PHYSIO-SALINE-500ML', 'currentStockUnits': 150, 'dailyConsumptionUnits': 79,
+         'daysOfSupply': 1.9, 'threshold': 2.0, 'timestamp': '2026-01-03T14:30:00'}
+ORDER = {'orderId': 'ORD-BENCH', 'hospitalId': 'Hospital-C', 'productCode': 'PHYSIO-SALINE-500ML',
+         'orderQuantity': 100, 'priority': 'NORMAL'}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_service(service, mode, port, workers, threads, max_requests):
+    """Servisi kendi process grubunda başlat (dev reloader'ı ile birlikte kapatılabilsin)"""
+    cmd = [sys.executable, os.path.join(ROOT, service, 'app.py'), '--mode', mode, '--host', '127.0.0.1',
+           '--port', str(port), '--workers', str(workers), '--threads', str(threads),
+           '--max-requests', str(max_requests)]
+    process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               start_new_session=True)
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if requests.get(f'{url}/health', timeout=1).status_code == 200:
+                return process, url
+        except requests.RequestException:
+            time.sleep(0.2)
+    stop_service(process)
+    raise RuntimeError(f"{service} ({mode}) 30 saniyede açılmadı")
+
+
+def stop_service(process):
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=35)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+def http_call(url, path):
+    """Thread başına keep-alive Session; POST gövdesi servise göre"""
+    local = threading.local()
+    body = ORDER if 'order' in path else EVENT
+
+    def call():
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        try:
+            if path == '/health':
+                r = local.session.get(url + path, timeout=30)
+            else:
+                r = local.session.post(url + path, json=body, timeout=30)
+        except requests.RequestException as e:
+            return False, type(e).__name__, None
+        return r.status_code == 200, None if r.status_code == 200 else f'HTTP_{r.status_code}', None
+    return call
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Flask dev server vs gunicorn throughput')
+    parser.add_argument('--service', choices=['stockms', 'orderms'], default='stockms')
+    parser.add_argument('--path', default=None, help='varsayılan: stockms /publish-event, orderms /receive-order')
+    parser.add_argument('--modes', default='dev,production')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--max-requests', type=int, default=0, help='worker yenileme (0 = kapalı)')
+    args = parser.parse_args()
+    path = args.path or ('/publish-event' if args.service == 'stockms' else '/receive-order')
+
+    print(f"{args.service} {path}: {args.requests} istek x {args.concurrency} eşzamanlı "
+          f"(production: {args.workers} worker x {args.threads} thread, max_requests={args.max_requests})")
+    for mode in args.modes.split(','):
+        process, url = start_service(args.service, mode, free_port(), args.workers, args.threads,
+                                     args.max_requests)
+        try:
+            # Isınma: bağlantılar ve havuzlar açılsın
+            run_load(http_call(url, path), args.concurrency * 2, args.concurrency)
+            samples, elapsed = run_load(http_call(url, path), args.requests, args.concurrency)
+        finally:
+            stop_service(process)
+        print_summary(summarize(mode, samples, elapsed))
+
+
+if __name__ == "__main__":
+    main()
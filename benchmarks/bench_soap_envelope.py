@@ -0,0 +1,77 @@
+"""
+SOAP envelope oluşturma micro-benchmark'ı: eski f-string + encode vs
+önceden derlenmiş byte şablonu (soap_client/envelope.py), tekli ve batch.
+
+Kullanım:
+    python benchmarks/bench_soap_envelope.py --count 10000 --repeat 5
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from soap_client.envelope import build_envelope, build_envelopes
+
+
+def legacy_create_soap_envelope(stock_data):
+    """Önceki create_soap_envelope (kaçışsız f-string), karşılaştırma için"""
+    timestamp = datetime.now().isoformat()
+    hospital_id = stock_data.get('hospitalId', 'Hospital-C')
+    product_code = stock_data.get('productCode', 'PHYSIO-SALINE-500ML')
+
+    soap_envelope = f"""<?xml version="1.0" encoding="UTF-8"?>
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"
+               xmlns:tns="http://hospital-supply-chain.example.com/soap"
+               xmlns:stock="http://hospital-supply-chain.example.com/soap/stock">
+    <soap:Body>
+        <tns:StockUpdate>
+            <tns:request>
+                <stock:hospitalId>{hospital_id}</stock:hospitalId>
+                <stock:productCode>{product_code}</stock:productCode>
+                <stock:currentStockUnits>{stock_data['currentStockUnits']}</stock:currentStockUnits>
+                <stock:dailyConsumptionUnits>{stock_data['dailyConsumptionUnits']}</stock:dailyConsumptionUnits>
+                <stock:daysOfSupply>{stock_data['daysOfSupply']:.2f}</stock:daysOfSupply>
+                <stock:timestamp>{timestamp}</stock:timestamp>
+            </tns:request>
+        </tns:StockUpdate>
+    </soap:Body>
+</soap:Envelope>"""
+
+    return soap_envelope
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SOAP envelope builder micro-benchmark')
+    parser.add_argument('--count', type=int, default=10000, help='batch başına envelope')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    items = [{
+        'hospitalId': f'Hospital-{i % 20}',
+        'productCode': f'SKU-{i % 500:04d}',
+        'currentStockUnits': 100 + i % 300,
+        'dailyConsumptionUnits': 79,
+        'daysOfSupply': (100 + i % 300) / 79
+    } for i in range(args.count)]
+
+    cases = {
+        'legacy f-string + encode': lambda: [legacy_create_soap_envelope(d).encode('utf-8') for d in items],
+        'build_envelope (tekli)': lambda: [build_envelope(d) for d in items],
+        'build_envelopes (batch)': lambda: build_envelopes(items),
+    }
+
+    print(f"Envelope sayısı: {args.count} | Tekrar: {args.repeat} (en iyi süre)")
+    baseline = None
+    for name, fn in cases.items():
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        per_item_us = best / args.count * 1e6
+        baseline = baseline or per_item_us
+        print(f"{name:<28} {best * 1000:8.2f}ms  {per_item_us:6.2f}µs/envelope  "
+              f"{baseline / per_item_us:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
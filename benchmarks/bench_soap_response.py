@@ -0,0 +1,83 @@
+"""
+SOAP response parse micro-benchmark'ı: eski ET.fromstring + dört './/tns:...'
+araması vs tek geçişli, erken duran akış parser'ı (soap_client/response.py).
+
+Kullanım:
+    python benchmarks/bench_soap_response.py --count 10000 --repeat 5
+    python benchmarks/bench_soap_response.py --padding 200   # büyük yanıt (fazladan eleman)
+"""
+import argparse
+import os
+import sys
+import timeit
+from xml.etree import ElementTree as ET
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from soap_client import response
+
+
+def legacy_parse_soap_response(xml_response):
+    """Önceki parse_soap_response, karşılaştırma için"""
+    root = ET.fromstring(xml_response)
+    namespaces = {
+        'soap': 'http://schemas.xmlsoap.org/soap/envelope/',
+        'tns': 'http://hospital-supply-chain.example.com/soap'
+    }
+    success = root.find('.//tns:success', namespaces)
+    message = root.find('.//tns:message', namespaces)
+    order_triggered = root.find('.//tns:orderTriggered', namespaces)
+    order_id = root.find('.//tns:orderId', namespaces)
+    return {
+        'success': success.text.lower() == 'true' if success is not None else False,
+        'message': message.text if message is not None else '',
+        'orderTriggered': order_triggered.text.lower() == 'true' if order_triggered is not None else False,
+        'orderId': order_id.text if order_id is not None else None
+    }
+
+
+def make_body(padding):
+    # Alanlardan sonra gelen ekler (audit, trace vb.) legacy parser'ın tamamını okuduğu kısım
+    extra = ''.join(f'<tns:audit seq="{i}">entry {i}</tns:audit>' for i in range(padding))
+    return f'''<?xml version="1.0" encoding="UTF-8"?>
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"
+               xmlns:tns="http://hospital-supply-chain.example.com/soap">
+    <soap:Body>
+        <tns:StockUpdateResponse>
+            <tns:success>true</tns:success>
+            <tns:message>Order created</tns:message>
+            <tns:orderTriggered>true</tns:orderTriggered>
+            <tns:orderId>ORD-20260108-0001</tns:orderId>
+            {extra}
+        </tns:StockUpdateResponse>
+    </soap:Body>
+</soap:Envelope>'''.encode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SOAP response parser micro-benchmark')
+    parser.add_argument('--count', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--padding', type=int, default=0, help='yanıta eklenecek fazladan eleman')
+    args = parser.parse_args()
+
+    body = make_body(args.padding)
+    assert legacy_parse_soap_response(body)['orderId'] == response.parse_response(body)['orderId']
+
+    cases = {
+        'legacy fromstring + find': lambda: legacy_parse_soap_response(body),
+        f'parse_response ({response.PARSER_BACKEND})': lambda: response.parse_response(body),
+    }
+
+    print(f"Yanıt: {len(body)} byte | Parse sayısı: {args.count} | Tekrar: {args.repeat} (en iyi süre)")
+    baseline = None
+    for name, fn in cases.items():
+        best = min(timeit.repeat(fn, number=args.count, repeat=args.repeat))
+        per_item_us = best / args.count * 1e6
+        baseline = baseline or per_item_us
+        print(f"{name:<28} {best * 1000:8.2f}ms  {per_item_us:7.2f}µs/yanıt  "
+              f"{baseline / per_item_us:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
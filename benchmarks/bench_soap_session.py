@@ -0,0 +1,151 @@
+"""
+SOAP istek latency benchmark'ı: her istekte yeni bağlantı (requests.post) vs
+keep-alive session (utils/http_session.py), yerel stub endpoint'e karşı.
+
+Kullanım:
+    python benchmarks/bench_soap_session.py --iterations 200 --tls
+    python benchmarks/bench_soap_session.py --connect-delay-ms 40   # WAN handshake benzetimi
+
+--tls: openssl ile geçici self-signed sertifika üretip HTTPS stub açar (TLS handshake maliyeti dahil).
+--connect-delay-ms: stub her yeni bağlantıda bu kadar bekler (Azure'a TCP/TLS kurulum süresi yerine).
+"""
+import argparse
+import os
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'utils')))
+
+import requests
+import http_session
+from soap_client.client import create_soap_envelope
+
+STUB_RESPONSE = b"""<?xml version="1.0" encoding="UTF-8"?>
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"
+               xmlns:tns="http://hospital-supply-chain.example.com/soap">
+    <soap:Body>
+        <tns:StockUpdateResponse>
+            <tns:success>true</tns:success>
+            <tns:message>OK</tns:message>
+            <tns:orderTriggered>false</tns:orderTriggered>
+        </tns:StockUpdateResponse>
+    </soap:Body>
+</soap:Envelope>"""
+
+HEADERS = {
+    'Content-Type': 'text/xml; charset=utf-8',
+    'SOAPAction': 'http://hospital-supply-chain.example.com/soap/stock/StockUpdate'
+}
+
+STOCK_DATA = {'currentStockUnits': 150, 'dailyConsumptionUnits': 79, 'daysOfSupply': 1.9}
+
+
+def make_handler(connect_delay):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive
+        # Header ve body ayrı yazılıyor; Nagle + delayed ACK reused bağlantıda ~40ms ekler
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            if connect_delay:
+                time.sleep(connect_delay)
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/xml; charset=utf-8')
+            self.send_header('Content-Length', str(len(STUB_RESPONSE)))
+            self.end_headers()
+            self.wfile.write(STUB_RESPONSE)
+
+        def log_message(self, *args):
+            pass
+
+    return StubHandler
+
+
+def self_signed_context(workdir):
+    cert, key = os.path.join(workdir, 'cert.pem'), os.path.join(workdir, 'key.pem')
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+                    '-subj', '/CN=localhost', '-keyout', key, '-out', cert],
+                   check=True, capture_output=True)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+def start_stub(tls, connect_delay):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(connect_delay))
+    scheme = 'http'
+    if tls:
+        workdir = tempfile.mkdtemp()
+        server.socket = self_signed_context(workdir).wrap_socket(server.socket, server_side=True)
+        scheme = 'https'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"{scheme}://127.0.0.1:{server.server_address[1]}/StockUpdateService"
+
+
+def measure(post, url, iterations):
+    latencies = []
+    for _ in range(iterations):
+        body = create_soap_envelope(STOCK_DATA)
+        start = time.perf_counter()
+        response = post(url, data=body, headers=HEADERS, timeout=30, verify=False)
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def summarize(name, latencies):
+    ordered = sorted(latencies)
+    p95 = ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]
+    print(f"{name:<16} avg={statistics.mean(ordered):7.2f}ms  "
+          f"p50={statistics.median(ordered):7.2f}ms  p95={p95:7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SOAP keep-alive session benchmark')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--tls', action='store_true')
+    parser.add_argument('--connect-delay-ms', type=float, default=0)
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore', message='Unverified HTTPS request')
+    server, url = start_stub(args.tls, args.connect_delay_ms / 1000)
+
+    try:
+        fresh = measure(requests.post, url, args.iterations)
+
+        cold_session = http_session.create_session()
+        cold = measure(cold_session.post, url, 1)
+
+        session = http_session.create_session()
+        session.verify = False
+        http_session.warmup(url, connections=2, session=session)
+        warm = measure(session.post, url, args.iterations)
+    finally:
+        server.shutdown()
+
+    print(f"Stub: {url} | Iterations: {args.iterations} | connect delay: {args.connect_delay_ms}ms")
+    summarize('requests.post', fresh)
+    summarize('session (1st)', cold)
+    summarize('session (warm)', warm)
+    print(f"Speedup (avg): {statistics.mean(fresh) / statistics.mean(warm):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -55,6 +55,7 @@ CREATE TABLE IF NOT EXISTS consumption_history (
 CREATE TABLE IF NOT EXISTS alerts (
     id SERIAL PRIMARY KEY,
     hospital_id TEXT NOT NULL,
+    product_code TEXT,
     alert_type TEXT NOT NULL,
     severity TEXT NOT NULL,
     current_stock INTEGER NOT NULL,
@@ -67,6 +68,44 @@ CREATE TABLE IF NOT EXISTS alerts (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Giden SOAP / Event Hub mesajları (stok değişikliğiyle aynı transaction'da yazılır)
+CREATE TABLE IF NOT EXISTS outbox (
+    id BIGSERIAL PRIMARY KEY,
+    channel TEXT NOT NULL CHECK (channel IN ('SOAP', 'EVENT_HUB')),
+    payload JSONB NOT NULL,
+    status TEXT NOT NULL DEFAULT 'PENDING' CHECK (status IN ('PENDING', 'SENT', 'DEAD')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    available_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_outbox_pending
+    ON outbox(available_at, id)
+    WHERE status = 'PENDING';
+
+-- Stok değişikliklerini LISTEN stock_changed kanalına bildir
+CREATE OR REPLACE FUNCTION notify_stock_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('stock_changed', json_build_object(
+        'hospital_id', NEW.hospital_id,
+        'product_code', NEW.product_code,
+        'current_stock_units', NEW.current_stock_units,
+        'daily_consumption_units', NEW.daily_consumption_units,
+        'reorder_threshold', NEW.reorder_threshold
+    )::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_stock_change_notify ON stock;
+CREATE TRIGGER trg_stock_change_notify
+    AFTER INSERT OR UPDATE OF current_stock_units, daily_consumption_units, reorder_threshold
+    ON stock
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_stock_change();
+
 -- İlk veriyi ekle (Hospital-C için)
 INSERT INTO stock (hospital_id, product_code, current_stock_units, daily_consumption_units, days_of_supply)
 VALUES ('Hospital-C', 'PHYSIO-SALINE-500ML', 200, 79, 2.53)
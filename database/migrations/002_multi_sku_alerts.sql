@@ -0,0 +1,8 @@
+-- Migration: Multi-SKU alerts
+-- Purpose: Batch monitor writes one alert per (hospital_id, product_code)
+
+ALTER TABLE alerts
+    ADD COLUMN IF NOT EXISTS product_code TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_alerts_hospital_product
+    ON alerts(hospital_id, product_code, created_at DESC);
@@ -0,0 +1,24 @@
+-- Migration: Stock change notifications
+-- Purpose: stock_monitor --mode event blocks on LISTEN stock_changed
+--          instead of polling every 10 seconds
+
+CREATE OR REPLACE FUNCTION notify_stock_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('stock_changed', json_build_object(
+        'hospital_id', NEW.hospital_id,
+        'product_code', NEW.product_code,
+        'current_stock_units', NEW.current_stock_units,
+        'daily_consumption_units', NEW.daily_consumption_units,
+        'reorder_threshold', NEW.reorder_threshold
+    )::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_stock_change_notify ON stock;
+
+CREATE TRIGGER trg_stock_change_notify
+    AFTER INSERT OR UPDATE OF current_stock_units, daily_consumption_units, reorder_threshold
+    ON stock
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_stock_change();
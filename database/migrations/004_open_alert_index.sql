@@ -0,0 +1,6 @@
+-- Migration: Open alert lookup
+-- Purpose: Alert state machine restores state from unresolved alerts on startup
+
+CREATE INDEX IF NOT EXISTS idx_alerts_open
+    ON alerts(hospital_id, product_code, created_at DESC)
+    WHERE resolved_at IS NULL;
@@ -0,0 +1,20 @@
+-- Migration: Transactional outbox
+-- Purpose: Outbound SOAP / Event Hub messages are written in the same transaction
+--          as the stock change; relay workers drain them with FOR UPDATE SKIP LOCKED
+
+CREATE TABLE IF NOT EXISTS outbox (
+    id BIGSERIAL PRIMARY KEY,
+    channel TEXT NOT NULL CHECK (channel IN ('SOAP', 'EVENT_HUB')),
+    payload JSONB NOT NULL,
+    status TEXT NOT NULL DEFAULT 'PENDING' CHECK (status IN ('PENDING', 'SENT', 'DEAD')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    available_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMP
+);
+
+-- Relay sadece bekleyen satırları tarar; gönderilenler indekste yer tutmaz
+CREATE INDEX IF NOT EXISTS idx_outbox_pending
+    ON outbox(available_at, id)
+    WHERE status = 'PENDING';
@@ -5,6 +5,12 @@ import json
 from datetime import datetime
 import psycopg2
 from dotenv import load_dotenv
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
+import db_pool
+import event_log_writer
+import serving
 import time
 
 load_dotenv()
@@ -19,19 +25,17 @@ DB_USER = os.getenv('DB_USER', 'postgres')
 DB_PASSWORD = os.getenv('DB_PASSWORD', 'postgres')
 
 def get_db_connection():
-    """Database bağlantısı"""
+    """Paylaşılan havuzdan database bağlantısı"""
     try:
-        return psycopg2.connect(
-            host=DB_HOST,
-            port=DB_PORT,
-            database=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD
-        )
+        return db_pool.get_connection()
     except Exception as e:
         print(f" DB Error: {e}")
         return None
 
+def release_db_connection(conn):
+    """Bağlantıyı havuza iade et"""
+    db_pool.release_connection(conn)
+
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
@@ -39,7 +43,8 @@ def health():
         'status': 'UP',
         'service': 'OrderMS',
         'hospital': HOSPITAL_ID,
-        'timestamp': time.time()
+        'timestamp': time.time(),
+        'eventLog': event_log_writer.stats()
     })
 
 @app.route('/receive-order', methods=['POST'])
@@ -66,7 +71,7 @@ def receive_order():
         
         if cursor.fetchone():
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             print(f"⚠️  Duplicate order detected: {data.get('orderId')}")
             return jsonify({
                 'success': True,
@@ -81,7 +86,7 @@ def receive_order():
         
         if cursor.fetchone():
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             print(f"⚠️  Duplicate command detected: {data.get('commandId')}")
             return jsonify({
                 'success': True,
@@ -108,16 +113,13 @@ def receive_order():
             data.get('warehouseId')
         ))
         
-    
-        cursor.execute("""
-            INSERT INTO event_log 
-            (event_type, direction, architecture, payload, status)
-            VALUES (%s, %s, %s, %s, %s)
-        """, ('ORDER_COMMAND_RECEIVED', 'INCOMING', 'SERVERLESS', json.dumps(data), 'SUCCESS'))
-        
         conn.commit()
         cursor.close()
-        conn.close()
+        release_db_connection(conn)
+        
+        # Sipariş commit edildikten sonra log arka plan writer'ına
+        event_log_writer.log_event('ORDER_COMMAND_RECEIVED', 'INCOMING', 'SERVERLESS',
+                                   json.dumps(data), 'SUCCESS')
         
         print(f"✅ Order received: {data.get('orderId')}")
         
@@ -141,4 +143,4 @@ def home():
 
 if __name__ == '__main__':
     print(f"🚀 OrderMS starting for {HOSPITAL_ID}...")
-    app.run(host='0.0.0.0', port=8084, debug=True)
\ No newline at end of file
+    serving.serve(app, 'OrderMS', int(os.getenv('ORDERMS_PORT', '8082')))
\ No newline at end of file
@@ -1,17 +1,51 @@
 import os
 import sys
+import time
 from datetime import datetime
-import requests
 import psycopg2
 from dotenv import load_dotenv
-from xml.etree import ElementTree as ET
-import time
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
+import db_pool
+import http_session
+import retry_scheduler
+import event_log_writer
+from circuit_breaker import CircuitBreaker, CircuitOpenError, OPEN, HALF_OPEN
+from envelope import build_envelope, build_batch_envelope
+from response import parse_response, parse_batch_response
+from faults import (SoapFaultError, response_error, fault_error, fault_class, is_retryable, error_code,
+                    format_error, request_not_sent, TRANSIENT_FAULT_CODES)
 
 
 load_dotenv()
 
 
 SOAP_URL = os.getenv('SOAP_STOCK_UPDATE_URL', 'http://localhost:8000/StockUpdateService')
+# >0 ise başlangıçta bu kadar keep-alive bağlantı önceden açılır
+SOAP_WARMUP_CONNECTIONS = int(os.getenv('SOAP_WARMUP_CONNECTIONS', '0'))
+# Tek envelope'taki en fazla kalem; batch reddedilirse kalemler paralel tekli çağrılarla gider
+SOAP_BATCH_SIZE = int(os.getenv('SOAP_BATCH_SIZE', '50'))
+SOAP_BATCH_FALLBACK_WORKERS = int(os.getenv('SOAP_BATCH_FALLBACK_WORKERS', '4'))
+# Batch desteklenmiyor yanıtından sonra bu kadar saniye tekli çağrılar kullanılır, sonra batch tekrar denenir
+SOAP_BATCH_RETRY_AFTER = float(os.getenv('SOAP_BATCH_RETRY_AFTER', '300'))
+# Retry: base * 2^(n-1) (max_delay ile sınırlı) - jitter; toplam süre deadline'ı aşmaz
+SOAP_RETRY_BASE_DELAY = float(os.getenv('SOAP_RETRY_BASE_DELAY', '5'))
+SOAP_RETRY_MAX_DELAY = float(os.getenv('SOAP_RETRY_MAX_DELAY', '30'))
+SOAP_RETRY_JITTER = float(os.getenv('SOAP_RETRY_JITTER', '0.2'))
+SOAP_RETRY_DEADLINE = float(os.getenv('SOAP_RETRY_DEADLINE', '55'))
+# Tek HTTP isteğinin (deneme) süresi
+SOAP_REQUEST_TIMEOUT = float(os.getenv('SOAP_REQUEST_TIMEOUT', '30'))
+# Circuit breaker: pencere (s) içinde en az MIN_CALLS çağrının FAILURE_RATE kadarı hatalıysa açılır
+SOAP_BREAKER_FAILURE_RATE = float(os.getenv('SOAP_BREAKER_FAILURE_RATE', '0.5'))
+SOAP_BREAKER_WINDOW = float(os.getenv('SOAP_BREAKER_WINDOW', '60'))
+SOAP_BREAKER_MIN_CALLS = int(os.getenv('SOAP_BREAKER_MIN_CALLS', '5'))
+SOAP_BREAKER_OPEN_SECONDS = float(os.getenv('SOAP_BREAKER_OPEN_SECONDS', '30'))
+SOAP_BREAKER_PROBES = int(os.getenv('SOAP_BREAKER_PROBES', '1'))
+STOCK_UPDATE_ACTION = 'http://hospital-supply-chain.example.com/soap/stock/StockUpdate'
+STOCK_UPDATE_BATCH_ACTION = 'http://hospital-supply-chain.example.com/soap/stock/StockUpdateBatch'
 HOSPITAL_ID = 'Hospital-C'
 PRODUCT_CODE = 'PHYSIO-SALINE-500ML'
 
@@ -23,20 +57,28 @@ DB_USER = os.getenv('DB_USER', 'postgres')
 DB_PASSWORD = os.getenv('DB_PASSWORD', 'postgres')
 
 def get_db_connection():
-    """Database bağlantısı oluştur"""
+    """Paylaşılan havuzdan database bağlantısı al"""
     try:
-        conn = psycopg2.connect(
-            host=DB_HOST,
-            port=DB_PORT,
-            database=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD
-        )
-        return conn
+        return db_pool.get_connection()
     except Exception as e:
         print(f" Database bağlantı hatası: {e}")
         return None
 
+def release_db_connection(conn):
+    """Bağlantıyı havuza iade et"""
+    db_pool.release_connection(conn)
+
+def get_http_session():
+    """Paylaşılan keep-alive HTTP session (TCP/TLS bağlantıları istekler arasında yeniden kullanılır)"""
+    return http_session.get_session()
+
+def warmup_connections(connections=None):
+    """SOAP endpoint'ine bağlantıları önceden aç (ilk alarmda handshake beklenmez)"""
+    connections = connections or SOAP_WARMUP_CONNECTIONS
+    if connections <= 0:
+        return 0
+    return http_session.warmup(SOAP_URL, connections, session=get_http_session())
+
 def get_current_stock():
     """Mevcut stok bilgisini al"""
     conn = get_db_connection()
@@ -53,7 +95,6 @@ def get_current_stock():
         
         result = cursor.fetchone()
         cursor.close()
-        conn.close()
         
         if result:
             return {
@@ -65,181 +106,462 @@ def get_current_stock():
     except Exception as e:
         print(f"Stok okuma hatası: {e}")
         return None
+    finally:
+        release_db_connection(conn)
 
 def log_event(event_type, status, payload=None, error_message=None, latency_ms=None):
-    """Event log'a kayıt yaz"""
-    conn = get_db_connection()
-    if not conn:
-        return
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO event_log 
-            (event_type, direction, architecture, payload, status, error_message, latency_ms)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """, (event_type, 'OUTGOING', 'SOA', payload, status, error_message, latency_ms))
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-    except Exception as e:
-        print(f"⚠️  Log yazma hatası: {e}")
+    """Event log kaydını arka plan writer'ına ver (toplu yazılır; istek commit beklemez)"""
+    if not event_log_writer.log_event(event_type, 'OUTGOING', 'SOA', payload, status,
+                                      error_message, latency_ms):
+        print(f"⚠️  event_log kuyruğu dolu; {event_type} kaydı düşürüldü")
+
+def flush_events(timeout=5.0):
+    """Kuyruktaki event_log kayıtlarının yazılmasını bekle"""
+    return event_log_writer.flush(timeout)
+
+# Geçiş satırlarının status değeri (event_log status CHECK kısıtına uygun)
+BREAKER_STATUS = {OPEN: 'FAILURE', HALF_OPEN: 'RETRY'}
+
+def log_breaker_transition(old_state, new_state, stats):
+    """Devre durum geçişini event_log'a yaz"""
+    print(f"🔌 SOAP circuit breaker: {old_state} -> {new_state} "
+          f"(hata oranı {stats['failure_rate']:.0%}, {stats['window_calls']} çağrı)")
+    log_event(
+        event_type=f'CIRCUIT_BREAKER_{new_state}',
+        status=BREAKER_STATUS.get(new_state, 'SUCCESS'),
+        payload=f"{old_state} -> {new_state}",
+        error_message=(f"failure_rate={stats['failure_rate']} window_calls={stats['window_calls']} "
+                       f"rejected={stats['rejected']}")
+    )
+
+soap_breaker = CircuitBreaker(
+    'soap',
+    failure_rate=SOAP_BREAKER_FAILURE_RATE,
+    window=SOAP_BREAKER_WINDOW,
+    min_calls=SOAP_BREAKER_MIN_CALLS,
+    open_seconds=SOAP_BREAKER_OPEN_SECONDS,
+    half_open_probes=SOAP_BREAKER_PROBES,
+    on_transition=lambda *transition: log_breaker_transition(*transition)
+)
+
+def breaker_stats():
+    """SOAP circuit breaker metrikleri (durum, pencere hata oranı, reddedilen, geçiş sayıları)"""
+    return soap_breaker.stats()
 
 def create_soap_envelope(stock_data):
-    """SOAP XML envelope oluştur"""
-    timestamp = datetime.now().isoformat()
-
-    soap_envelope = f"""<?xml version="1.0" encoding="UTF-8"?>
-<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"
-               xmlns:tns="http://hospital-supply-chain.example.com/soap"
-               xmlns:stock="http://hospital-supply-chain.example.com/soap/stock">
-    <soap:Body>
-        <tns:StockUpdate>
-            <tns:request>
-                <stock:hospitalId>{HOSPITAL_ID}</stock:hospitalId>
-                <stock:productCode>{PRODUCT_CODE}</stock:productCode>
-                <stock:currentStockUnits>{stock_data['currentStockUnits']}</stock:currentStockUnits>
-                <stock:dailyConsumptionUnits>{stock_data['dailyConsumptionUnits']}</stock:dailyConsumptionUnits>
-                <stock:daysOfSupply>{stock_data['daysOfSupply']:.2f}</stock:daysOfSupply>
-                <stock:timestamp>{timestamp}</stock:timestamp>
-            </tns:request>
-        </tns:StockUpdate>
-    </soap:Body>
-</soap:Envelope>"""
-
-    return soap_envelope
+    """SOAP XML envelope oluştur (metin; istek gövdesi için build_envelope bytes döndürür)"""
+    return build_envelope(stock_data).decode('utf-8')
 
 def parse_soap_response(xml_response):
-    """SOAP response'u parse et"""
+    """SOAP response'u parse et (tek geçiş, erken durur; bkz. response.parse_response)"""
     try:
-        root = ET.fromstring(xml_response)
-        
-    
-        namespaces = {
-            'soap': 'http://schemas.xmlsoap.org/soap/envelope/',
-            'tns': 'http://hospital-supply-chain.example.com/soap'
-        }
-        
-     
-        success = root.find('.//tns:success', namespaces)
-        message = root.find('.//tns:message', namespaces)
-        order_triggered = root.find('.//tns:orderTriggered', namespaces)
-        order_id = root.find('.//tns:orderId', namespaces)
-        
-        return {
-            'success': success.text.lower() == 'true' if success is not None else False,
-            'message': message.text if message is not None else '',
-            'orderTriggered': order_triggered.text.lower() == 'true' if order_triggered is not None else False,
-            'orderId': order_id.text if order_id is not None else None
-        }
+        return parse_response(xml_response)
     except Exception as e:
         print(f"⚠️  XML parse hatası: {e}")
         return {
             'success': False,
             'message': f'Parse error: {str(e)}',
             'orderTriggered': False,
-            'orderId': None
+            'orderId': None,
+            'fault': None
         }
 
-def send_stock_update(stock_data, max_retries=3):
-    """SOAP ile stok güncelleme mesajı gönder (retry mekanizmalı)"""
-    
+def get_retry_scheduler():
+    """Paylaşılan retry zamanlayıcı (bekleyen retry'lar çağıran thread'i bloklamaz)"""
+    return retry_scheduler.get_scheduler()
+
+def retry_policy(max_retries=3, deadline=None):
+    """SOAP retry politikası: üstel backoff + jitter, toplam deadline"""
+    return retry_scheduler.RetryPolicy(
+        max_attempts=max_retries,
+        base_delay=SOAP_RETRY_BASE_DELAY,
+        max_delay=SOAP_RETRY_MAX_DELAY,
+        jitter=SOAP_RETRY_JITTER,
+        deadline=SOAP_RETRY_DEADLINE if deadline is None else deadline,
+        # Kalıcı fault (Client, 4xx) ya da devre açıksa retry zamanlanmaz; hata hemen sonuçlanır
+        retryable=lambda exc: (not isinstance(exc, CircuitOpenError) and is_retryable(exc)
+                               and soap_breaker.state != OPEN)
+    )
+
+def send_stock_update_async(stock_data, max_retries=3, deadline=None):
+    """
+    SOAP stok güncellemesini arka planda gönder; hemen Future döner. Başarısız denemeler
+    retry zamanlayıcıda bekler (sleep yok). Future send_stock_update ile aynı dict'le tamamlanır.
+    deadline verilirse her denemenin HTTP timeout'u deadline'a kalan süreyle sınırlanır.
+    """
     print("\n" + "="*60)
     print("SOAP Request Gönderiliyor...")
     print("="*60)
-    
-    retry_delays = [5, 15, 30]
-    
-    for attempt in range(1, max_retries + 1):
+    print(f" Hospital ID: {stock_data.get('hospitalId', HOSPITAL_ID)}")
+    print(f"Product: {stock_data.get('productCode', PRODUCT_CODE)}")
+    print(f"Current Stock: {stock_data['currentStockUnits']} units")
+    print(f"Daily Consumption: {stock_data['dailyConsumptionUnits']} units")
+    print(f" Days of Supply: {stock_data['daysOfSupply']:.2f} days")
+    print(f" Endpoint: {SOAP_URL}")
+
+    soap_request = build_envelope(stock_data)
+    headers = {
+        'Content-Type': 'text/xml; charset=utf-8',
+        'SOAPAction': STOCK_UPDATE_ACTION
+    }
+    # Son denemenin süresi; vazgeçildiğinde FAILURE kaydına yazılır
+    last_latency = {'ms': 0}
+    expires_at = None if deadline is None else time.monotonic() + deadline
+
+    def request_timeout():
+        if expires_at is None:
+            return SOAP_REQUEST_TIMEOUT
+        return min(SOAP_REQUEST_TIMEOUT, max(0.01, expires_at - time.monotonic()))
+
+    def attempt_once(attempt):
+        # İlk deneme izni submit öncesi alındı; retry'lar devre o arada açıldıysa gitmez
+        if attempt > 1 and not soap_breaker.allow():
+            raise CircuitOpenError('SOAP circuit breaker açık')
         start_time = datetime.now()
-        
         try:
-            soap_request = create_soap_envelope(stock_data)
-            
-            if attempt == 1:
-                print(f" Hospital ID: {HOSPITAL_ID}")
-                print(f"Product: {PRODUCT_CODE}")
-                print(f"Current Stock: {stock_data['currentStockUnits']} units")
-                print(f"Daily Consumption: {stock_data['dailyConsumptionUnits']} units")
-                print(f" Days of Supply: {stock_data['daysOfSupply']:.2f} days")
-                print(f" Endpoint: {SOAP_URL}")
-            else:
-                print(f"\n Retry #{attempt}/{max_retries}")
-            
-            headers = {
-                'Content-Type': 'text/xml; charset=utf-8',
-                'SOAPAction': 'http://hospital-supply-chain.example.com/soap/stock/StockUpdate'
-            }
-            
-            response = requests.post(
+            response = get_http_session().post(
                 SOAP_URL,
                 data=soap_request,
                 headers=headers,
-                timeout=30
+                timeout=request_timeout()
             )
-            
-            end_time = datetime.now()
-            latency_ms = int((end_time - start_time).total_seconds() * 1000)
-            
-            if response.status_code == 200:
-                parsed_response = parse_soap_response(response.text)
-                
-                print(f"\n Response Alındı (Latency: {latency_ms}ms, Attempt: {attempt})")
-                print("-"*60)
-                print(f"Success: {parsed_response['success']}")
-                print(f"Message: {parsed_response['message']}")
-                print(f"Order Triggered: {parsed_response['orderTriggered']}")
-                
-                if parsed_response.get('orderId'):
-                    print(f"Order ID: {parsed_response['orderId']}")
-                
-                log_event(
-                    event_type='STOCK_UPDATE_SENT',
-                    status='SUCCESS',
-                    payload=str(stock_data),
-                    latency_ms=latency_ms
-                )
-                
-                print("="*60)
-                
-                return {
-                    'success': True,
-                    'response': parsed_response,
-                    'latency_ms': latency_ms,
-                    'attempts': attempt
-                }
+            if response.status_code != 200:
+                raise response_error(response.status_code, response.content, response.text)
+        except Exception as e:
+            # Kalıcı fault'ta uzak taraf cevap verdi; endpoint ayakta sayılır
+            if is_retryable(e):
+                soap_breaker.record_failure()
             else:
-                raise Exception(f"HTTP {response.status_code}: {response.text}")
-            
+                soap_breaker.record_success()
+            raise
+        finally:
+            last_latency['ms'] = int((datetime.now() - start_time).total_seconds() * 1000)
+        soap_breaker.record_success()
+
+        latency_ms = last_latency['ms']
+        parsed_response = parse_soap_response(response.content)
+        if parsed_response.get('fault') is not None:
+            raise fault_error(parsed_response['fault'], response.status_code)
+
+        print(f"\n Response Alındı (Latency: {latency_ms}ms, Attempt: {attempt})")
+        print("-"*60)
+        print(f"Success: {parsed_response['success']}")
+        print(f"Message: {parsed_response['message']}")
+        print(f"Order Triggered: {parsed_response['orderTriggered']}")
+
+        if parsed_response.get('orderId'):
+            print(f"Order ID: {parsed_response['orderId']}")
+
+        log_event(
+            event_type='STOCK_UPDATE_SENT',
+            status='SUCCESS',
+            payload=str(stock_data),
+            latency_ms=latency_ms
+        )
+
+        print("="*60)
+
+        return {
+            'success': True,
+            'response': parsed_response,
+            'latency_ms': latency_ms,
+            'attempts': attempt
+        }
+
+    def on_retry(attempt, error, delay):
+        print(f"\nSOAP Hatası (Attempt {attempt}/{max_retries}): {error}")
+        print(f"⏳ Retry #{attempt + 1}/{max_retries} {delay:.1f} saniye sonra (arka planda)")
+        log_event(
+            event_type='STOCK_UPDATE_SENT',
+            status='RETRY',
+            payload=str(stock_data),
+            error_message=format_error(error),
+            latency_ms=last_latency['ms']
+        )
+
+    def on_failure(error, attempts):
+        retryable = is_retryable(error)
+        print(f"\nSOAP Hatası (Attempt {attempts}/{max_retries}): {error}")
+        print("="*60)
+        if retryable:
+            print("Tüm denemeler başarısız oldu!")
+        else:
+            print("Kalıcı hata; tekrar denenmeyecek")
+
+        log_event(
+            event_type='STOCK_UPDATE_SENT',
+            status='FAILURE',
+            payload=str(stock_data),
+            error_message=format_error(error),
+            latency_ms=last_latency['ms']
+        )
+
+        return {
+            'success': False,
+            'error': str(error),
+            'error_code': error_code(error),
+            'retryable': retryable,
+            'latency_ms': last_latency['ms'],
+            'attempts': attempts
+        }
+
+    if not soap_breaker.allow():
+        # Devre açık: istek, retry ve DB yazımı yok; sayaç breaker_stats()'ta
+        print("🔌 SOAP circuit breaker açık; istek gönderilmedi")
+        future = Future()
+        future.set_result({
+            'success': False,
+            'error': 'SOAP circuit breaker açık',
+            'error_code': 'CIRCUIT_OPEN',
+            'latency_ms': 0,
+            'attempts': 0,
+            'circuit_open': True
+        })
+        return future
+
+    return get_retry_scheduler().submit(
+        attempt_once,
+        retry_policy(max_retries, deadline),
+        on_retry=on_retry,
+        on_failure=on_failure
+    )
+
+def send_stock_update(stock_data, max_retries=3, timeout=None):
+    """
+    SOAP ile stok güncelleme mesajı gönder ve sonucu en fazla timeout saniye bekle (retry'lar arka
+    planda zamanlanır). Verilmezse her deneme için istek süresi + en uzun backoff kadar beklenir.
+    """
+    deadline = None
+    if timeout is None:
+        # Scheduler deadline'ı sadece denemenin başlamasını sınırlar; süren deneme beklemeyi uzatmasın
+        timeout = max_retries * (SOAP_REQUEST_TIMEOUT + SOAP_RETRY_MAX_DELAY)
+    else:
+        deadline = min(SOAP_RETRY_DEADLINE, timeout)
+    future = send_stock_update_async(stock_data, max_retries, deadline)
+    try:
+        return future.result(timeout=timeout)
+    except FuturesTimeoutError:
+        print(f"\nSOAP sonucu {timeout:g} saniyede alınamadı; beklemeden dönülüyor")
+        return {
+            'success': False,
+            'error': f'SOAP yanıtı {timeout:g}s içinde alınamadı',
+            'error_code': 'TIMEOUT',
+            'retryable': True,
+            'latency_ms': int(timeout * 1000),
+            'attempts': None
+        }
+
+# Bu kodlar operasyonun uzak tarafta olmadığını gösterir (batch desteklenmiyor)
+BATCH_UNSUPPORTED_STATUS = (404, 405, 415, 501)
+# Server/Receiver dışı bir fault'un kodunda ya da metninde bunlardan biri varsa operasyon bilinmiyor demektir
+BATCH_UNSUPPORTED_FAULTS = ('actionnotsupported', 'not supported', 'unknown operation', 'no such operation',
+                            'cannot find dispatch method', 'contractfilter')
+
+# Uzak taraf batch'i reddederse bu zamana (monotonic) kadar tekli çağrılara düşülür
+_batch_disabled_until = 0.0
+
+
+class BatchRejected(Exception):
+    """Uzak taraf StockUpdateBatch operasyonunu kabul etmedi"""
+
+
+def batch_unsupported_fault(fault):
+    """Fault 'operasyon desteklenmiyor' mu? Diğer fault'lar sadece o parçayı etkiler"""
+    if fault_class(fault.get('faultCode') or '') in TRANSIENT_FAULT_CODES:
+        return False
+    text = f"{fault.get('faultCode', '')} {fault.get('faultString', '')}".lower()
+    return any(marker in text for marker in BATCH_UNSUPPORTED_FAULTS)
+
+
+def item_key(stock_data):
+    """Batch sonucunu kaleme eşlemek için (hospitalId, productCode)"""
+    return (stock_data.get('hospitalId', HOSPITAL_ID), stock_data.get('productCode', PRODUCT_CODE))
+
+
+def map_batch_results(items, results):
+    """
+    Batch sonuçlarını kalemlere eşle: önce (hospitalId, productCode), anahtarsız sonuçlar
+    sırayla. Aynı anahtar birden çok kez varsa gönderim sırası korunur. Eşlenemeyen kalem None.
+    """
+    pending = defaultdict(deque)
+    for index, stock_data in enumerate(items):
+        pending[item_key(stock_data)].append(index)
+
+    mapped = [None] * len(items)
+    unkeyed = []
+    for result in results:
+        key = (result.get('hospitalId'), result.get('productCode'))
+        if key[1] is None:
+            unkeyed.append(result)
+            continue
+        if key[0] is None:
+            key = (HOSPITAL_ID, key[1])
+        if pending[key]:
+            mapped[pending[key].popleft()] = result
+
+    free = (i for i in range(len(items)) if mapped[i] is None)
+    for index, result in zip(free, unkeyed):
+        mapped[index] = result
+    return mapped
+
+
+def _post_batch(items, timeout=SOAP_REQUEST_TIMEOUT):
+    """Tek StockUpdateBatch isteği; sonuç listesini (kalem sırasıyla) ve latency'yi döndür"""
+    start_time = datetime.now()
+    response = get_http_session().post(
+        SOAP_URL,
+        data=build_batch_envelope(items),
+        headers={'Content-Type': 'text/xml; charset=utf-8', 'SOAPAction': STOCK_UPDATE_BATCH_ACTION},
+        timeout=timeout
+    )
+    latency_ms = int((datetime.now() - start_time).total_seconds() * 1000)
+
+    if response.status_code in BATCH_UNSUPPORTED_STATUS:
+        raise BatchRejected(f"HTTP {response.status_code}")
+
+    try:
+        parsed = parse_batch_response(response.content)
+    except Exception as e:
+        # Fault içermeyen bozuk gövde: 200 dışıysa HTTP durumuna göre sınıflanır
+        if response.status_code != 200:
+            raise response_error(response.status_code, b'', response.text)
+        raise SoapFaultError('BATCH_RESPONSE_INVALID', f'Batch yanıtı parse edilemedi: {e}', True, 200)
+    fault = parsed['fault']
+    if fault is not None:
+        if batch_unsupported_fault(fault):
+            raise BatchRejected(f"{fault.get('faultCode')}: {fault.get('faultString', '')}")
+        raise fault_error(fault, response.status_code)
+    if response.status_code != 200:
+        raise response_error(response.status_code, b'', response.text)
+    if parsed['results'] is None:
+        raise SoapFaultError('BATCH_RESPONSE_INVALID', 'StockUpdateBatchResponse yok', True, response.status_code)
+
+    return map_batch_results(items, parsed['results']), latency_ms
+
+
+def _batch_failure(error, latency_ms):
+    """Batch isteği uzak tarafa ulaştıktan sonraki hata; kalem tekrar gönderilmez (outbox/çağıran dener)"""
+    return {
+        'success': False,
+        'error': str(error),
+        'error_code': error_code(error),
+        'retryable': is_retryable(error),
+        'latency_ms': latency_ms,
+        'attempts': 1,
+        'batched': True
+    }
+
+
+def _deadline_failure():
+    """Süre dolduğu için hiç gönderilmeyen kalemin sonucu"""
+    return {
+        'success': False,
+        'error': 'Deadline doldu; gönderilmedi',
+        'error_code': 'TIMEOUT',
+        'retryable': True,
+        'latency_ms': 0,
+        'attempts': 0
+    }
+
+
+def send_stock_updates(items, batch_size=None, fallback_workers=None, max_retries=3, timeout=None):
+    """
+    Çok sayıda kalemi StockUpdateBatch envelope'larıyla gönder; sonuçlar kalem sırasıyla
+    (send_stock_update ile aynı formatta) döner. Kalemler paralel tekli send_stock_update
+    çağrılarına sadece istek uzak tarafa hiç ulaşmadıysa (bağlantı kurulamadı, devre açık) ya da
+    batch desteklenmiyorsa düşer. Ulaştıktan sonraki hatalar (timeout, 5xx, fault, eksik sonuç)
+    kalemler işlenmiş olabileceğinden tekrar gönderilmez, hata sonucu olarak döner.
+    max_retries tekli çağrılara geçer (retry'ı çağıran yapıyorsa 1). timeout verilirse her
+    HTTP isteği kalan süreyle sınırlanır; süre dolduktan sonra kalan kalemler gönderilmez.
+    """
+    global _batch_disabled_until
+
+    items = list(items)
+    batch_size = batch_size or SOAP_BATCH_SIZE
+    results = [None] * len(items)
+    expires_at = None if timeout is None else time.monotonic() + timeout
+
+    def remaining():
+        return None if expires_at is None else expires_at - time.monotonic()
+
+    for start in range(0, len(items), batch_size):
+        left = remaining()
+        if left is not None and left <= 0:
+            break
+        if time.monotonic() < _batch_disabled_until:
+            break
+        if not soap_breaker.allow():
+            # Kalanlar tekli yola düşer; orada da devre açık olduğundan anında reddedilir
+            break
+        chunk = items[start:start + batch_size]
+        start_time = datetime.now()
+        try:
+            mapped, latency_ms = _post_batch(
+                chunk, SOAP_REQUEST_TIMEOUT if left is None else min(SOAP_REQUEST_TIMEOUT, left))
+        except BatchRejected as e:
+            # Uzak taraf cevap verdi; endpoint ayakta sayılır
+            soap_breaker.record_success()
+            print(f"⚠️  SOAP batch desteklenmiyor ({e}); {SOAP_BATCH_RETRY_AFTER:g} saniye tekli çağrılar kullanılacak")
+            _batch_disabled_until = time.monotonic() + SOAP_BATCH_RETRY_AFTER
+            break
         except Exception as e:
-            end_time = datetime.now()
-            latency_ms = int((end_time - start_time).total_seconds() * 1000)
-            
-            print(f"\nSOAP Hatası (Attempt {attempt}/{max_retries}): {e}")
-            
-            if attempt < max_retries:
-                wait_time = retry_delays[attempt - 1]
-                print(f"⏳ {wait_time} saniye bekleniyor...")
-                time.sleep(wait_time)
+            if is_retryable(e):
+                soap_breaker.record_failure()
             else:
-                print("="*60)
-                print("Tüm denemeler başarısız oldu!")
-                
+                soap_breaker.record_success()
+            if request_not_sent(e):
+                print(f"⚠️  SOAP batch gönderilemedi ({len(chunk)} kalem): {e}; tekli çağrılara düşülüyor")
+                continue
+            print(f"⚠️  SOAP batch hatası ({len(chunk)} kalem): {e}")
+            latency_ms = int((datetime.now() - start_time).total_seconds() * 1000)
+            mapped = [None] * len(chunk)
+            error = e
+        else:
+            soap_breaker.record_success()
+            error = SoapFaultError('BATCH_RESULT_MISSING', 'Batch yanıtında kalem sonucu yok', True)
+
+        for offset, parsed in enumerate(mapped):
+            if parsed is None:
+                results[start + offset] = _batch_failure(error, latency_ms)
                 log_event(
-                    event_type='STOCK_UPDATE_SENT',
+                    event_type='STOCK_UPDATE_BATCH_SENT',
                     status='FAILURE',
-                    payload=str(stock_data),
-                    error_message=str(e),
+                    payload=str(chunk[offset]),
+                    error_message=format_error(error),
                     latency_ms=latency_ms
                 )
-                
-                return {
-                    'success': False,
-                    'error': str(e),
-                    'latency_ms': latency_ms,
-                    'attempts': attempt
-                }
+                continue
+            results[start + offset] = {
+                'success': True,
+                'response': parsed,
+                'latency_ms': latency_ms,
+                'attempts': 1,
+                'batched': True
+            }
+            log_event(
+                event_type='STOCK_UPDATE_BATCH_SENT',
+                status='SUCCESS',
+                payload=str(chunk[offset]),
+                latency_ms=latency_ms
+            )
+        print(f"📦 SOAP batch: {sum(p is not None for p in mapped)}/{len(chunk)} kalem "
+              f"(Latency: {latency_ms}ms)")
+
+    pending = [i for i, result in enumerate(results) if result is None]
+    if pending:
+        workers = min(fallback_workers or SOAP_BATCH_FALLBACK_WORKERS, len(pending))
+        def send(stock_data):
+            # Kalan süre her çağrı başladığında hesaplanır; havuzda bekleyen kalem süreyi aşmaz
+            left = remaining()
+            if left is not None and left <= 0:
+                return _deadline_failure()
+            return send_stock_update(stock_data, max_retries=max_retries, timeout=left)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='soap-fallback') as executor:
+            for index, result in zip(pending, executor.map(send, [items[i] for i in pending])):
+                results[index] = result
+
+    return results
 
 def main():
     """Ana fonksiyon"""
@@ -0,0 +1,114 @@
+from datetime import datetime
+from functools import lru_cache
+
+
+HOSPITAL_ID = 'Hospital-C'
+PRODUCT_CODE = 'PHYSIO-SALINE-500ML'
+
+SOAP_NS = 'http://schemas.xmlsoap.org/soap/envelope/'
+TNS_NS = 'http://hospital-supply-chain.example.com/soap'
+STOCK_NS = 'http://hospital-supply-chain.example.com/soap/stock'
+
+# Dinamik alanların yeri \x00 ile işaretlenir; şablon import sırasında bir kez byte parçalarına bölünür
+_TEMPLATE = f"""<?xml version="1.0" encoding="UTF-8"?>
+<soap:Envelope xmlns:soap="{SOAP_NS}"
+               xmlns:tns="{TNS_NS}"
+               xmlns:stock="{STOCK_NS}">
+    <soap:Body>
+        <tns:StockUpdate>
+            <tns:request>
+                <stock:hospitalId>\x00</stock:hospitalId>
+                <stock:productCode>\x00</stock:productCode>
+                <stock:currentStockUnits>\x00</stock:currentStockUnits>
+                <stock:dailyConsumptionUnits>\x00</stock:dailyConsumptionUnits>
+                <stock:daysOfSupply>\x00</stock:daysOfSupply>
+                <stock:timestamp>\x00</stock:timestamp>
+            </tns:request>
+        </tns:StockUpdate>
+    </soap:Body>
+</soap:Envelope>"""
+
+SEGMENTS = tuple(part.encode('utf-8') for part in _TEMPLATE.split('\x00'))
+
+# Batch: aynı <tns:request> bloğu StockUpdateBatch içinde tekrarlanır
+_BATCH_HEAD = f"""<?xml version="1.0" encoding="UTF-8"?>
+<soap:Envelope xmlns:soap="{SOAP_NS}"
+               xmlns:tns="{TNS_NS}"
+               xmlns:stock="{STOCK_NS}">
+    <soap:Body>
+        <tns:StockUpdateBatch>
+"""
+_BATCH_ITEM = """            <tns:request>
+                <stock:hospitalId>\x00</stock:hospitalId>
+                <stock:productCode>\x00</stock:productCode>
+                <stock:currentStockUnits>\x00</stock:currentStockUnits>
+                <stock:dailyConsumptionUnits>\x00</stock:dailyConsumptionUnits>
+                <stock:daysOfSupply>\x00</stock:daysOfSupply>
+                <stock:timestamp>\x00</stock:timestamp>
+            </tns:request>
+"""
+_BATCH_TAIL = """        </tns:StockUpdateBatch>
+    </soap:Body>
+</soap:Envelope>"""
+
+BATCH_HEAD = _BATCH_HEAD.encode('utf-8')
+BATCH_ITEM_SEGMENTS = tuple(part.encode('utf-8') for part in _BATCH_ITEM.split('\x00'))
+BATCH_TAIL = _BATCH_TAIL.encode('utf-8')
+
+
+def _escape(text):
+    """XML metin içeriği için &, < ve > kaçışı"""
+    if '&' in text:
+        text = text.replace('&', '&amp;')
+    if '<' in text:
+        text = text.replace('<', '&lt;')
+    if '>' in text:
+        text = text.replace('>', '&gt;')
+    return text
+
+
+@lru_cache(maxsize=4096)
+def _encode_text(value):
+    """Tekrarlayan kimlik alanları (hastane/ürün kodu) bir kez kaçışlanıp encode edilir"""
+    return _escape(str(value)).encode('utf-8')
+
+
+def _number(value):
+    """Tamsayılar doğrudan, diğer tipler kaçışlanarak"""
+    if type(value) is int:
+        return b'%d' % value
+    return _escape(str(value)).encode('utf-8')
+
+
+def _splice(stock_data, timestamp, s=SEGMENTS):
+    """Sabit byte parçalarının arasına dinamik alanları yerleştir"""
+    return b''.join((
+        s[0], _encode_text(stock_data.get('hospitalId', HOSPITAL_ID)),
+        s[1], _encode_text(stock_data.get('productCode', PRODUCT_CODE)),
+        s[2], _number(stock_data['currentStockUnits']),
+        s[3], _number(stock_data['dailyConsumptionUnits']),
+        s[4], b'%.2f' % float(stock_data['daysOfSupply']),
+        s[5], timestamp,
+        s[6]
+    ))
+
+
+def build_envelope(stock_data, timestamp=None):
+    """Tek StockUpdate envelope'u doğrudan request body olarak (bytes)"""
+    timestamp = (timestamp or datetime.now()).isoformat().encode('ascii')
+    return _splice(stock_data, timestamp)
+
+
+def build_envelopes(items, timestamp=None):
+    """Çok sayıda envelope; batch için zaman damgası bir kez hesaplanır"""
+    timestamp = (timestamp or datetime.now()).isoformat().encode('ascii')
+    return [_splice(stock_data, timestamp) for stock_data in items]
+
+
+def build_batch_envelope(items, timestamp=None):
+    """Çok sayıda kalemi tek StockUpdateBatch envelope'unda paketle (bytes)"""
+    timestamp = (timestamp or datetime.now()).isoformat().encode('ascii')
+    parts = [BATCH_HEAD]
+    parts.extend(_splice(stock_data, timestamp, BATCH_ITEM_SEGMENTS) for stock_data in items)
+    parts.append(BATCH_TAIL)
+    return b''.join(parts)
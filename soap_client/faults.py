@@ -0,0 +1,96 @@
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from response import parse_response
+
+
+# SOAP 1.1 / 1.2 fault kodları: isteğin kendisi hatalıysa tekrar denemek sonucu değiştirmez
+PERMANENT_FAULT_CODES = frozenset({'Client', 'Sender', 'VersionMismatch', 'MustUnderstand',
+                                   'DataEncodingUnknown'})
+TRANSIENT_FAULT_CODES = frozenset({'Server', 'Receiver'})
+# Fault gövdesi olmayan yanıtlar: bu durumlar tekrar denense de değişmez
+PERMANENT_HTTP_STATUS = frozenset({400, 401, 403, 404, 405, 406, 411, 413, 414, 415, 422})
+ERROR_TEXT_LIMIT = 500
+
+
+class SoapFaultError(Exception):
+    """
+    Sınıflandırılmış SOAP / HTTP hatası. code event_log.error_message'ın başına [code] olarak
+    yazılır (örn. soap:Client/SCHEMA_VALIDATION, HTTP_503); retryable False ise retry zamanlanmaz.
+    """
+
+    def __init__(self, code, message, retryable, status_code=None, fault=None):
+        super().__init__(message)
+        self.code = code
+        self.retryable = retryable
+        self.status_code = status_code
+        self.fault = fault
+
+    def __str__(self):
+        return f'[{self.code}] {self.args[0]}'
+
+
+def fault_class(fault_code):
+    """'soap:Client.Validation' -> 'Client' (önek ve SOAP 1.1 nokta alt kodları atılır)"""
+    return fault_code.rsplit(':', 1)[-1].split('.', 1)[0]
+
+
+def fault_error(fault, status_code=None):
+    """Parse edilmiş SOAP Fault'u sınıflandır"""
+    fault_code = fault.get('faultCode') or 'Fault'
+    code = f"{fault_code}/{fault['errorCode']}" if fault.get('errorCode') else fault_code
+    message = fault.get('errorMessage') or fault.get('faultString') or 'SOAP Fault'
+    if status_code is not None:
+        message = f'{message} (HTTP {status_code})'
+
+    cls = fault_class(fault_code)
+    if cls in PERMANENT_FAULT_CODES:
+        retryable = False
+    elif cls in TRANSIENT_FAULT_CODES:
+        retryable = True
+    else:
+        retryable = status_code not in PERMANENT_HTTP_STATUS
+    return SoapFaultError(code, message, retryable, status_code, fault)
+
+
+def response_error(status_code, body, text=''):
+    """200 dışı yanıttan SoapFaultError; gövde Fault içeriyorsa fault koduna, yoksa HTTP durumuna göre"""
+    try:
+        fault = parse_response(body)['fault']
+    except Exception:
+        fault = None
+    if fault is not None:
+        return fault_error(fault, status_code)
+    return SoapFaultError(f'HTTP_{status_code}', f'HTTP {status_code}: {str(text)[:ERROR_TEXT_LIMIT]}',
+                          status_code not in PERMANENT_HTTP_STATUS, status_code)
+
+
+def is_retryable(exc):
+    """Sınıflandırılmış hatalarda sınıfa göre; ağ hataları ve bilinmeyenler tekrar denenir"""
+    return getattr(exc, 'retryable', True)
+
+
+def request_not_sent(exc):
+    """Bağlantı hiç kurulamadı mı? Kurulduysa uzak taraf isteği işlemiş olabilir"""
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(exc.args[0], 'reason', None) if exc.args else None
+    return isinstance(exc, requests.exceptions.ConnectionError) and isinstance(reason, NewConnectionError)
+
+
+def error_code(exc):
+    """event_log kırılımı için kısa hata kodu"""
+    if isinstance(exc, SoapFaultError):
+        return exc.code
+    if isinstance(exc, requests.exceptions.Timeout):
+        return 'TIMEOUT'
+    if isinstance(exc, (requests.exceptions.ConnectionError, ConnectionError)):
+        return 'CONNECTION_ERROR'
+    return type(exc).__name__
+
+
+def format_error(exc):
+    """'[code] mesaj' (SoapFaultError zaten bu biçimde)"""
+    if isinstance(exc, SoapFaultError):
+        return str(exc)
+    return f'[{error_code(exc)}] {exc}'
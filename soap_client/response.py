@@ -0,0 +1,140 @@
+try:
+    from lxml.etree import XMLPullParser
+    PARSER_BACKEND = 'lxml'
+except ImportError:
+    from xml.etree.ElementTree import XMLPullParser
+    PARSER_BACKEND = 'xml.etree'
+
+
+SOAP_NS = 'http://schemas.xmlsoap.org/soap/envelope/'
+SOAP12_NS = 'http://www.w3.org/2003/05/soap-envelope'
+# Client envelope'u .../soap, WSDL targetNamespace'i .../soap/stock kullanıyor; ikisi de kabul edilir
+RESPONSE_NAMESPACES = (
+    'http://hospital-supply-chain.example.com/soap',
+    'http://hospital-supply-chain.example.com/soap/stock',
+)
+
+RESPONSE_FIELDS = ('success', 'message', 'orderTriggered', 'orderId')
+FAULT_FIELDS = ('errorCode', 'errorMessage', 'hospitalId', 'productCode', 'timestamp')
+CHUNK_SIZE = 1024
+
+# Etiketler Clark notasyonunda ({ns}local) önceden hesaplanır; arama yerine tek dict lookup
+_RESPONSE_TAGS = {f'{{{ns}}}{field}': field for ns in RESPONSE_NAMESPACES for field in RESPONSE_FIELDS}
+_RESPONSE_END = {f'{{{ns}}}StockUpdateResponse' for ns in RESPONSE_NAMESPACES}
+_FAULT_END = {f'{{{SOAP_NS}}}Fault', f'{{{SOAP12_NS}}}Fault'}
+# Batch yanıtı: her <result> kendi kalem anahtarını (hospitalId/productCode) taşır
+_BATCH_RESULT_TAGS = dict(_RESPONSE_TAGS)
+_BATCH_RESULT_TAGS.update({f'{{{ns}}}{field}': field for ns in RESPONSE_NAMESPACES
+                           for field in ('hospitalId', 'productCode')})
+_BATCH_RESULT_END = {f'{{{ns}}}result' for ns in RESPONSE_NAMESPACES}
+_BATCH_RESPONSE_END = {f'{{{ns}}}StockUpdateBatchResponse' for ns in RESPONSE_NAMESPACES}
+# SOAP 1.1 faultcode/faultstring niteliksizdir; detail alanları WSDL namespace'inde
+_FAULT_TAGS = {'faultcode': 'faultCode', 'faultstring': 'faultString', 'faultactor': 'faultActor'}
+# SOAP 1.2: Code/Value (env:Sender/env:Receiver), Reason/Text ve Role envelope namespace'inde;
+# Subcode/Value ve diğer dillerdeki Text'ler sonra gelir, ilk değer tutulur
+_FAULT_TAGS.update({f'{{{SOAP12_NS}}}Value': 'faultCode', f'{{{SOAP12_NS}}}Text': 'faultString',
+                    f'{{{SOAP12_NS}}}Role': 'faultActor'})
+_FAULT_TAGS.update({f'{{{ns}}}{field}': field for ns in RESPONSE_NAMESPACES for field in FAULT_FIELDS})
+
+
+def _chunks(body):
+    """str/bytes gövdeyi parçalara böl; iterable (iter_content vb.) olduğu gibi geçer"""
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        view = memoryview(body)
+        return (view[i:i + CHUNK_SIZE] for i in range(0, len(view), CHUNK_SIZE))
+    if body is None:
+        raise ValueError('Boş SOAP response')
+    return body
+
+
+def _result(fields, fault):
+    if fault is not None:
+        return {
+            'success': False,
+            'message': fault.get('errorMessage') or fault.get('faultString', ''),
+            'orderTriggered': False,
+            'orderId': None,
+            'fault': fault
+        }
+    success = fields.get('success')
+    order_triggered = fields.get('orderTriggered')
+    return {
+        'success': success is not None and success.strip().lower() == 'true',
+        'message': fields.get('message') or '',
+        'orderTriggered': order_triggered is not None and order_triggered.strip().lower() == 'true',
+        'orderId': fields.get('orderId'),
+        'fault': None
+    }
+
+
+def parse_response(body):
+    """
+    SOAP response'u tek geçişte, akış halinde parse et. Dört alan (veya
+    StockUpdateResponse / Fault kapanışı) görülünce okuma durur.
+    body: str, bytes ya da bytes parçaları veren iterable.
+    """
+    parser = XMLPullParser(events=('end',))
+    fields = {}
+    fault = None
+
+    for chunk in _chunks(body):
+        parser.feed(bytes(chunk))
+        for _, elem in parser.read_events():
+            tag = elem.tag
+            if tag in _RESPONSE_TAGS:
+                fields[_RESPONSE_TAGS[tag]] = elem.text
+                if len(fields) == len(RESPONSE_FIELDS):
+                    return _result(fields, None)
+            elif tag in _FAULT_TAGS:
+                # Fault alt elemanları Fault kapanmadan önce gelir
+                fault = fault if fault is not None else {}
+                fault.setdefault(_FAULT_TAGS[tag], (elem.text or '').strip())
+            elif tag in _FAULT_END:
+                return _result(fields, fault or {})
+            elif tag in _RESPONSE_END:
+                # orderId opsiyonel; yanıt elemanı kapandıysa beklenecek alan kalmadı
+                return _result(fields, None)
+            # Okunan alt ağacı bırak; bellek yanıt boyutundan bağımsız kalır
+            elem.clear()
+
+    # Erken durmadıysa belge sonuna kadar okundu; eksik/bozuk XML burada hata verir
+    parser.close()
+    return _result(fields, fault)
+
+
+def parse_batch_response(body):
+    """
+    StockUpdateBatchResponse'u akış halinde parse et.
+    {'results': [...] | None, 'fault': dict | None} döner; results None ise yanıt batch yanıtı değil.
+    Her sonuç tekli yanıt alanlarına ek olarak hospitalId/productCode taşır (varsa).
+    """
+    parser = XMLPullParser(events=('end',))
+    results = []
+    current = {}
+    fault = None
+
+    for chunk in _chunks(body):
+        parser.feed(bytes(chunk))
+        for _, elem in parser.read_events():
+            tag = elem.tag
+            if tag in _BATCH_RESULT_TAGS:
+                current[_BATCH_RESULT_TAGS[tag]] = elem.text
+            elif tag in _BATCH_RESULT_END:
+                result = _result(current, None)
+                result['hospitalId'] = current.get('hospitalId')
+                result['productCode'] = current.get('productCode')
+                results.append(result)
+                current = {}
+            elif tag in _BATCH_RESPONSE_END:
+                return {'results': results, 'fault': None}
+            elif tag in _FAULT_TAGS:
+                fault = fault if fault is not None else {}
+                fault.setdefault(_FAULT_TAGS[tag], (elem.text or '').strip())
+            elif tag in _FAULT_END:
+                return {'results': None, 'fault': fault or {}}
+            elem.clear()
+
+    parser.close()
+    return {'results': None, 'fault': fault}
@@ -0,0 +1,169 @@
+"""
+Yük sürücüsü: send_stock_update ve publish_event_to_hub çağrılarını sabit eşzamanlılıkla
+stand-in'lere (ya da verilen URL'lere) gönderir; throughput, p50/p95/p99 ve hata kodu
+dağılımını raporlar. Retry'lar ve circuit breaker dahil uçtan uca client davranışı ölçülür.
+
+Kullanım:
+    python standins/driver.py --requests 2000 --concurrency 32 --soap-latency-ms 40 --soap-jitter-ms 30 \\
+        --soap-error-rate 0.02 --soap-fault-rate 0.01 --soap-fault-code soap:Client --retry-base-delay 0.05
+    python standins/driver.py --soap-url https://.../CentralServices --path soap   # gerçek endpoint
+"""
+import argparse
+import contextlib
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from servers import add_server_args, start_from_args
+
+STOCK_DATA = {'currentStockUnits': 150, 'dailyConsumptionUnits': 79, 'daysOfSupply': 1.9}
+BREACH_DATA = {'current_stock': 150, 'daily_consumption': 79, 'days_of_supply': 1.9}
+
+
+def percentile(ordered, p):
+    return ordered[min(int(len(ordered) * p), len(ordered) - 1)] if ordered else 0.0
+
+
+def summarize(name, samples, elapsed):
+    """samples: [(latency_ms, success, error_code, attempts)]"""
+    latencies = sorted(s[0] for s in samples)
+    ok = sum(1 for s in samples if s[1])
+    codes = Counter(s[2] for s in samples if not s[1])
+    attempts = [s[3] for s in samples if s[3] is not None]
+    return {
+        'path': name,
+        'requests': len(samples),
+        'success': ok,
+        'throughput_rps': round(len(samples) / elapsed, 1) if elapsed > 0 else 0.0,
+        'p50_ms': round(statistics.median(latencies), 1) if latencies else 0.0,
+        'p95_ms': round(percentile(latencies, 0.95), 1),
+        'p99_ms': round(percentile(latencies, 0.99), 1),
+        'max_ms': round(latencies[-1], 1) if latencies else 0.0,
+        'avg_attempts': round(statistics.mean(attempts), 2) if attempts else None,
+        'errors': dict(codes.most_common())
+    }
+
+
+def run_load(call, requests, concurrency):
+    """call() -> (success, error_code, attempts); concurrency thread ile requests kez çağır"""
+    samples = []
+    lock = threading.Lock()
+
+    def one(_):
+        start = time.perf_counter()
+        try:
+            success, code, attempts = call()
+        except Exception as e:
+            success, code, attempts = False, type(e).__name__, None
+        latency_ms = (time.perf_counter() - start) * 1000
+        with lock:
+            samples.append((latency_ms, success, code, attempts))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='driver') as executor:
+        list(executor.map(one, range(requests)))
+    return samples, time.perf_counter() - start
+
+
+def soap_call(client, max_retries):
+    def call():
+        result = client.send_stock_update(dict(STOCK_DATA), max_retries=max_retries)
+        return result['success'], result.get('error_code'), result.get('attempts')
+    return call
+
+
+def event_call(monitor):
+    def call():
+        result = monitor.publish_event_to_hub(dict(BREACH_DATA))
+        code = None if result['success'] else result.get('error', '').split(':', 1)[0]
+        return result['success'], code, None
+    return call
+
+
+def print_summary(summary):
+    print(f"\n{summary['path']}: {summary['requests']} istek, {summary['success']} başarılı "
+          f"| {summary['throughput_rps']} req/s")
+    print(f"  p50={summary['p50_ms']}ms  p95={summary['p95_ms']}ms  p99={summary['p99_ms']}ms  "
+          f"max={summary['max_ms']}ms" +
+          (f"  ort. deneme={summary['avg_attempts']}" if summary['avg_attempts'] is not None else ''))
+    for code, count in summary['errors'].items():
+        print(f"  {code}: {count}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='SOAP / Event Hub load driver')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--path', choices=['soap', 'event', 'both'], default='both')
+    parser.add_argument('--soap-url', default=None, help='verilmezse yerel SOAP stand-in açılır')
+    parser.add_argument('--event-url', default=None,
+                        help='StockMS taban URL\'i; verilmezse yerel Event Hub stand-in açılır')
+    parser.add_argument('--max-retries', type=int, default=3)
+    parser.add_argument('--retry-base-delay', type=float, default=None,
+                        help='SOAP_RETRY_BASE_DELAY yerine (saniye)')
+    parser.add_argument('--event-log', action='store_true',
+                        help='event_log satırlarını da yaz (varsayılan: kapalı, DB gerekmez)')
+    parser.add_argument('--verbose', action='store_true', help='client çıktılarını gösterme')
+    add_server_args(parser)
+    args = parser.parse_args(argv)
+
+    # Modül sabitleri import sırasında okunur: eşzamanlı deneme ve HTTP havuzu eşzamanlılığa göre
+    os.environ['RETRY_WORKERS'] = str(args.concurrency)
+    os.environ['HTTP_POOL_MAXSIZE'] = str(args.concurrency)
+
+    servers = []
+    if args.soap_url is None or args.event_url is None:
+        soap, event = start_from_args(args)
+        servers = [soap, event]
+        os.environ['SOAP_STOCK_UPDATE_URL'] = args.soap_url or soap.url
+        os.environ['STOCKMS_URL'] = args.event_url or event.url
+    else:
+        os.environ['SOAP_STOCK_UPDATE_URL'] = args.soap_url
+        os.environ['STOCKMS_URL'] = args.event_url
+
+    from soap_client import client
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'stock_monitor')))
+    import monitor
+
+    if args.retry_base_delay is not None:
+        client.SOAP_RETRY_BASE_DELAY = args.retry_base_delay
+    if not args.event_log:
+        client.log_event = lambda *a, **kw: True
+    client.soap_breaker.reset()
+
+    print(f"SOAP:      {os.environ['SOAP_STOCK_UPDATE_URL']}")
+    print(f"Event Hub: {os.environ['STOCKMS_URL']}/publish-event")
+    print(f"{args.requests} istek x {args.concurrency} eşzamanlı")
+
+    summaries = []
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, 'w'))
+    try:
+        with quiet:
+            if args.path in ('soap', 'both'):
+                samples, elapsed = run_load(soap_call(client, args.max_retries), args.requests,
+                                            args.concurrency)
+                summaries.append(summarize('SOAP send_stock_update', samples, elapsed))
+            if args.path in ('event', 'both'):
+                samples, elapsed = run_load(event_call(monitor), args.requests, args.concurrency)
+                summaries.append(summarize('Event Hub publish_event_to_hub', samples, elapsed))
+        for summary in summaries:
+            print_summary(summary)
+        print(f"\nCircuit breaker: {client.breaker_stats()['state']} "
+              f"(reddedilen: {client.breaker_stats()['rejected']})")
+        for server in servers:
+            print(f"{server.name} stand-in: {server.stats()}")
+    finally:
+        for server in servers:
+            server.close()
+    return summaries
+
+
+if __name__ == "__main__":
+    main()
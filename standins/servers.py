@@ -0,0 +1,336 @@
+"""
+Team 1 StockUpdateService (SOAP) ve Event Hub yayın ucu için yerel stand-in sunucular.
+Gecikme, jitter, hata oranı ve SOAP Fault enjeksiyonu ayarlanabilir; benchmark'lar
+internet/Azure olmadan tekrarlanabilir şekilde çalışır.
+
+Kullanım:
+    python standins/servers.py --soap-port 8000 --event-port 8081 --latency-ms 40 --jitter-ms 20 \\
+        --error-rate 0.02 --fault-rate 0.01 --fault-code soap:Client
+
+    SOAP_STOCK_UPDATE_URL=http://localhost:8000/StockUpdateService
+    STOCKMS_URL=http://localhost:8081
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STOCK_NS = 'http://hospital-supply-chain.example.com/soap/stock'
+BATCH_ACTION = 'StockUpdateBatch'
+ORDER_THRESHOLD_DAYS = 2.0
+
+# Kalem alanları envelope'taki sırayla gelir; hospitalId her kalemin ilk alanı
+_FIELD_RE = re.compile(rb'<(?:\w+:)?(hospitalId|productCode|daysOfSupply)>([^<]*)</')
+
+_RESPONSE = """<?xml version="1.0" encoding="UTF-8"?>
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/" xmlns:tns="{ns}">
+    <soap:Body>
+        <tns:StockUpdateResponse>
+{fields}
+        </tns:StockUpdateResponse>
+    </soap:Body>
+</soap:Envelope>"""
+
+_BATCH_RESPONSE = """<?xml version="1.0" encoding="UTF-8"?>
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/" xmlns:tns="{ns}">
+    <soap:Body>
+        <tns:StockUpdateBatchResponse>
+{results}
+        </tns:StockUpdateBatchResponse>
+    </soap:Body>
+</soap:Envelope>"""
+
+_FAULT = """<?xml version="1.0" encoding="UTF-8"?>
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/" xmlns:tns="{ns}">
+    <soap:Body>
+        <soap:Fault>
+            <faultcode>{code}</faultcode>
+            <faultstring>{message}</faultstring>
+            <detail>
+                <tns:StockUpdateFault>
+                    <tns:errorCode>{error_code}</tns:errorCode>
+                    <tns:errorMessage>{message}</tns:errorMessage>
+                </tns:StockUpdateFault>
+            </detail>
+        </soap:Fault>
+    </soap:Body>
+</soap:Envelope>"""
+
+
+class FaultInjector:
+    """
+    İstek başına gecikme ve sonuç seçimi: önce fault_rate (SOAP Fault, HTTP 500),
+    sonra error_rate (error_status, gövdesiz), kalanı başarılı. Sayaçlar stats()'ta.
+    """
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, error_status=503,
+                 fault_rate=0.0, fault_code='soap:Server', fault_error_code='STANDIN_FAULT', seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.fault_rate = fault_rate
+        self.fault_code = fault_code
+        self.fault_error_code = fault_error_code
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts = {'requests': 0, 'ok': 0, 'errors': 0, 'faults': 0}
+
+    def decide(self):
+        """(gecikme saniye, 'ok' | 'error' | 'fault')"""
+        with self._lock:
+            delay = (self.latency_ms + self._rng.uniform(0, self.jitter_ms)) / 1000
+            roll = self._rng.random()
+            if roll < self.fault_rate:
+                outcome = 'fault'
+            elif roll < self.fault_rate + self.error_rate:
+                outcome = 'error'
+            else:
+                outcome = 'ok'
+            self.counts['requests'] += 1
+            self.counts[{'ok': 'ok', 'error': 'errors', 'fault': 'faults'}[outcome]] += 1
+        return delay, outcome
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counts)
+
+
+def parse_items(body):
+    """Envelope'taki kalemler: [{'hospitalId', 'productCode', 'daysOfSupply'}, ...]"""
+    items = []
+    for name, value in _FIELD_RE.findall(body):
+        name = name.decode()
+        if name == 'hospitalId' or not items:
+            items.append({})
+        items[-1][name] = value.decode()
+    return items
+
+
+def _result_fields(item, indent):
+    try:
+        order = float(item.get('daysOfSupply', 'inf')) < ORDER_THRESHOLD_DAYS
+    except ValueError:
+        order = False
+    lines = [f'<tns:success>true</tns:success>',
+             f'<tns:message>Stock updated</tns:message>',
+             f'<tns:orderTriggered>{"true" if order else "false"}</tns:orderTriggered>']
+    if order:
+        lines.append(f'<tns:orderId>ORD-STANDIN-{int(time.time() * 1000) % 10 ** 8}</tns:orderId>')
+    return '\n'.join(indent + line for line in lines)
+
+
+def soap_response(items, batch):
+    """StockUpdateResponse ya da her kalem için <result> içeren StockUpdateBatchResponse"""
+    if not batch:
+        item = items[0] if items else {}
+        return _RESPONSE.format(ns=STOCK_NS, fields=_result_fields(item, ' ' * 12)).encode('utf-8')
+    results = []
+    for item in items:
+        key = (f'                <tns:hospitalId>{item.get("hospitalId", "")}</tns:hospitalId>\n'
+               f'                <tns:productCode>{item.get("productCode", "")}</tns:productCode>\n')
+        results.append(f'            <tns:result>\n{key}{_result_fields(item, " " * 16)}\n'
+                       f'            </tns:result>')
+    return _BATCH_RESPONSE.format(ns=STOCK_NS, results='\n'.join(results)).encode('utf-8')
+
+
+def soap_fault(code, error_code, message):
+    return _FAULT.format(ns=STOCK_NS, code=code, error_code=error_code, message=message).encode('utf-8')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive (client session bağlantıları yeniden kullanır)
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def do_GET(self):
+        body = json.dumps({'status': 'UP', 'service': self.server.name,
+                           'stats': self.server.injector.stats()}).encode('utf-8')
+        self._send(200, body, 'application/json')
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+class SoapHandler(_Handler):
+    """POST: StockUpdate / StockUpdateBatch (SOAPAction başlığına göre)"""
+
+    def do_POST(self):
+        body = self._read_body()
+        delay, outcome = self.server.injector.decide()
+        if delay:
+            time.sleep(delay)
+
+        injector = self.server.injector
+        if outcome == 'fault':
+            self._send(500, soap_fault(injector.fault_code, injector.fault_error_code,
+                                       'Injected fault'), 'text/xml; charset=utf-8')
+        elif outcome == 'error':
+            self._send(injector.error_status, b'Injected error', 'text/plain')
+        else:
+            batch = BATCH_ACTION in self.headers.get('SOAPAction', '')
+            if batch and not self.server.batch:
+                self._send(500, soap_fault('soap:Client', 'UNKNOWN_OPERATION', 'Unknown operation'),
+                           'text/xml; charset=utf-8')
+                return
+            self._send(200, soap_response(parse_items(body), batch), 'text/xml; charset=utf-8')
+
+
+class EventHubHandler(_Handler):
+    """POST /publish-event(s) (StockMS sözleşmesi) ve /<hub>/messages (Event Hub REST, 201)"""
+
+    def do_POST(self):
+        start = time.perf_counter()
+        body = self._read_body()
+        delay, outcome = self.server.injector.decide()
+        if delay:
+            time.sleep(delay)
+
+        if outcome != 'ok':
+            self._send(self.server.injector.error_status, b'{"error": "Injected error"}',
+                       'application/json')
+        elif self.path.rstrip('/').endswith('/messages'):
+            self._send(201, b'', 'application/json')
+        else:
+            try:
+                event = json.loads(body or b'{}')
+            except ValueError:
+                self._send(400, b'{"error": "Invalid JSON"}', 'application/json')
+                return
+            latency_ms = int((time.perf_counter() - start) * 1000)
+            if self.path.rstrip('/').endswith('/publish-events'):
+                events = event if isinstance(event, list) else []
+                results = [{'index': i, 'eventId': e.get('eventId'), 'success': True}
+                           for i, e in enumerate(events)]
+                reply = {'success': True, 'published': len(events), 'failed': 0, 'results': results,
+                         'latency_ms': latency_ms}
+            else:
+                reply = {'success': True, 'event': event, 'latency_ms': latency_ms}
+            self._send(200, json.dumps(reply).encode('utf-8'), 'application/json')
+
+
+class StandinServer(ThreadingHTTPServer):
+    """Arka plan thread'inde çalışan stand-in; url, stats() ve close() sağlar"""
+
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, handler, name, injector, host='127.0.0.1', port=0, path='', batch=True):
+        super().__init__((host, port), handler)
+        self.name = name
+        self.injector = injector
+        self.batch = batch
+        self.url = f'http://{host}:{self.server_address[1]}{path}'
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name=f'{self.name}-standin', daemon=True)
+        self._thread.start()
+        return self
+
+    def stats(self):
+        return self.injector.stats()
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join(5)
+
+
+def start_soap_standin(injector=None, host='127.0.0.1', port=0, batch=True):
+    """StockUpdateService stand-in'i başlat; url SOAP_STOCK_UPDATE_URL olarak kullanılır"""
+    return StandinServer(SoapHandler, 'soap', injector or FaultInjector(), host, port,
+                         '/StockUpdateService', batch).start()
+
+
+def start_eventhub_standin(injector=None, host='127.0.0.1', port=0):
+    """Event Hub / StockMS /publish-event stand-in'i başlat; url STOCKMS_URL olarak kullanılır"""
+    return StandinServer(EventHubHandler, 'eventhub', injector or FaultInjector(), host, port).start()
+
+
+def add_injection_args(parser, prefix=''):
+    """Gecikme / hata enjeksiyonu argümanları (servers.py ve driver.py ortak)"""
+    parser.add_argument(f'--{prefix}latency-ms', type=float, default=0.0, help='sabit gecikme')
+    parser.add_argument(f'--{prefix}jitter-ms', type=float, default=0.0,
+                        help='gecikmeye eklenen 0..jitter rastgele süre')
+    parser.add_argument(f'--{prefix}error-rate', type=float, default=0.0,
+                        help='gövdesiz hata yanıtı oranı (0-1)')
+    parser.add_argument(f'--{prefix}error-status', type=int, default=503)
+
+
+def injector_from_args(args, prefix='', **extra):
+    prefix = prefix.replace('-', '_')
+    return FaultInjector(latency_ms=getattr(args, f'{prefix}latency_ms'),
+                         jitter_ms=getattr(args, f'{prefix}jitter_ms'),
+                         error_rate=getattr(args, f'{prefix}error_rate'),
+                         error_status=getattr(args, f'{prefix}error_status'),
+                         seed=args.seed, **extra)
+
+
+def add_server_args(parser):
+    """SOAP ve Event Hub stand-in'leri için ayrı enjeksiyon argümanları"""
+    add_injection_args(parser, 'soap-')
+    parser.add_argument('--soap-fault-rate', type=float, default=0.0,
+                        help='SOAP Fault (HTTP 500) oranı (0-1)')
+    parser.add_argument('--soap-fault-code', default='soap:Server',
+                        help='enjekte edilen faultcode (soap:Client kalıcı, soap:Server geçici)')
+    parser.add_argument('--soap-fault-error-code', default='STANDIN_FAULT')
+    parser.add_argument('--no-batch', action='store_true',
+                        help='StockUpdateBatch desteklenmiyormuş gibi Client fault dön')
+    add_injection_args(parser, 'event-')
+    parser.add_argument('--seed', type=int, default=None, help='tekrarlanabilir enjeksiyon için')
+
+
+def start_from_args(args, host='127.0.0.1', soap_port=0, event_port=0):
+    soap = start_soap_standin(injector_from_args(args, 'soap-', fault_rate=args.soap_fault_rate,
+                                                 fault_code=args.soap_fault_code,
+                                                 fault_error_code=args.soap_fault_error_code),
+                              host, soap_port, batch=not args.no_batch)
+    event = start_eventhub_standin(injector_from_args(args, 'event-'), host, event_port)
+    return soap, event
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local SOAP / Event Hub stand-in servers')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--soap-port', type=int, default=8000)
+    parser.add_argument('--event-port', type=int, default=8081)
+    add_server_args(parser)
+    args = parser.parse_args()
+
+    soap, event = start_from_args(args, args.host, args.soap_port, args.event_port)
+    print(f"🧪 SOAP stand-in:      {soap.url}")
+    print(f"🧪 Event Hub stand-in: {event.url}/publish-event")
+    print(" Ctrl+C ile durdurun")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] SOAP {soap.stats()} | Event Hub {event.stats()}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        soap.close()
+        event.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import os
+
+from psycopg2.extras import execute_values
+
+
+OK = 'OK'
+LOW = 'LOW'
+CRITICAL = 'CRITICAL'
+ACKNOWLEDGED = 'ACKNOWLEDGED'
+
+LEVEL_RANK = {OK: 0, LOW: 1, CRITICAL: 2}
+
+CRITICAL_DAYS = 1.0
+# Alarmdan çıkmak için eşiğin bu kadar gün üstüne çıkmak gerekir (flapping önleme)
+HYSTERESIS_DAYS = float(os.getenv('ALERT_HYSTERESIS_DAYS', '0.5'))
+
+
+def alert_fields(days_of_supply, level):
+    """check_threshold_breach ile aynı alert_type / severity eşlemesi"""
+    if level == CRITICAL or days_of_supply < 1.0:
+        return 'CRITICAL_STOCK', 'URGENT'
+    if days_of_supply < 2.0:
+        return 'LOW_STOCK', 'HIGH'
+    return 'LOW_STOCK', 'NORMAL'
+
+
+class AlertStateMachine:
+    """
+    SKU başına alert durumu: OK -> LOW -> CRITICAL (-> ACKNOWLEDGED) -> OK.
+    alerts tablosuna yazma ve dışa dispatch sadece durum geçişlerinde yapılır.
+    """
+
+    def __init__(self, critical_days=CRITICAL_DAYS, hysteresis_days=HYSTERESIS_DAYS):
+        self.critical_days = critical_days
+        self.hysteresis_days = hysteresis_days
+        self.states = {}
+
+    def _entry(self, key):
+        return self.states.get(key, {'level': OK, 'acknowledged': False, 'alert_id': None})
+
+    def state(self, key):
+        """SKU'nun görünen durumu (OK, LOW, CRITICAL veya ACKNOWLEDGED)"""
+        entry = self._entry(key)
+        if entry['level'] != OK and entry['acknowledged']:
+            return ACKNOWLEDGED
+        return entry['level']
+
+    def active_keys(self):
+        """OK olmayan (açık alert'i olan) SKU'lar"""
+        return [key for key, entry in self.states.items() if entry['level'] != OK]
+
+    def target_level(self, current_level, days_of_supply, threshold):
+        """Histerezis bantlarıyla yeni seviye"""
+        band = self.hysteresis_days
+        if days_of_supply < self.critical_days:
+            return CRITICAL
+        if current_level == CRITICAL and days_of_supply < self.critical_days + band:
+            return CRITICAL
+        if days_of_supply < threshold:
+            return LOW
+        if current_level != OK and days_of_supply < threshold + band:
+            return LOW
+        return OK
+
+    def evaluate(self, key, stock_data, threshold):
+        """Geçiş varsa transition döndür, yoksa None (yazma/dispatch yapılmaz)"""
+        entry = self._entry(key)
+        days_of_supply = float(stock_data['days_of_supply'])
+        target = self.target_level(entry['level'], days_of_supply, threshold)
+        if target == entry['level']:
+            return None
+
+        alert_type, severity = alert_fields(days_of_supply, target)
+        return {
+            'key': key,
+            'from': self.state(key),
+            'to': target,
+            # Sadece kötüleşmede (OK->LOW, LOW->CRITICAL) dışarı mesaj gönderilir
+            'dispatch': LEVEL_RANK[target] > LEVEL_RANK[entry['level']],
+            'resolve_alert_id': entry['alert_id'],
+            'alert_type': alert_type,
+            'severity': severity,
+            'threshold': threshold,
+            'stock_data': stock_data
+        }
+
+    def commit(self, transition, alert_id=None):
+        """Uygulanan geçişi hafızadaki duruma yaz"""
+        if transition['to'] == OK:
+            self.states.pop(transition['key'], None)
+        else:
+            self.states[transition['key']] = {
+                'level': transition['to'],
+                'acknowledged': False,
+                'alert_id': alert_id
+            }
+
+    def acknowledge(self, key):
+        """Operatör onayı; aynı veya daha düşük seviyede tekrar alarm üretilmez"""
+        entry = self.states.get(key)
+        if entry is None:
+            return None
+        entry['acknowledged'] = True
+        return entry['alert_id']
+
+    def restore(self, conn):
+        """Açık (resolved_at IS NULL) alert'lerden durumu geri yükle"""
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT DISTINCT ON (hospital_id, product_code)
+                   id, hospital_id, product_code, alert_type, acknowledged
+            FROM alerts
+            WHERE resolved_at IS NULL
+            ORDER BY hospital_id, product_code, created_at DESC, id DESC
+        """)
+        rows = cursor.fetchall()
+        cursor.close()
+
+        self.states = {}
+        for alert_id, hospital_id, product_code, alert_type, acknowledged in rows:
+            self.states[(hospital_id, product_code)] = {
+                'level': CRITICAL if alert_type in ('CRITICAL_STOCK', 'OUT_OF_STOCK') else LOW,
+                'acknowledged': bool(acknowledged),
+                'alert_id': alert_id
+            }
+        return len(rows)
+
+
+def apply_transitions(conn, state_machine, transitions, enqueue=None):
+    """
+    Geçişleri tek transaction'da alerts tablosuna yaz ve durumu güncelle.
+    enqueue(cursor, rows) verilirse dispatch edilecek satırlar aynı transaction'da outbox'a yazılır.
+    """
+    if not transitions:
+        return []
+
+    cursor = conn.cursor()
+
+    # SKU'nun bütün açık alert'leri kapanır: sadece hatırlanan id değil, eski record_alert / replay
+    # satırları ve restart öncesi kalan kopyalar da (restore bunları tekrar açık sanmasın)
+    resolve_keys = tuple(dict.fromkeys(tuple(t['key']) for t in transitions))
+    cursor.execute("""
+        UPDATE alerts SET resolved_at = NOW()
+        WHERE resolved_at IS NULL AND (hospital_id, product_code) IN %s
+    """, (resolve_keys,))
+
+    opened = [t for t in transitions if t['to'] != OK]
+    alert_ids = []
+    if opened:
+        alert_ids = execute_values(cursor, """
+            INSERT INTO alerts
+            (hospital_id, product_code, alert_type, severity, current_stock,
+             daily_consumption, days_of_supply, threshold)
+            VALUES %s
+            RETURNING id
+        """, [
+            (t['key'][0], t['key'][1], t['alert_type'], t['severity'],
+             t['stock_data']['current_stock'], t['stock_data']['daily_consumption'],
+             round(float(t['stock_data']['days_of_supply']), 2), t['threshold'])
+            for t in opened
+        ], fetch=True)
+
+    if enqueue is not None:
+        enqueue(cursor, [t['stock_data'] for t in transitions if t['dispatch']])
+
+    conn.commit()
+    cursor.close()
+
+    ids = iter(row[0] for row in alert_ids)
+    for transition in transitions:
+        state_machine.commit(transition, None if transition['to'] == OK else next(ids))
+    return transitions
+
+
+def acknowledge_alert(conn, state_machine, key):
+    """Açık alert'i onayla (alerts.acknowledged) ve durumu ACKNOWLEDGED yap"""
+    alert_id = state_machine.acknowledge(key)
+    if alert_id is None:
+        return False
+
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE alerts SET acknowledged = TRUE, acknowledged_at = NOW()
+        WHERE id = %s
+    """, (alert_id,))
+    conn.commit()
+    cursor.close()
+    return True
@@ -0,0 +1,242 @@
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+from psycopg2.extras import execute_values
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
+import db_pool
+from alert_state import apply_transitions
+
+
+THRESHOLD = 2.0
+
+# check_threshold_breach ile aynı severity eşikleri (gün)
+URGENT_DAYS = 1.0
+HIGH_DAYS = 2.0
+
+
+def load_stock_snapshot(conn):
+    """Tüm stock satırlarını tek sorguda NumPy dizilerine yükle"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT hospital_id, product_code, current_stock_units,
+               daily_consumption_units, reorder_threshold
+        FROM stock
+        ORDER BY id
+    """)
+    rows = cursor.fetchall()
+    cursor.close()
+    return snapshot_from_rows(rows)
+
+
+def load_sku_snapshot(conn, keys):
+    """Sadece verilen (hospital_id, product_code) SKU'larını tek sorguda yükle"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT s.hospital_id, s.product_code, s.current_stock_units,
+               s.daily_consumption_units, s.reorder_threshold
+        FROM stock s
+        JOIN unnest(%s::text[], %s::text[]) AS k(hospital_id, product_code)
+          ON s.hospital_id = k.hospital_id AND s.product_code = k.product_code
+        ORDER BY s.id
+    """, ([k[0] for k in keys], [k[1] for k in keys]))
+    rows = cursor.fetchall()
+    cursor.close()
+    return snapshot_from_rows(rows)
+
+
+def snapshot_from_rows(rows):
+    """stock satırlarını NumPy dizilerine çevir"""
+    if not rows:
+        return {
+            'hospital_id': np.empty(0, dtype=object),
+            'product_code': np.empty(0, dtype=object),
+            'current_stock': np.empty(0, dtype=np.int64),
+            'daily_consumption': np.empty(0, dtype=np.int64),
+            'reorder_threshold': np.empty(0, dtype=np.float64)
+        }
+
+    hospital_ids, product_codes, stocks, consumptions, thresholds = zip(*rows)
+    return {
+        'hospital_id': np.array(hospital_ids, dtype=object),
+        'product_code': np.array(product_codes, dtype=object),
+        'current_stock': np.array(stocks, dtype=np.int64),
+        'daily_consumption': np.array(consumptions, dtype=np.int64),
+        # NULL reorder_threshold -> NaN, evaluate_snapshot varsayılanı kullanır
+        'reorder_threshold': np.array(
+            [np.nan if t is None else float(t) for t in thresholds], dtype=np.float64
+        )
+    }
+
+
+def compute_days_of_supply(current_stock, daily_consumption):
+    """Vektörel days-of-supply (tüketim 0 ise stok hiç bitmez -> inf)"""
+    current_stock = np.asarray(current_stock, dtype=np.float64)
+    daily_consumption = np.asarray(daily_consumption, dtype=np.float64)
+    days = np.full(current_stock.shape, np.inf)
+    np.divide(current_stock, daily_consumption, out=days, where=daily_consumption > 0)
+    return days
+
+
+def evaluate_snapshot(snapshot, default_threshold=THRESHOLD):
+    """Tüm SKU'lar için days-of-supply ve eşik aşımını hesapla"""
+    days = compute_days_of_supply(snapshot['current_stock'], snapshot['daily_consumption'])
+    thresholds = np.where(
+        np.isnan(snapshot['reorder_threshold']), default_threshold, snapshot['reorder_threshold']
+    )
+    breach = days < thresholds
+
+    severity = np.select(
+        [days < URGENT_DAYS, days < HIGH_DAYS], ['URGENT', 'HIGH'], default='NORMAL'
+    ).astype(object)
+    alert_type = np.where(days < URGENT_DAYS, 'CRITICAL_STOCK', 'LOW_STOCK').astype(object)
+
+    return {
+        'days_of_supply': days,
+        'threshold': thresholds,
+        'breach': breach,
+        'severity': severity,
+        'alert_type': alert_type
+    }
+
+
+def row_at(snapshot, evaluation, i):
+    """i. satırı dispatch formatında döndür"""
+    return {
+        'hospital_id': snapshot['hospital_id'][i],
+        'product_code': snapshot['product_code'][i],
+        'current_stock': int(snapshot['current_stock'][i]),
+        'daily_consumption': int(snapshot['daily_consumption'][i]),
+        'days_of_supply': round(float(evaluation['days_of_supply'][i]), 2),
+        'threshold': float(evaluation['threshold'][i]),
+        'severity': evaluation['severity'][i],
+        'alert_type': evaluation['alert_type'][i]
+    }
+
+
+def breached_rows(snapshot, evaluation):
+    """Sadece eşiği aşan satırları dispatch formatında döndür"""
+    return [row_at(snapshot, evaluation, i) for i in np.flatnonzero(evaluation['breach'])]
+
+
+def evaluate_transitions(snapshot, evaluation, alert_state):
+    """Aşan veya açık alert'i olan SKU'lar için durum geçişlerini hesapla"""
+    candidates = evaluation['breach'].copy()
+
+    active = alert_state.active_keys()
+    if active:
+        index = {key: i for i, key in enumerate(zip(snapshot['hospital_id'], snapshot['product_code']))}
+        for key in active:
+            if key in index:
+                candidates[index[key]] = True
+
+    transitions = []
+    for i in np.flatnonzero(candidates):
+        row = row_at(snapshot, evaluation, i)
+        transition = alert_state.evaluate(
+            (row['hospital_id'], row['product_code']), row, row['threshold']
+        )
+        if transition is not None:
+            transitions.append(transition)
+    return transitions
+
+
+def record_alerts(conn, rows):
+    """Aşım alert'lerini tek multi-row INSERT ile yaz"""
+    if not rows:
+        return 0
+
+    cursor = conn.cursor()
+    execute_values(cursor, """
+        INSERT INTO alerts
+        (hospital_id, product_code, alert_type, severity, current_stock,
+         daily_consumption, days_of_supply, threshold)
+        VALUES %s
+    """, [
+        (r['hospital_id'], r['product_code'], r['alert_type'], r['severity'],
+         r['current_stock'], r['daily_consumption'], r['days_of_supply'], r['threshold'])
+        for r in rows
+    ], page_size=1000)
+    conn.commit()
+    cursor.close()
+    return len(rows)
+
+
+def record_evaluation(conn, snapshot, evaluation, alert_state=None):
+    """Değerlendirmeyi alerts tablosuna yaz, dispatch edilecek satırları döndür"""
+    if alert_state is None:
+        rows = breached_rows(snapshot, evaluation)
+        record_alerts(conn, rows)
+        return rows
+
+    # Sadece durum geçişleri yazılır, sadece kötüleşenler dispatch edilir
+    transitions = apply_transitions(
+        conn, alert_state, evaluate_transitions(snapshot, evaluation, alert_state)
+    )
+    return [t['stock_data'] for t in transitions if t['dispatch']]
+
+
+def run_batch_cycle(dispatch=None, default_threshold=THRESHOLD, alert_state=None, dispatch_batch=None):
+    """
+    Bir batch döngüsü: yükle, değerlendir, alert yaz, aşanları dispatch et.
+    dispatch satır satır çağrılır; dispatch_batch verilirse tüm satırlar tek çağrıda gönderilir.
+    """
+    start_time = time.perf_counter()
+
+    with db_pool.connection() as conn:
+        snapshot = load_stock_snapshot(conn)
+        evaluation = evaluate_snapshot(snapshot, default_threshold)
+        rows = record_evaluation(conn, snapshot, evaluation, alert_state)
+
+    eval_ms = (time.perf_counter() - start_time) * 1000
+
+    if dispatch_batch is not None:
+        if rows:
+            dispatch_batch(rows)
+    elif dispatch is not None:
+        for row in rows:
+            dispatch(row)
+
+    return {
+        'total_skus': len(snapshot['product_code']),
+        'breached': len(rows),
+        'rows': rows,
+        'eval_ms': round(eval_ms, 2)
+    }
+
+
+def run_batch_monitor(dispatch=None, interval=10, default_threshold=THRESHOLD, alert_state=None,
+                      dispatch_batch=None):
+    """Batch modu ana döngüsü (tüm hastane/SKU'lar)"""
+    print("=" * 60)
+    print(" Batch Monitor - Tüm SKU'lar")
+    print("=" * 60)
+    print(f" Her {interval} saniyede tüm stock tablosu tek sorguda değerlendirilecek")
+    print(" Ctrl+C ile durdurun")
+    print("=" * 60)
+
+    if alert_state is not None:
+        with db_pool.connection() as conn:
+            print(f" Alert durumu: {alert_state.restore(conn)} açık alert yüklendi")
+
+    iteration = 0
+
+    while True:
+        try:
+            iteration += 1
+            summary = run_batch_cycle(dispatch=dispatch, default_threshold=default_threshold,
+                                      alert_state=alert_state, dispatch_batch=dispatch_batch)
+            print(f"\n İterasyon #{iteration} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            print(f" SKU: {summary['total_skus']} | Aşım: {summary['breached']} "
+                  f"| Değerlendirme: {summary['eval_ms']}ms")
+            time.sleep(interval)
+        except KeyboardInterrupt:
+            print("\n\n Program sonlandırılıyor...")
+            break
+        except Exception as e:
+            print(f" Beklenmeyen hata: {e}")
+            time.sleep(interval)
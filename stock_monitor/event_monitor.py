@@ -0,0 +1,146 @@
+import json
+import os
+import select
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
+import batch_monitor
+import db_pool
+
+
+CHANNEL = 'stock_changed'
+THRESHOLD = batch_monitor.THRESHOLD
+
+
+def open_listener():
+    """LISTEN stock_changed için oturuma özel (autocommit) bağlantı aç"""
+    conn = db_pool.connect_direct(autocommit=True)
+    cursor = conn.cursor()
+    cursor.execute(f"LISTEN {CHANNEL}")
+    cursor.close()
+    return conn
+
+
+def drain_notifications(conn):
+    """Bekleyen NOTIFY'ları oku; SKU başına sadece en son değişikliği tut"""
+    conn.poll()
+    latest = {}
+    while conn.notifies:
+        notify = conn.notifies.pop(0)
+        try:
+            payload = json.loads(notify.payload)
+        except ValueError:
+            print(f"⚠️  Geçersiz NOTIFY payload: {notify.payload}")
+            continue
+        latest[(payload['hospital_id'], payload['product_code'])] = payload
+    return list(latest.values())
+
+
+def snapshot_from_notifications(payloads):
+    """NOTIFY payload'larından batch_monitor snapshot formatı oluştur"""
+    return {
+        'hospital_id': np.array([p['hospital_id'] for p in payloads], dtype=object),
+        'product_code': np.array([p['product_code'] for p in payloads], dtype=object),
+        'current_stock': np.array([p['current_stock_units'] for p in payloads], dtype=np.int64),
+        'daily_consumption': np.array([p['daily_consumption_units'] for p in payloads], dtype=np.int64),
+        'reorder_threshold': np.array(
+            [np.nan if p.get('reorder_threshold') is None else float(p['reorder_threshold'])
+             for p in payloads], dtype=np.float64
+        )
+    }
+
+
+def handle_notifications(payloads, dispatch=None, default_threshold=THRESHOLD, alert_state=None):
+    """Değişen SKU'lar için eşik kontrolü yap, aşanları kaydet ve dispatch et"""
+    if not payloads:
+        return []
+
+    snapshot = snapshot_from_notifications(payloads)
+    evaluation = batch_monitor.evaluate_snapshot(snapshot, default_threshold)
+
+    if alert_state is None:
+        rows = batch_monitor.breached_rows(snapshot, evaluation)
+        if rows:
+            with db_pool.connection() as conn:
+                batch_monitor.record_alerts(conn, rows)
+    else:
+        transitions = batch_monitor.evaluate_transitions(snapshot, evaluation, alert_state)
+        if transitions:
+            with db_pool.connection() as conn:
+                batch_monitor.apply_transitions(conn, alert_state, transitions)
+        rows = [t['stock_data'] for t in transitions if t['dispatch']]
+
+    if dispatch is not None:
+        for row in rows:
+            dispatch(row)
+    return rows
+
+
+def run_event_monitor(dispatch=None, fallback_interval=10, default_threshold=THRESHOLD,
+                      alert_state=None):
+    """LISTEN/NOTIFY ile olay tabanlı monitor; kanal düşerse polling'e geçer"""
+    print("=" * 60)
+    print(" Event Monitor - LISTEN stock_changed")
+    print("=" * 60)
+    print(f" Kanal koparsa her {fallback_interval} saniyede polling yapılacak")
+    print(" Ctrl+C ile durdurun")
+    print("=" * 60)
+
+    if alert_state is not None:
+        with db_pool.connection() as conn:
+            print(f" Alert durumu: {alert_state.restore(conn)} açık alert yüklendi")
+
+    conn = None
+
+    while True:
+        try:
+            if conn is None or conn.closed:
+                try:
+                    conn = open_listener()
+                    print(f"🔔 LISTEN {CHANNEL} aktif")
+                    # Bağlantı yokken kaçan değişiklikler için bir tam tarama
+                    batch_monitor.run_batch_cycle(dispatch=dispatch, default_threshold=default_threshold,
+                                                  alert_state=alert_state)
+                except Exception as e:
+                    conn = None
+                    print(f"⚠️  LISTEN bağlantısı kurulamadı, polling: {e}")
+                    batch_monitor.run_batch_cycle(dispatch=dispatch, default_threshold=default_threshold,
+                                                  alert_state=alert_state)
+                    time.sleep(fallback_interval)
+                    continue
+
+            # Değişiklik yoksa burada bloklanır, DB'ye sorgu gitmez
+            readable, _, _ = select.select([conn], [], [], fallback_interval)
+            if not readable:
+                # Sorgu göndermeden kopmuş bağlantıyı yakala (poll hata fırlatır)
+                conn.poll()
+                continue
+
+            payloads = drain_notifications(conn)
+            start = time.perf_counter()
+            rows = handle_notifications(payloads, dispatch=dispatch, default_threshold=default_threshold,
+                                        alert_state=alert_state)
+            if payloads:
+                print(f" {datetime.now().strftime('%H:%M:%S')} | Değişen SKU: {len(payloads)} "
+                      f"| Aşım: {len(rows)} | {(time.perf_counter() - start) * 1000:.1f}ms")
+
+        except KeyboardInterrupt:
+            print("\n\n Program sonlandırılıyor...")
+            break
+        except Exception as e:
+            print(f"⚠️  Bildirim kanalı hatası, yeniden bağlanılacak: {e}")
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            conn = None
+            time.sleep(1)
+
+    if conn is not None and not conn.closed:
+        conn.close()
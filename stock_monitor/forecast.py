@@ -0,0 +1,130 @@
+import math
+import os
+from datetime import date, timedelta
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+DAY_INDEX = {name: i for i, name in enumerate(DAY_NAMES)}
+
+ALPHA = 0.3   # seviye (EWMA) yumuşatma katsayısı
+GAMMA = 0.1   # haftanın günü mevsimsellik katsayısı
+MIN_OBSERVATIONS = 7
+MIN_SEASONAL = 0.05  # sıfır tüketim günleri faktörü 0'a çekip bölmeyi bozmasın
+MAX_FORECAST_DAYS = 365
+# SERIAL id'ler commit sırasıyla görünmez; her sync son bu kadar id'yi tekrar okur (geç commit olanlar için)
+SYNC_OVERLAP_IDS = int(os.getenv('FORECAST_SYNC_OVERLAP_IDS', '1000'))
+# İlk sync tabloyu server-side cursor ile bu kadar satırlık parçalarla okur
+SYNC_FETCH_SIZE = int(os.getenv('FORECAST_SYNC_FETCH_SIZE', '5000'))
+
+
+class ConsumptionForecaster:
+    """
+    SKU başına artımlı tüketim tahmini (haftanın günü mevsimselliği olan
+    Holt-Winters, trend yok). consumption_history'nin her yeni satırı
+    durumu O(1) günceller; tablo sadece ilk sync'te bir kez taranır.
+    """
+
+    def __init__(self, alpha=ALPHA, gamma=GAMMA, min_observations=MIN_OBSERVATIONS,
+                 overlap_ids=SYNC_OVERLAP_IDS):
+        self.alpha = alpha
+        self.gamma = gamma
+        self.min_observations = min_observations
+        self.overlap_ids = overlap_ids
+        self.states = {}
+        self.last_history_id = 0
+        # Tekrar okunan pencerede (last_history_id - overlap_ids, last_history_id] uygulanmış id'ler
+        self._applied_ids = set()
+        self._synced = False
+
+    def update(self, key, units, day_of_week):
+        """Tek bir tüketim gözlemiyle (hospital_id, product_code) durumunu güncelle"""
+        state = self.states.get(key)
+        if state is None:
+            self.states[key] = {
+                'level': float(units),
+                'seasonal': [1.0] * 7,
+                'observations': 1
+            }
+            return
+
+        seasonal = state['seasonal']
+        level = self.alpha * (units / seasonal[day_of_week]) + (1 - self.alpha) * state['level']
+        if level > 0:
+            seasonal[day_of_week] = max(
+                MIN_SEASONAL,
+                self.gamma * (units / level) + (1 - self.gamma) * seasonal[day_of_week]
+            )
+        state['level'] = level
+        state['observations'] += 1
+
+    def sync(self, conn):
+        """
+        Son sync'ten sonra görünür olan consumption_history satırlarını uygula. Son overlap_ids
+        id tekrar okunur: daha küçük id'yle geç commit olan satır kaçmaz, uygulanmış olan atlanır.
+        """
+        if self._synced:
+            cursor = conn.cursor()
+        else:
+            # İlk sync bütün tabloyu okur; fetchall yerine parça parça akar
+            cursor = conn.cursor(name='forecast_sync')
+            cursor.itersize = SYNC_FETCH_SIZE
+        cursor.execute("""
+            SELECT id, hospital_id, product_code, units_consumed, day_of_week, consumption_date
+            FROM consumption_history
+            WHERE id > %s
+            ORDER BY id
+        """, (max(0, self.last_history_id - self.overlap_ids),))
+
+        applied = 0
+        try:
+            for row_id, hospital_id, product_code, units, day_name, consumption_date in cursor:
+                if row_id in self._applied_ids:
+                    continue
+                day_of_week = DAY_INDEX.get(day_name, consumption_date.weekday())
+                self.update((hospital_id, product_code), units, day_of_week)
+                self._applied_ids.add(row_id)
+                self.last_history_id = max(self.last_history_id, row_id)
+                applied += 1
+        finally:
+            cursor.close()
+
+        self._synced = True
+        floor = self.last_history_id - self.overlap_ids
+        self._applied_ids = {row_id for row_id in self._applied_ids if row_id > floor}
+        return applied
+
+    def has_forecast(self, key):
+        state = self.states.get(key)
+        return state is not None and state['observations'] >= self.min_observations
+
+    def forecast(self, key, on_date):
+        """Verilen gün için beklenen tüketim (birim)"""
+        state = self.states[key]
+        return state['level'] * state['seasonal'][on_date.weekday()]
+
+    def forecast_daily_consumption(self, key, start_date=None, horizon_days=7):
+        """Önümüzdeki horizon_days günün ortalama tahmini günlük tüketimi"""
+        start_date = start_date or date.today() + timedelta(days=1)
+        total = sum(self.forecast(key, start_date + timedelta(days=d)) for d in range(horizon_days))
+        return total / horizon_days
+
+    def days_of_supply(self, key, current_stock, start_date=None):
+        """Mevcut stoğun tahmini tüketimle kaç gün yeteceği (kesirli)"""
+        start_date = start_date or date.today() + timedelta(days=1)
+        remaining = float(current_stock)
+        for d in range(MAX_FORECAST_DAYS):
+            expected = self.forecast(key, start_date + timedelta(days=d))
+            if expected <= 0:
+                continue
+            if remaining < expected:
+                return d + remaining / expected
+            remaining -= expected
+        return float(MAX_FORECAST_DAYS)
+
+    def threshold_horizon(self, threshold):
+        """Eşik kontrolünde ortalaması alınacak gün sayısı"""
+        return max(1, math.ceil(threshold))
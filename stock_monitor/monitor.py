@@ -1,3 +1,4 @@
+import argparse
 import psycopg2
 import random
 import time
@@ -5,12 +6,22 @@ import sys
 import os
 import requests
 import json
+import uuid
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from datetime import datetime, date
 from dotenv import load_dotenv
+from urllib3.exceptions import NewConnectionError
 
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'soap_client'))
-from client import send_stock_update
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from client import send_stock_update, send_stock_updates, warmup_connections
+from forecast import ConsumptionForecaster
+from alert_state import AlertStateMachine, apply_transitions
+import db_pool
+import outbox
 
 
 load_dotenv()
@@ -27,29 +38,55 @@ PRODUCT_CODE = 'PHYSIO-SALINE-500ML'
 THRESHOLD = 2.0
 STOCKMS_URL = os.getenv('STOCKMS_URL', 'http://localhost:8081')
 
-def publish_event_to_hub(stock_data):
+# Dual-path dispatch: her yolun kendi deadline'ı (saniye)
+SOAP_PATH_DEADLINE = float(os.getenv('SOAP_PATH_DEADLINE', '60'))
+EVENT_PATH_DEADLINE = float(os.getenv('EVENT_PATH_DEADLINE', '30'))
+# Yollar kalan deadline'ı kendi istek timeout'u olarak alır; deadline'ı kaçıran çağrı worker tutmaya devam etmez
+_dispatch_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='dual-path')
+# StockMS /publish-events isteği başına event; endpoint bir kez reddederse process boyunca tekli çağrılar
+EVENT_BATCH_SIZE = int(os.getenv('EVENT_BATCH_SIZE', '100'))
+EVENT_BATCH_REJECT_STATUS = (404, 405, 501)
+EVENT_BATCH_FALLBACK_WORKERS = int(os.getenv('EVENT_BATCH_FALLBACK_WORKERS', '4'))
+_bulk_events_supported = True
+
+def build_event_payload(stock_data):
+    """Eşik aşımından InventoryLow event gövdesi oluştur"""
+    return {
+        # Tarama başına çok event tek istekte gider; saniye bazlı kimlik çakışırdı
+        'eventId': f'EVT-{uuid.uuid4()}',
+        'eventType': 'InventoryLow',
+        'hospitalId': stock_data.get('hospital_id', HOSPITAL_ID),
+        'productCode': stock_data.get('product_code', PRODUCT_CODE),
+        'currentStockUnits': stock_data['current_stock'],
+        'dailyConsumptionUnits': stock_data['daily_consumption'],
+        'daysOfSupply': float(stock_data['days_of_supply']),
+        'threshold': float(stock_data.get('threshold', THRESHOLD)),
+        'timestamp': datetime.now().isoformat()
+    }
+
+def build_soap_data(breach_data):
+    """Eşik aşımından SOAP StockUpdate kalemi oluştur"""
+    return {
+        'hospitalId': breach_data.get('hospital_id', HOSPITAL_ID),
+        'productCode': breach_data.get('product_code', PRODUCT_CODE),
+        'currentStockUnits': breach_data['current_stock'],
+        'dailyConsumptionUnits': breach_data['daily_consumption'],
+        'daysOfSupply': float(breach_data['days_of_supply'])
+    }
+
+def publish_event_to_hub(stock_data, timeout=30):
     """Event Hub'a event publish et (StockMS üzerinden)"""
+    return post_event(build_event_payload(stock_data), timeout)
+
+def post_event(event_payload, timeout=30):
+    """Hazır event gövdesini StockMS /publish-event'e gönder"""
     start_time = datetime.now()
     
     try:
-        
-        event_payload = {
-            'eventId': f'EVT-{int(time.time())}',
-            'eventType': 'InventoryLow',
-            'hospitalId': HOSPITAL_ID,
-            'productCode': PRODUCT_CODE,
-            'currentStockUnits': stock_data['current_stock'],
-            'dailyConsumptionUnits': stock_data['daily_consumption'],
-            'daysOfSupply': float(stock_data['days_of_supply']),
-            'threshold': THRESHOLD,
-            'timestamp': datetime.now().isoformat()
-        }
-        
-     
         response = requests.post(
             f'{STOCKMS_URL}/publish-event',
             json=event_payload,
-            timeout=30
+            timeout=timeout
         )
         
         end_time = datetime.now()
@@ -73,8 +110,8 @@ def publish_event_to_hub(stock_data):
     except requests.exceptions.Timeout:
         return {
             'success': False,
-            'error': 'Request timeout (30s)',
-            'latency_ms': 30000
+            'error': f'Request timeout ({timeout:g}s)',
+            'latency_ms': int(timeout * 1000)
         }
     except requests.exceptions.ConnectionError:
         return {
@@ -90,20 +127,17 @@ def publish_event_to_hub(stock_data):
         }
 
 def get_db_connection():
-    """Database bağlantısı oluştur"""
+    """Paylaşılan havuzdan database bağlantısı al"""
     try:
-        conn = psycopg2.connect(
-            host=DB_HOST,
-            port=DB_PORT,
-            database=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD
-        )
-        return conn
+        return db_pool.get_connection()
     except Exception as e:
         print(f"❌ Database bağlantı hatası: {e}")
         return None
 
+def release_db_connection(conn):
+    """Bağlantıyı havuza iade et"""
+    db_pool.release_connection(conn)
+
 def get_current_stock():
     """Mevcut stok bilgisini getir"""
     conn = get_db_connection()
@@ -120,7 +154,6 @@ def get_current_stock():
         
         result = cursor.fetchone()
         cursor.close()
-        conn.close()
         
         if result:
             return {
@@ -132,6 +165,8 @@ def get_current_stock():
     except Exception as e:
         print(f"❌ Stok okuma hatası: {e}")
         return None
+    finally:
+        release_db_connection(conn)
 
 def simulate_daily_consumption(base_consumption):
     """Günlük tüketimi simüle et"""
@@ -207,7 +242,6 @@ def update_stock(consumed_units):
         
         conn.commit()
         cursor.close()
-        conn.close()
         
         print(f"Stok güncellendi: {current_stock} → {new_stock} (Tüketim: {consumed_units})")
         print(f" Kalan gün sayısı: {new_days_of_supply:.2f} gün")
@@ -216,13 +250,85 @@ def update_stock(consumed_units):
     except Exception as e:
         print(f"Stok güncelleme hatası: {e}")
         return False
+    finally:
+        release_db_connection(conn)
+
+def sync_forecaster(forecaster):
+    """Forecaster'a sadece yeni consumption_history satırlarını uygula"""
+    conn = get_db_connection()
+    if not conn:
+        return 0
+    
+    try:
+        return forecaster.sync(conn)
+    except Exception as e:
+        print(f"⚠️  Tahmin güncelleme hatası: {e}")
+        return 0
+    finally:
+        release_db_connection(conn)
+
+def restore_alert_state(alert_state):
+    """Alert durum makinesini alerts tablosundaki açık kayıtlardan yükle"""
+    conn = get_db_connection()
+    if not conn:
+        return 0
+    
+    try:
+        return alert_state.restore(conn)
+    except Exception as e:
+        print(f"⚠️  Alert durumu yüklenemedi: {e}")
+        return 0
+    finally:
+        release_db_connection(conn)
+
+def apply_alert_transition(alert_state, stock_data, threshold=THRESHOLD):
+    """Durum geçişi varsa alerts tablosuna yaz; yoksa hiçbir şey yazma"""
+    key = (stock_data.get('hospital_id', HOSPITAL_ID), stock_data.get('product_code', PRODUCT_CODE))
+    transition = alert_state.evaluate(key, stock_data, threshold)
+    if transition is None:
+        return None
+    
+    conn = get_db_connection()
+    if not conn:
+        return None
+    
+    try:
+        apply_transitions(conn, alert_state, [transition])
+        print(f" Alert durumu: {transition['from']} → {transition['to']}")
+        return transition
+    except Exception as e:
+        print(f" Alert kaydı hatası: {e}")
+        conn.rollback()
+        return None
+    finally:
+        release_db_connection(conn)
 
-def check_threshold_breach():
-    """Eşik değer kontrolü yap"""
+def check_threshold_breach(forecaster=None, alert_state=None):
+    """Eşik değer kontrolü yap (forecaster verilirse tahmini tüketimle)"""
     stock_data = get_current_stock()
     if not stock_data:
         return False, None
     
+    key = (HOSPITAL_ID, PRODUCT_CODE)
+    if forecaster is not None:
+        sync_forecaster(forecaster)
+        if forecaster.has_forecast(key):
+            stock_data['days_of_supply'] = round(
+                forecaster.days_of_supply(key, stock_data['current_stock']), 2
+            )
+            stock_data['forecast_consumption'] = round(forecaster.forecast_daily_consumption(
+                key, horizon_days=forecaster.threshold_horizon(THRESHOLD)
+            ), 2)
+    
+    if alert_state is not None:
+        # Sadece durum geçişlerinde yaz; dispatch sadece kötüleşmede
+        transition = apply_alert_transition(alert_state, stock_data)
+        if transition is not None and transition['dispatch']:
+            print(f" ALARM! Stok kritik seviyede: {stock_data['days_of_supply']:.2f} gün")
+            return True, stock_data
+        print(f" Alert durumu: {alert_state.state(key)} ({stock_data['days_of_supply']:.2f} gün)")
+        return False, None
+    
     if stock_data['days_of_supply'] < THRESHOLD:
         print(f" ALARM! Stok kritik seviyede: {stock_data['days_of_supply']:.2f} gün")
         
@@ -245,11 +351,12 @@ def check_threshold_breach():
                 
                 cursor.execute("""
                     INSERT INTO alerts 
-                    (hospital_id, alert_type, severity, current_stock, 
+                    (hospital_id, product_code, alert_type, severity, current_stock, 
                      daily_consumption, days_of_supply, threshold)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
                 """, (
                     HOSPITAL_ID,
+                    PRODUCT_CODE,
                     alert_type,
                     severity,
                     stock_data['current_stock'],
@@ -260,16 +367,409 @@ def check_threshold_breach():
                 
                 conn.commit()
                 cursor.close()
-                conn.close()
             except Exception as e:
                 print(f" Alert kaydı hatası: {e}")
+            finally:
+                release_db_connection(conn)
         
         return True, stock_data
     
     print(f"✔️ Stok yeterli: {stock_data['days_of_supply']:.2f} gün")
     return False, None
 
-def main():
+# Tek round-trip: satırı kilitle, stoku düş, history yaz, gerekirse alert aç.
+# Eşik kontrolü forecast_consumption verilmişse tahmini tüketimle, yoksa statik değerle yapılır.
+CONSUME_AND_CHECK_SQL = """
+    WITH cur AS (
+        SELECT id, current_stock_units AS opening_stock
+        FROM stock
+        WHERE hospital_id = %(hospital_id)s AND product_code = %(product_code)s
+        FOR UPDATE
+    ),
+    upd AS (
+        UPDATE stock s
+        SET current_stock_units = GREATEST(0, cur.opening_stock - %(units)s),
+            days_of_supply = CASE
+                WHEN s.daily_consumption_units > 0
+                THEN ROUND(GREATEST(0, cur.opening_stock - %(units)s)::numeric
+                           / s.daily_consumption_units, 2)
+                ELSE 0
+            END,
+            last_updated = NOW()
+        FROM cur
+        WHERE s.id = cur.id
+        RETURNING s.hospital_id, s.product_code, cur.opening_stock,
+                  s.current_stock_units, s.daily_consumption_units,
+                  CASE
+                      WHEN COALESCE(%(forecast_consumption)s::numeric, s.daily_consumption_units) > 0
+                      THEN ROUND(s.current_stock_units::numeric
+                                 / COALESCE(%(forecast_consumption)s::numeric, s.daily_consumption_units), 2)
+                      ELSE 0
+                  END AS days_of_supply
+    ),
+    hist AS (
+        INSERT INTO consumption_history
+        (hospital_id, product_code, consumption_date, units_consumed,
+         opening_stock, closing_stock, day_of_week, is_weekend)
+        SELECT hospital_id, product_code, %(consumption_date)s, %(units)s,
+               opening_stock, current_stock_units, %(day_of_week)s, %(is_weekend)s
+        FROM upd
+    ),
+    alert AS (
+        INSERT INTO alerts
+        (hospital_id, product_code, alert_type, severity, current_stock,
+         daily_consumption, days_of_supply, threshold)
+        SELECT hospital_id, product_code,
+               CASE WHEN days_of_supply < 1.0 THEN 'CRITICAL_STOCK' ELSE 'LOW_STOCK' END,
+               CASE WHEN days_of_supply < 1.0 THEN 'URGENT'
+                    WHEN days_of_supply < 2.0 THEN 'HIGH'
+                    ELSE 'NORMAL' END,
+               current_stock_units, daily_consumption_units, days_of_supply, %(threshold)s
+        FROM upd
+        WHERE days_of_supply < %(threshold)s AND %(record_alert)s
+        RETURNING id, severity
+    )
+    SELECT upd.opening_stock, upd.current_stock_units, upd.daily_consumption_units,
+           upd.days_of_supply, alert.id, alert.severity
+    FROM upd
+    LEFT JOIN alert ON TRUE
+"""
+
+def consume_and_check(consumed_units, threshold=THRESHOLD, forecast_consumption=None,
+                      record_alert=True, alert_state=None, enqueue=None):
+    """
+    Stok düşümü + history + eşik kontrolü + alert tek SQL ifadesinde (atomik).
+    enqueue verilirse giden mesajlar commit'ten önce aynı transaction'da outbox'a yazılır;
+    alert_state ile birlikte verilirse sadece dispatch eden geçişler için.
+    """
+    conn = get_db_connection()
+    if not conn:
+        return None
+    
+    try:
+        today = date.today()
+        cursor = conn.cursor()
+        cursor.execute(CONSUME_AND_CHECK_SQL, {
+            'hospital_id': HOSPITAL_ID,
+            'product_code': PRODUCT_CODE,
+            'units': consumed_units,
+            'consumption_date': today,
+            'day_of_week': today.strftime('%A'),
+            'is_weekend': today.weekday() >= 5,
+            'threshold': threshold,
+            'forecast_consumption': forecast_consumption,
+            'record_alert': record_alert
+        })
+        result = cursor.fetchone()
+        
+        if not result:
+            conn.commit()
+            cursor.close()
+            print("❌ Stok kaydı bulunamadı!")
+            return None
+        
+        opening_stock, current_stock, daily_consumption, days_of_supply, alert_id, severity = result
+        breach = days_of_supply < threshold
+        stock_data = {
+            'breach': breach,
+            'alert_id': alert_id,
+            'severity': severity,
+            'opening_stock': opening_stock,
+            'current_stock': current_stock,
+            'daily_consumption': daily_consumption,
+            'days_of_supply': days_of_supply,
+            'threshold': threshold,
+            'forecast_consumption': forecast_consumption
+        }
+        
+        transition = None
+        if enqueue is not None and alert_state is not None:
+            transition = alert_state.evaluate((HOSPITAL_ID, PRODUCT_CODE), stock_data, threshold)
+        if transition is not None:
+            # alerts + outbox yazımı ve commit apply_transitions içinde (aynı transaction)
+            apply_transitions(conn, alert_state, [transition], enqueue=enqueue)
+        else:
+            if enqueue is not None and alert_state is None and breach:
+                enqueue(cursor, [stock_data])
+            conn.commit()
+        cursor.close()
+        stock_data['transition'] = transition
+        
+        print(f"Stok güncellendi: {opening_stock} → {current_stock} (Tüketim: {consumed_units})")
+        print(f" Kalan gün sayısı: {days_of_supply:.2f} gün")
+        
+        if breach:
+            print(f" ALARM! Stok kritik seviyede: {days_of_supply:.2f} gün")
+        else:
+            print(f"✔️ Stok yeterli: {days_of_supply:.2f} gün")
+        
+        return stock_data
+    except Exception as e:
+        print(f"Stok güncelleme hatası: {e}")
+        conn.rollback()
+        return None
+    finally:
+        release_db_connection(conn)
+
+def _run_path(path_fn, payload, deadline_at):
+    """
+    Bir yolu deadline'a kalan süreyi timeout vererek çalıştır ve kendi uçtan uca süresini
+    (retry'lar dahil) ölç. Süre kuyrukta beklerken dolduysa yol hiç başlatılmaz.
+    """
+    start = time.perf_counter()
+    remaining = deadline_at - start
+    if remaining <= 0:
+        return {'success': False, 'error': 'deadline kuyrukta doldu', 'latency_ms': 0,
+                'path_latency_ms': 0, 'timed_out': True}
+    result = path_fn(payload, timeout=remaining)
+    result['path_latency_ms'] = int((time.perf_counter() - start) * 1000)
+    return result
+
+def _await_path(future, started, deadline, path_name):
+    """Yolun sonucunu kendi deadline'ı içinde bekle"""
+    remaining = deadline - (time.perf_counter() - started)
+    try:
+        return future.result(timeout=max(0.0, remaining))
+    except FuturesTimeoutError:
+        return {
+            'success': False,
+            'error': f'{path_name} deadline aşıldı ({deadline:g}s)',
+            'latency_ms': int(deadline * 1000),
+            'path_latency_ms': int(deadline * 1000),
+            'timed_out': True
+        }
+    except Exception as e:
+        elapsed_ms = int((time.perf_counter() - started) * 1000)
+        return {
+            'success': False,
+            'error': str(e),
+            'latency_ms': elapsed_ms,
+            'path_latency_ms': elapsed_ms
+        }
+
+def dispatch_dual_path(breach_data, soap_deadline=None, event_deadline=None):
+    """Eşik aşımını SOA ve Serverless yollarına eşzamanlı gönder"""
+    soap_deadline = SOAP_PATH_DEADLINE if soap_deadline is None else soap_deadline
+    event_deadline = EVENT_PATH_DEADLINE if event_deadline is None else event_deadline
+    
+    print(f"\n{'='*60}")
+    print("⚡ DUAL PATH EXECUTION: SOA + SERVERLESS (paralel)")
+    print(f"{'='*60}")
+    
+    
+    soap_data = build_soap_data(breach_data)
+    
+    # İki yol aynı anda başlar; SOAP retry'ları Event Hub yolunu bekletmez
+    started = time.perf_counter()
+    soap_future = _dispatch_executor.submit(_run_path, send_stock_update, soap_data, started + soap_deadline)
+    event_future = _dispatch_executor.submit(_run_path, publish_event_to_hub, breach_data, started + event_deadline)
+    
+    # ========================================
+    # PATH 2: SERVERLESS (EVENT HUB)
+    # ========================================
+    event_result = _await_path(event_future, started, event_deadline, 'Event Hub')
+    
+    print(f"\nPATH 2: Event Hub")
+    print("-" * 60)
+    if event_result['success']:
+        print(f"Event published başarılı! (Latency: {event_result['latency_ms']}ms)")
+        print(f" Event ID: {event_result['event_id']}")
+    else:
+        print(f"Event publish başarısız: {event_result.get('error')}")
+    
+    # ========================================
+    # PATH 1: SOA (SOAP)
+    # ========================================
+    soap_result = _await_path(soap_future, started, soap_deadline, 'SOAP')
+    
+    print(f"\n PATH 1: SOAP")
+    print("-" * 60)
+    if soap_result['success']:
+        print(f" SOAP Request başarılı! (Latency: {soap_result['latency_ms']}ms)")
+        if soap_result['response'].get('orderTriggered'):
+            print(f" Sipariş oluşturuldu: {soap_result['response'].get('orderId')}")
+    else:
+        print(f"SOAP Request başarısız: {soap_result.get('error')}")
+    
+    wall_clock_ms = int((time.perf_counter() - started) * 1000)
+    
+    # ========================================
+    # COMPARISON SUMMARY
+    # ========================================
+    print(f"\n{'='*60}")
+    print(" DUAL PATH COMPARISON")
+    print(f"{'='*60}")
+    print(f"SOAP Latency:      {soap_result.get('path_latency_ms', 0):>6} ms | Status: {' OK' if soap_result['success'] else '❌ FAIL'}")
+    print(f"Event Hub Latency: {event_result.get('path_latency_ms', 0):>6} ms | Status: {' OK' if event_result['success'] else '❌ FAIL'}")
+    print(f"Wall Clock:        {wall_clock_ms:>6} ms (paralel)")
+    print(f"{'='*60}")
+
+    return soap_result, event_result
+
+def enqueue_breaches(cursor, rows):
+    """Her eşik aşımı için SOAP + Event Hub mesajlarını çağıranın transaction'ında outbox'a yaz"""
+    messages = []
+    for row in rows:
+        messages.append((outbox.SOAP, build_soap_data(row)))
+        messages.append((outbox.EVENT_HUB, build_event_payload(row)))
+    return outbox.enqueue(cursor, messages)
+
+class EventBatchNotSent(Exception):
+    """/publish-events isteği hiçbir event yazılmadan geri döndü; parça tekli çağrılarla gönderilebilir"""
+
+
+def _request_not_sent(exc):
+    """Bağlantı hiç kurulamadı mı? Kurulduysa StockMS event'leri yazmış olabilir"""
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(exc.args[0], 'reason', None) if exc.args else None
+    return isinstance(exc, requests.exceptions.ConnectionError) and isinstance(reason, NewConnectionError)
+
+def _failed_batch(chunk, error, latency_ms):
+    """Parçadaki her event için tekrar denenebilir hata sonucu"""
+    return [{'success': False, 'error': error, 'latency_ms': latency_ms, 'retryable': True} for _ in chunk]
+
+def _post_event_batch(chunk, timeout=30):
+    """
+    Bir parça event'i /publish-events'e gönder; event başına post_event formatında sonuç listesi.
+    İstek StockMS'e ulaştıktan sonraki hatalar (timeout, 5xx) tekrar gönderilmez, hata sonucu olur:
+    event'ler yazılmış olabilir, retry outbox'a kalır.
+    """
+    global _bulk_events_supported
+    
+    start_time = datetime.now()
+    try:
+        response = requests.post(f'{STOCKMS_URL}/publish-events', json=chunk, timeout=timeout)
+    except requests.exceptions.RequestException as e:
+        if _request_not_sent(e):
+            raise EventBatchNotSent(f'StockMS bağlantısı kurulamadı: {e}') from e
+        latency_ms = int((datetime.now() - start_time).total_seconds() * 1000)
+        return _failed_batch(chunk, f'{type(e).__name__}: {e}', latency_ms)
+    latency_ms = int((datetime.now() - start_time).total_seconds() * 1000)
+    
+    if response.status_code in EVENT_BATCH_REJECT_STATUS:
+        _bulk_events_supported = False
+        raise EventBatchNotSent(f'HTTP {response.status_code}: /publish-events desteklenmiyor')
+    if response.status_code != 200:
+        return _failed_batch(chunk, f'HTTP {response.status_code}: {response.text[:200]}', latency_ms)
+    
+    items = response.json().get('results') or []
+    if len(items) != len(chunk):
+        return _failed_batch(chunk, f'{len(chunk)} event için {len(items)} sonuç döndü', latency_ms)
+    
+    results = []
+    for payload, item in zip(chunk, items):
+        if item.get('success'):
+            results.append({
+                'success': True,
+                'event_id': payload['eventId'],
+                'latency_ms': latency_ms,
+                'response': item,
+                'batched': True
+            })
+        else:
+            # 400 şema hatası ve 409 stok uyuşmazlığı aynı event'le değişmez; sadece 404 (stok satırı
+            # henüz görünmüyor) geç teslimde düzelebilir
+            results.append({
+                'success': False,
+                'error': f"HTTP {item.get('status')}: {item.get('error')}",
+                'latency_ms': latency_ms,
+                'retryable': item.get('status') not in (400, 409)
+            })
+    return results
+
+def _deadline_failure():
+    """Süre dolduğu için hiç gönderilmeyen event'in sonucu"""
+    return {'success': False, 'error': 'deadline doldu; gönderilmedi', 'latency_ms': 0, 'retryable': True,
+            'timed_out': True}
+
+def post_events(payloads, batch_size=None, fallback_workers=None, timeout=None):
+    """
+    Event'leri EVENT_BATCH_SIZE'lık parçalar halinde /publish-events ile gönder; sonuçlar sırayla,
+    post_event formatında. Endpoint yoksa (404/405/501) ya da bağlantı hiç kurulamadıysa o event'ler
+    paralel tekli post_event çağrılarına düşer. timeout verilirse her istek kalan süreyle
+    sınırlanır; süre dolduktan sonra kalan event'ler gönderilmez.
+    """
+    payloads = list(payloads)
+    batch_size = batch_size or EVENT_BATCH_SIZE
+    results = [None] * len(payloads)
+    expires_at = None if timeout is None else time.perf_counter() + timeout
+    
+    def remaining():
+        return 30 if expires_at is None else min(30, expires_at - time.perf_counter())
+    
+    for start in range(0, len(payloads), batch_size):
+        if not _bulk_events_supported or remaining() <= 0:
+            break
+        chunk = payloads[start:start + batch_size]
+        try:
+            results[start:start + len(chunk)] = _post_event_batch(chunk, timeout=remaining())
+        except EventBatchNotSent as e:
+            print(f"⚠️  Event batch gönderilemedi ({len(chunk)} event): {e}")
+            continue
+        print(f"📦 Event batch: {sum(r['success'] for r in results[start:start + len(chunk)])}/{len(chunk)} event")
+    
+    def send(payload):
+        # Kalan süre her çağrı başladığında hesaplanır; havuzda bekleyen event süreyi aşmaz
+        left = remaining()
+        return post_event(payload, timeout=left) if left > 0 else _deadline_failure()
+    
+    pending = [i for i, result in enumerate(results) if result is None]
+    if pending:
+        # Ayrı havuz: post_events zaten dual-path havuzunda çalışıyor olabilir (iç içe bekleme kilitlenir)
+        workers = min(fallback_workers or EVENT_BATCH_FALLBACK_WORKERS, len(pending))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='event-fallback') as executor:
+            for index, result in zip(pending, executor.map(send, [payloads[i] for i in pending])):
+                results[index] = result
+    return results
+
+def _run_sweep(path_fn, payloads, deadline_at):
+    """Tarama yolunu deadline'a kalan süreyi HTTP timeout'u olarak vererek çalıştır"""
+    remaining = deadline_at - time.perf_counter()
+    if remaining <= 0:
+        return {'success': False, 'error': 'deadline kuyrukta doldu', 'latency_ms': 0,
+                'path_latency_ms': 0, 'timed_out': True}
+    return path_fn(payloads, timeout=remaining)
+
+def _await_sweep(future, started, deadline, path_name, count):
+    """Tarama yolunun sonuç listesini deadline içinde bekle; yetişmezse her satır için hata sonucu"""
+    result = _await_path(future, started, deadline, path_name)
+    if isinstance(result, list):
+        return result
+    return [dict(result) for _ in range(count)]
+
+def dispatch_breaches(rows, soap_deadline=None, event_deadline=None):
+    """
+    Bir taramanın tüm eşik aşımları: SOAP tek StockUpdateBatch, event'ler tek /publish-events (paralel).
+    Her yol dispatch_dual_path'teki deadline'larla beklenir; takılan yolun satırları zaman aşımı döner.
+    Kalan süre yolların HTTP timeout'u olarak da verilir: deadline dolunca istekler de biter.
+    """
+    if not rows:
+        return [], []
+    soap_deadline = SOAP_PATH_DEADLINE if soap_deadline is None else soap_deadline
+    event_deadline = EVENT_PATH_DEADLINE if event_deadline is None else event_deadline
+    started = time.perf_counter()
+    soap_future = _dispatch_executor.submit(
+        _run_sweep, send_stock_updates, [build_soap_data(row) for row in rows], started + soap_deadline)
+    event_future = _dispatch_executor.submit(
+        _run_sweep, post_events, [build_event_payload(row) for row in rows], started + event_deadline)
+    event_results = _await_sweep(event_future, started, event_deadline, 'Event Hub', len(rows))
+    soap_results = _await_sweep(soap_future, started, soap_deadline, 'SOAP', len(rows))
+    
+    wall_clock_ms = int((time.perf_counter() - started) * 1000)
+    print(f"📤 {len(rows)} aşım gönderildi | SOAP: {sum(r['success'] for r in soap_results)}/{len(rows)} "
+          f"| Event Hub: {sum(r['success'] for r in event_results)}/{len(rows)} | {wall_clock_ms}ms")
+    return soap_results, event_results
+
+def create_outbox_relay(batch_size=None):
+    """SOAP batch gönderimi ve Event Hub publish'i kullanan outbox relay"""
+    # Retry katmanı relay'in backoff'u; tekli SOAP fallback'i de tek deneme yapar
+    return outbox.OutboxRelay(
+        senders={outbox.SOAP: partial(send_stock_updates, max_retries=1), outbox.EVENT_HUB: post_events},
+        batch_size=batch_size or outbox.OUTBOX_BATCH_SIZE
+    )
+
+def main(use_outbox=False):
     """Ana döngü"""
     print("=" * 60)
     print(" Hospital-C - Stok Takip Sistemi")
@@ -279,6 +779,15 @@ def main():
     print("=" * 60)
     
     iteration = 0
+    stock_data = None
+    key = (HOSPITAL_ID, PRODUCT_CODE)
+    
+    # Tek seferlik tarama; sonrasında her iterasyon O(1) güncellenir
+    forecaster = ConsumptionForecaster()
+    print(f" Tüketim tahmini: {sync_forecaster(forecaster)} history satırı yüklendi")
+    
+    alert_state = AlertStateMachine()
+    print(f" Alert durumu: {restore_alert_state(alert_state)} açık alert yüklendi ({alert_state.state(key)})")
     
     while True:
         try:
@@ -288,7 +797,10 @@ def main():
             print(f"{'='*60}")
             
         
-            stock_data = get_current_stock()
+            # Sadece ilk iterasyonda (veya hata sonrası) okunur; sonrasında
+            # consume_and_check RETURNING değerleri kullanılır
+            if not stock_data:
+                stock_data = get_current_stock()
             if not stock_data:
                 print("⚠️ Stok bilgisi alınamadı, 10 saniye sonra tekrar denenecek...")
                 time.sleep(10)
@@ -303,60 +815,34 @@ def main():
             print(f" Simüle edilen tüketim: {consumed} birim")
             
          
-            if update_stock(consumed):
-               
-                breach, breach_data = check_threshold_breach()
-                
-                if breach:
-                    print(f"\n{'='*60}")
-                    print("⚡ DUAL PATH EXECUTION: SOA + SERVERLESS")
-                    print(f"{'='*60}")
-                    
-                    
-                    soap_data = {
-                        'currentStockUnits': breach_data['current_stock'],
-                        'dailyConsumptionUnits': breach_data['daily_consumption'],
-                        'daysOfSupply': float(breach_data['days_of_supply'])
-                    }
-                    
-                    # ========================================
-                    # PATH 1: SOA (SOAP)
-                    # ========================================
-                    print(f"\n PATH 1: SOAP Client Çağrılıyor...")
-                    print("-" * 60)
-                    
-                    soap_result = send_stock_update(soap_data)
-                    
-                    if soap_result['success']:
-                        print(f" SOAP Request başarılı! (Latency: {soap_result['latency_ms']}ms)")
-                        if soap_result['response'].get('orderTriggered'):
-                            print(f" Sipariş oluşturuldu: {soap_result['response'].get('orderId')}")
-                    else:
-                        print(f"SOAP Request başarısız: {soap_result.get('error')}")
-                    
-                    # ========================================
-                    # PATH 2: SERVERLESS (EVENT HUB)
-                    # ========================================
-                    print(f"\nPATH 2: Event Hub'a Event Publish Ediliyor...")
-                    print("-" * 60)
-                    
-                    event_result = publish_event_to_hub(breach_data)
-                    
-                    if event_result['success']:
-                        print(f"Event published başarılı! (Latency: {event_result['latency_ms']}ms)")
-                        print(f" Event ID: {event_result['event_id']}")
-                    else:
-                        print(f"Event publish başarısız: {event_result.get('error')}")
-                    
-                    # ========================================
-                    # COMPARISON SUMMARY
-                    # ========================================
-                    print(f"\n{'='*60}")
-                    print(" DUAL PATH COMPARISON")
-                    print(f"{'='*60}")
-                    print(f"SOAP Latency:      {soap_result.get('latency_ms', 0):>6} ms | Status: {' OK' if soap_result['success'] else '❌ FAIL'}")
-                    print(f"Event Hub Latency: {event_result.get('latency_ms', 0):>6} ms | Status: {' OK' if event_result['success'] else '❌ FAIL'}")
-                    print(f"{'='*60}")
+            forecast_consumption = None
+            if forecaster.has_forecast(key):
+                forecast_consumption = round(forecaster.forecast_daily_consumption(
+                    key, horizon_days=forecaster.threshold_horizon(THRESHOLD)
+                ), 2)
+                print(f" Tahmini tüketim: {forecast_consumption} birim/gün")
+            
+            if use_outbox:
+                # Stok, alert geçişi ve giden mesajlar tek transaction; gönderimi relay yapar
+                stock_data = consume_and_check(consumed, forecast_consumption=forecast_consumption,
+                                               record_alert=False, alert_state=alert_state,
+                                               enqueue=enqueue_breaches)
+                if stock_data:
+                    forecaster.update(key, consumed, date.today().weekday())
+                    transition = stock_data['transition']
+                    if transition is not None:
+                        print(f" Alert durumu: {transition['from']} → {transition['to']}")
+                        if transition['dispatch']:
+                            print(" Bildirimler outbox'a yazıldı (relay gönderecek)")
+            else:
+                # Alert yazımı durum makinesinde: sadece geçişlerde
+                stock_data = consume_and_check(consumed, forecast_consumption=forecast_consumption,
+                                               record_alert=False)
+                if stock_data:
+                    forecaster.update(key, consumed, date.today().weekday())
+                    transition = apply_alert_transition(alert_state, stock_data)
+                    if transition is not None and transition['dispatch']:
+                        dispatch_dual_path(stock_data)
 
             
             print(f"\n⏳ 10 saniye bekleniyor...")
@@ -369,5 +855,57 @@ def main():
             print(f" Beklenmeyen hata: {e}")
             time.sleep(10)
 
+def run(argv=None):
+    """Komut satırından mod seçerek monitor'u başlat"""
+    parser = argparse.ArgumentParser(description='Hospital-C stock monitor')
+    parser.add_argument('--mode', choices=['single', 'batch', 'event', 'scheduled', 'sharded', 'relay'],
+                        default='single',
+                        help='single: tek SKU demo döngüsü, batch: tüm stock tablosu, '
+                             'event: LISTEN/NOTIFY ile değişiklik anında kontrol, '
+                             'scheduled: SKU başına riske göre adaptif kontrol, '
+                             'sharded: SKU\'ları advisory lock ile worker process\'lerine böl, '
+                             'relay: outbox\'taki mesajları gönder')
+    parser.add_argument('--interval', type=float, default=10,
+                        help='batch/sharded modunda döngü aralığı, event modunda polling fallback (saniye)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='sharded modunda bu host\'taki worker process sayısı (varsayılan: CPU sayısı), '
+                             'relay modunda relay thread sayısı (varsayılan: OUTBOX_RELAY_WORKERS)')
+    parser.add_argument('--consume', action='store_true',
+                        help='sharded modunda sahip olunan SKU\'lar için tüketim de simüle et')
+    parser.add_argument('--outbox', action='store_true',
+                        help='single modunda bildirimleri doğrudan göndermek yerine stok değişikliğiyle '
+                             'aynı transaction\'da outbox\'a yaz (gönderimi relay modu yapar)')
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help='relay modunda tek transaction\'da kilitlenen outbox satırı sayısı')
+    args = parser.parse_args(argv)
+
+    # Sharded modda her worker kendi bağlantılarını açar (fork sonrası soket paylaşılmaz)
+    if args.mode != 'sharded':
+        warmup_connections()
+
+    if args.mode == 'batch':
+        from batch_monitor import run_batch_monitor
+        run_batch_monitor(dispatch_batch=dispatch_breaches, interval=args.interval,
+                          default_threshold=THRESHOLD, alert_state=AlertStateMachine())
+    elif args.mode == 'event':
+        from event_monitor import run_event_monitor
+        run_event_monitor(dispatch=dispatch_dual_path, fallback_interval=args.interval,
+                          default_threshold=THRESHOLD, alert_state=AlertStateMachine())
+    elif args.mode == 'scheduled':
+        from scheduler import run_scheduled_monitor
+        run_scheduled_monitor(dispatch=dispatch_dual_path, default_threshold=THRESHOLD,
+                              alert_state=AlertStateMachine())
+    elif args.mode == 'sharded':
+        from sharding import run_sharded_monitor
+        run_sharded_monitor(workers=args.workers, dispatch=dispatch_dual_path,
+                            interval=args.interval, default_threshold=THRESHOLD,
+                            consume=args.consume)
+    elif args.mode == 'relay':
+        relay = create_outbox_relay(batch_size=args.batch_size)
+        outbox.run_relay(relay, workers=args.workers or outbox.OUTBOX_RELAY_WORKERS,
+                         report_interval=args.interval)
+    else:
+        main(use_outbox=args.outbox)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    run()
\ No newline at end of file
@@ -0,0 +1,276 @@
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
+import db_pool
+from retry_scheduler import backoff_delay
+
+load_dotenv()
+
+SOAP = 'SOAP'
+EVENT_HUB = 'EVENT_HUB'
+
+PENDING = 'PENDING'
+SENT = 'SENT'
+DEAD = 'DEAD'
+
+# Tek claim'de kiralanıp gönderilecek en fazla satır
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '100'))
+OUTBOX_RELAY_WORKERS = int(os.getenv('OUTBOX_RELAY_WORKERS', '2'))
+# Kuyruk boşken relay'in bekleme süresi (saniye)
+OUTBOX_POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', '1'))
+# Bu kadar denemeden sonra satır DEAD olur ve bir daha seçilmez
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '10'))
+OUTBOX_RETRY_BASE_DELAY = float(os.getenv('OUTBOX_RETRY_BASE_DELAY', '5'))
+OUTBOX_RETRY_MAX_DELAY = float(os.getenv('OUTBOX_RETRY_MAX_DELAY', '300'))
+# Claim edilen satır bu kadar saniye başka relay'e görünmez; en uzun gönderimden uzun olmalı
+OUTBOX_LEASE_SECONDS = float(os.getenv('OUTBOX_LEASE_SECONDS', '120'))
+
+ENQUEUE_SQL = "INSERT INTO outbox (channel, payload) VALUES %s"
+
+# Kısa transaction'da kiralama: available_at ileri alınır, attempts artar ve commit edilir.
+# SKIP LOCKED aynı anda claim eden relay'lerin aynı satırı almasını önler; kira dolmadan satır
+# tekrar seçilmez, relay gönderirken ölürse kira dolunca başka relay gönderir (en az bir kez)
+CLAIM_SQL = """
+    UPDATE outbox
+    SET available_at = NOW() + make_interval(secs => %s), attempts = attempts + 1
+    WHERE id IN (
+        SELECT id
+        FROM outbox
+        WHERE status = 'PENDING' AND available_at <= NOW()
+        ORDER BY available_at, id
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, channel, payload, attempts
+"""
+
+MARK_SENT_SQL = """
+    UPDATE outbox
+    SET status = 'SENT', sent_at = NOW(), last_error = NULL
+    WHERE id = ANY(%s)
+"""
+
+# Kira dolup satır başka relay'e geçtiyse (attempts değişti) ya da gönderildiyse üzerine yazılmaz
+MARK_FAILED_SQL = """
+    UPDATE outbox AS o
+    SET status = f.status,
+        last_error = f.error,
+        available_at = NOW() + make_interval(secs => f.delay)
+    FROM (VALUES %s) AS f(id, status, error, delay, attempts)
+    WHERE o.id = f.id AND o.attempts = f.attempts AND o.status = 'PENDING'
+"""
+
+
+def enqueue(cursor, messages):
+    """(channel, payload) mesajlarını çağıranın transaction'ında outbox'a ekle (commit etmez)"""
+    messages = list(messages)
+    if messages:
+        execute_values(cursor, ENQUEUE_SQL,
+                       [(channel, json.dumps(payload)) for channel, payload in messages],
+                       template='(%s, %s::jsonb)')
+    return len(messages)
+
+
+def pending_counts(conn):
+    """Durum başına outbox satır sayısı (metrik)"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status")
+    counts = {PENDING: 0, SENT: 0, DEAD: 0}
+    counts.update(dict(cursor.fetchall()))
+    cursor.close()
+    return counts
+
+
+class OutboxRelay:
+    """
+    Outbox'ı batch'ler halinde boşaltır. senders: channel -> fn(payloads) -> sonuç listesi
+    (payload sırasıyla, send_stock_update formatında 'success'/'error').
+    Satırlar kısa bir transaction'da lease_seconds için kiralanır, gönderim transaction ve
+    bağlantı tutmadan yapılır, sonuç ikinci kısa transaction'da işaretlenir. Süreç arada ölürse
+    kira dolunca satırlar tekrar gönderilir (en az bir kez teslim). Retry katmanı relay'dir;
+    sender'ların kendi retry'ları kapalı olmalıdır.
+    """
+
+    def __init__(self, senders, batch_size=OUTBOX_BATCH_SIZE, max_attempts=OUTBOX_MAX_ATTEMPTS,
+                 retry_base_delay=OUTBOX_RETRY_BASE_DELAY, retry_max_delay=OUTBOX_RETRY_MAX_DELAY,
+                 lease_seconds=OUTBOX_LEASE_SECONDS, get_connection=None, release_connection=None,
+                 rng=random):
+        self.senders = senders
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self._get_connection = get_connection or db_pool.get_connection
+        self._release_connection = release_connection or db_pool.release_connection
+        self._rng = rng
+        self._lock = threading.Lock()
+        self.relayed = 0
+        self.failed = 0
+        self.dead = 0
+        self.batches = 0
+        self.errors = 0
+        self._started = None
+        self._busy_s = 0.0
+
+    def drain_batch(self):
+        """Bir batch kirala, kanallarına gönder, sonuçları işaretle; işlenen satır sayısını döndür"""
+        start = time.perf_counter()
+        try:
+            rows = self._transaction(self._claim)
+        except Exception as e:
+            self._error(e)
+            return 0
+        if not rows:
+            return 0
+
+        sent, failed = self._send(rows)
+        try:
+            self._transaction(lambda cursor: self._mark(cursor, sent, failed))
+        except Exception as e:
+            # İşaretlenemeyen satırların kirası dolunca tekrar gönderilirler
+            self._error(e)
+            return 0
+
+        with self._lock:
+            if self._started is None:
+                self._started = start
+            self.batches += 1
+            self.relayed += len(sent)
+            self.failed += len(failed)
+            self.dead += sum(1 for row in failed if row[1] == DEAD)
+            self._busy_s += time.perf_counter() - start
+        return len(rows)
+
+    def _transaction(self, work):
+        """work(cursor)'u havuzdan alınan bağlantıda tek transaction'da çalıştır ve commit et"""
+        conn = None
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            result = work(cursor)
+            conn.commit()
+            cursor.close()
+            return result
+        except Exception:
+            if conn is not None:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+            raise
+        finally:
+            self._release_connection(conn)
+
+    def _claim(self, cursor):
+        cursor.execute(CLAIM_SQL, (self.lease_seconds, self.batch_size))
+        return sorted(cursor.fetchall(), key=lambda row: row[0])
+
+    @staticmethod
+    def _mark(cursor, sent, failed):
+        if sent:
+            cursor.execute(MARK_SENT_SQL, (sent,))
+        if failed:
+            execute_values(cursor, MARK_FAILED_SQL, failed,
+                           template='(%s, %s, %s, %s::float8, %s)')
+
+    def _error(self, error):
+        with self._lock:
+            self.errors += 1
+        print(f"⚠️  Outbox relay hatası: {error}")
+
+    def drain(self, max_batches=None):
+        """Bekleyen satır kalmayana (ya da max_batches'a) kadar boşalt; toplam satır sayısı"""
+        total = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            count = self.drain_batch()
+            total += count
+            batches += 1
+            if count < self.batch_size:
+                break
+        return total
+
+    def stats(self):
+        """Gönderilen / başarısız / DEAD satırlar ve throughput (satır/s)"""
+        with self._lock:
+            elapsed = time.perf_counter() - self._started if self._started is not None else 0.0
+            return {
+                'relayed': self.relayed,
+                'failed': self.failed,
+                'dead': self.dead,
+                'batches': self.batches,
+                'errors': self.errors,
+                'rows_per_sec': round(self.relayed / elapsed, 1) if elapsed > 0 else 0.0,
+                'busy_rows_per_sec': round(self.relayed / self._busy_s, 1) if self._busy_s > 0 else 0.0
+            }
+
+    def _send(self, rows):
+        by_channel = {}
+        for row in rows:
+            by_channel.setdefault(row[1], []).append(row)
+
+        sent, failed = [], []
+        for channel, channel_rows in by_channel.items():
+            sender = self.senders.get(channel)
+            payloads = [row[2] for row in channel_rows]
+            try:
+                if sender is None:
+                    raise ValueError(f'Tanımsız kanal: {channel}')
+                results = list(sender(payloads))
+            except Exception as e:
+                results = [{'success': False, 'error': str(e)}] * len(channel_rows)
+
+            for i, row in enumerate(channel_rows):
+                result = results[i] if i < len(results) else None
+                if result and result.get('success'):
+                    sent.append(row[0])
+                    continue
+                # Claim attempts'i bu deneme dahil artırdı
+                attempts = row[3]
+                error = (result or {}).get('error') or 'Sonuç yok'
+                # Kalıcı hata (örn. SOAP Client fault) tekrar denenmez
+                permanent = (result or {}).get('retryable') is False
+                status = DEAD if permanent or attempts >= self.max_attempts else PENDING
+                delay = backoff_delay(attempts, self.retry_base_delay, self.retry_max_delay,
+                                      0.2, self._rng)
+                failed.append((row[0], status, str(error), delay, attempts))
+        return sent, failed
+
+
+def run_relay(relay, workers=OUTBOX_RELAY_WORKERS, poll_interval=OUTBOX_POLL_INTERVAL,
+              stop_event=None, report_interval=10):
+    """workers adet thread ile outbox'ı sürekli boşalt; stop_event set edilene (Ctrl+C) kadar"""
+    stop_event = stop_event or threading.Event()
+
+    def loop():
+        while not stop_event.is_set():
+            # Tam batch geldiyse bekleme; kuyrukta daha fazlası olabilir
+            if relay.drain_batch() < relay.batch_size:
+                stop_event.wait(poll_interval)
+
+    threads = [threading.Thread(target=loop, name=f'outbox-relay-{i}', daemon=True)
+               for i in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    try:
+        while not stop_event.wait(report_interval):
+            stats = relay.stats()
+            print(f" Outbox relay: gönderilen={stats['relayed']} başarısız={stats['failed']} "
+                  f"DEAD={stats['dead']} | {stats['rows_per_sec']} satır/s")
+    except KeyboardInterrupt:
+        print("\n\n Relay durduruluyor...")
+        stop_event.set()
+
+    for thread in threads:
+        thread.join(poll_interval + 5)
+    return relay.stats()
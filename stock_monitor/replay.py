@@ -0,0 +1,255 @@
+"""
+Fast-forward replay / backfill.
+
+Tüketim modelini (simulation.simulate_consumption) date.today() yerine simüle edilmiş
+bir saatle gün gün ilerletir; consumption_history ve alerts satırlarını büyük
+parçalar halinde COPY FROM STDIN ile yazar. Alert'ler AlertStateMachine ile aynı
+histerezis kurallarını izler; eşiğe düşen SKU'ya lead time sonunda yeniden stok gelir.
+
+Kullanım:
+    python stock_monitor/replay.py --days 180 --skus 5000 --start 2026-01-01
+    python stock_monitor/replay.py --days 90 --from-db
+    python stock_monitor/replay.py --days 365 --skus 10000 --dry-run
+"""
+import argparse
+import io
+import os
+import sys
+import time
+from datetime import date, datetime, time as dtime, timedelta
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
+from alert_state import CRITICAL_DAYS, HYSTERESIS_DAYS, alert_fields, OK, LOW, CRITICAL
+from simulation import simulate_consumption
+
+
+THRESHOLD = 2.0
+HOSPITAL_ID = os.getenv('HOSPITAL_ID', 'Hospital-C')
+PRODUCT_CODE = os.getenv('PRODUCT_CODE', 'PHYSIO-SALINE-500ML')
+
+RESTOCK_DAYS = 14        # sipariş miktarı: kaç günlük baz tüketim
+LEAD_TIME_DAYS = 2       # siparişten teslimata gün
+ROWS_PER_COPY = 500_000  # bir COPY parçasındaki yaklaşık satır sayısı
+
+LEVELS = [OK, LOW, CRITICAL]
+
+HISTORY_COLUMNS = ('hospital_id', 'product_code', 'consumption_date', 'units_consumed',
+                   'opening_stock', 'closing_stock', 'day_of_week', 'is_weekend',
+                   'notes', 'created_at')
+ALERT_COLUMNS = ('hospital_id', 'product_code', 'alert_type', 'severity', 'current_stock',
+                 'daily_consumption', 'days_of_supply', 'threshold', 'resolved_at', 'created_at')
+
+
+class SimulatedClock:
+    """date.today() yerine kullanılan, elle ilerletilen gün saati"""
+
+    def __init__(self, start=None, tick=dtime(23, 59)):
+        self.current = start or date.today()
+        self.tick = tick
+
+    def today(self):
+        return self.current
+
+    def now(self):
+        return datetime.combine(self.current, self.tick)
+
+    def advance(self, days=1):
+        self.current += timedelta(days=days)
+        return self.current
+
+
+def target_levels(levels, days_of_supply, thresholds,
+                  critical_days=CRITICAL_DAYS, hysteresis_days=HYSTERESIS_DAYS):
+    """AlertStateMachine.target_level'ın vektörel hali (0=OK, 1=LOW, 2=CRITICAL)"""
+    critical = (days_of_supply < critical_days) | (
+        (levels == 2) & (days_of_supply < critical_days + hysteresis_days))
+    low = (days_of_supply < thresholds) | (
+        (levels != 0) & (days_of_supply < thresholds + hysteresis_days))
+    return np.where(critical, 2, np.where(low, 1, 0))
+
+
+def replay_chunks(hospital_ids, product_codes, initial_stock, base_consumption, days,
+                  start_date=None, thresholds=THRESHOLD, restock_days=RESTOCK_DAYS,
+                  lead_time_days=LEAD_TIME_DAYS, rows_per_chunk=ROWS_PER_COPY, seed=None):
+    """
+    Simüle saatle gün gün ilerle; her parça için COPY'ye hazır
+    (history_tsv, alerts_tsv, history_rows, alert_rows) döndür.
+    """
+    rng = np.random.default_rng(seed)
+    clock = SimulatedClock(start_date)
+    stock = np.atleast_1d(np.asarray(initial_stock, dtype=np.int64)).copy()
+    base = np.atleast_1d(np.asarray(base_consumption, dtype=np.float64))
+    thresholds = np.broadcast_to(np.asarray(thresholds, dtype=np.float64), base.shape)
+    skus = base.size
+
+    # Satır başı sabit kısımlar bir kez hazırlanır
+    prefixes = [f"{h}\t{p}\t" for h, p in zip(hospital_ids, product_codes)]
+    restock_units = np.ceil(base * restock_days).astype(np.int64)
+    delivery_day = np.full(skus, -1)
+    levels = np.zeros(skus, dtype=np.int64)
+    open_alerts = {}
+
+    chunk_days = max(1, rows_per_chunk // max(skus, 1))
+    history, alerts, history_rows, alert_rows = [], [], 0, 0
+
+    for offset in range(0, days, chunk_days):
+        n = min(chunk_days, days - offset)
+        consumption = simulate_consumption(base, 1, n, clock.today(), rng)[0]
+
+        for d in range(n):
+            day = clock.today()
+            day_index = offset + d
+            now = clock.now().isoformat(sep=' ')
+
+            arrived = delivery_day == day_index
+            stock[arrived] += restock_units[arrived]
+            delivery_day[arrived] = -1
+
+            opening = stock
+            closing = np.maximum(opening - consumption[d], 0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                days_of_supply = np.where(base > 0, closing / base, np.inf)
+
+            suffix = f"\t{day.strftime('%A')}\t{'t' if day.weekday() >= 5 else 'f'}\treplay\t{now}\n"
+            date_col = f"{day.isoformat()}\t"
+            history.append(''.join([
+                f"{prefix}{date_col}{units}\t{o}\t{c}{suffix}"
+                for prefix, units, o, c in zip(prefixes, consumption[d].tolist(),
+                                               opening.tolist(), closing.tolist())
+            ]))
+            history_rows += skus
+
+            targets = target_levels(levels, days_of_supply, thresholds)
+            for k in np.flatnonzero(targets != levels).tolist():
+                if k in open_alerts:
+                    head, tail = open_alerts.pop(k)
+                    alerts.append(f"{head}{now}{tail}")
+                    alert_rows += 1
+                if targets[k] != 0:
+                    alert_type, severity = alert_fields(days_of_supply[k], LEVELS[targets[k]])
+                    # resolved_at alert kapanınca ya da replay bitince doldurulur
+                    open_alerts[k] = (
+                        f"{prefixes[k]}{alert_type}\t{severity}\t{closing[k]}\t{int(base[k])}\t"
+                        f"{min(days_of_supply[k], 999.99):.2f}\t{thresholds[k]:.2f}\t",
+                        f"\t{now}\n"
+                    )
+
+            # Alarmdaki ve bekleyen siparişi olmayan SKU'lar için sipariş ver
+            reorder = (targets != 0) & (delivery_day < 0)
+            delivery_day[reorder] = day_index + lead_time_days
+            levels = targets
+            stock = closing
+            clock.advance()
+
+        yield ''.join(history), ''.join(alerts), history_rows, alert_rows
+        history, alerts, history_rows, alert_rows = [], [], 0, 0
+
+    # Replay sonunda hâlâ açık olan alert'ler resolved_at = NULL ile yazılır
+    if open_alerts:
+        yield '', ''.join(f"{head}\\N{tail}" for head, tail in open_alerts.values()), 0, len(open_alerts)
+
+
+def copy_rows(cursor, table, columns, tsv):
+    """TSV metnini COPY FROM STDIN ile tabloya yaz"""
+    if not tsv:
+        return
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", io.StringIO(tsv))
+
+
+def run_replay(conn, chunks):
+    """Parçaları COPY ile yaz; her parça ayrı transaction"""
+    totals = {'history_rows': 0, 'alert_rows': 0}
+    cursor = conn.cursor()
+    try:
+        for history_tsv, alerts_tsv, history_rows, alert_rows in chunks:
+            copy_rows(cursor, 'consumption_history', HISTORY_COLUMNS, history_tsv)
+            copy_rows(cursor, 'alerts', ALERT_COLUMNS, alerts_tsv)
+            conn.commit()
+            totals['history_rows'] += history_rows
+            totals['alert_rows'] += alert_rows
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return totals
+
+
+def _synthetic_skus(count, seed=None):
+    rng = np.random.default_rng(seed)
+    consumption = rng.integers(10, 200, size=count)
+    stock = (consumption * rng.uniform(2, 10, size=count)).astype(np.int64)
+    codes = [f"SKU-{i:06d}" for i in range(count)]
+    return [HOSPITAL_ID] * count, codes, stock, consumption, THRESHOLD
+
+
+def _skus_from_db():
+    import batch_monitor
+    import db_pool
+
+    with db_pool.connection() as conn:
+        snapshot = batch_monitor.load_stock_snapshot(conn)
+    thresholds = np.where(np.isnan(snapshot['reorder_threshold']), THRESHOLD,
+                          snapshot['reorder_threshold'])
+    return (snapshot['hospital_id'].tolist(), snapshot['product_code'].tolist(),
+            snapshot['current_stock'], snapshot['daily_consumption'], thresholds)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fast-forward consumption/alert backfill')
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--start', type=date.fromisoformat, default=None,
+                        help='simülasyon başlangıç günü (YYYY-MM-DD), varsayılan bugün')
+    parser.add_argument('--skus', type=int, default=0, help='>0 ise bu kadar sentetik SKU üret')
+    parser.add_argument('--stock', type=int, default=200, help='başlangıç stoku (tek SKU)')
+    parser.add_argument('--consumption', type=float, default=79, help='günlük baz tüketim (tek SKU)')
+    parser.add_argument('--from-db', action='store_true', help='stock tablosundaki tüm SKU\'ları kullan')
+    parser.add_argument('--restock-days', type=int, default=RESTOCK_DAYS)
+    parser.add_argument('--lead-time', type=int, default=LEAD_TIME_DAYS)
+    parser.add_argument('--rows-per-copy', type=int, default=ROWS_PER_COPY)
+    parser.add_argument('--dry-run', action='store_true', help='DB\'ye yazmadan sadece üret')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.from_db:
+        hospital_ids, codes, stock, consumption, thresholds = _skus_from_db()
+    elif args.skus > 0:
+        hospital_ids, codes, stock, consumption, thresholds = _synthetic_skus(args.skus, args.seed)
+    else:
+        hospital_ids, codes = [HOSPITAL_ID], [PRODUCT_CODE]
+        stock, consumption, thresholds = [args.stock], [args.consumption], THRESHOLD
+
+    chunks = replay_chunks(hospital_ids, codes, stock, consumption, args.days,
+                           start_date=args.start, thresholds=thresholds,
+                           restock_days=args.restock_days, lead_time_days=args.lead_time,
+                           rows_per_chunk=args.rows_per_copy, seed=args.seed)
+
+    print("=" * 60)
+    print(f" Replay: {len(codes)} SKU × {args.days} gün "
+          f"({'dry-run' if args.dry_run else 'COPY FROM STDIN'})")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    if args.dry_run:
+        totals = {'history_rows': 0, 'alert_rows': 0}
+        for _, _, history_rows, alert_rows in chunks:
+            totals['history_rows'] += history_rows
+            totals['alert_rows'] += alert_rows
+    else:
+        import db_pool
+        with db_pool.connection() as conn:
+            totals = run_replay(conn, chunks)
+    elapsed = time.perf_counter() - start
+
+    rows = totals['history_rows'] + totals['alert_rows']
+    print(f" consumption_history: {totals['history_rows']} satır")
+    print(f" alerts: {totals['alert_rows']} satır")
+    print(f" Süre: {elapsed:.2f}s | {rows / elapsed * 60 / 1e6:.2f}M satır/dakika")
+    return totals
+
+
+if __name__ == "__main__":
+    main()
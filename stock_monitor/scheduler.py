@@ -0,0 +1,198 @@
+import heapq
+import itertools
+import os
+import sys
+import time
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
+import batch_monitor
+import db_pool
+
+
+THRESHOLD = batch_monitor.THRESHOLD
+
+# Eşikteki/altındaki SKU MIN_INTERVAL'de, HORIZON_DAYS+ gün fazlası olan MAX_INTERVAL'de kontrol edilir
+MIN_INTERVAL = float(os.getenv('SCHEDULER_MIN_INTERVAL', '2'))
+MAX_INTERVAL = float(os.getenv('SCHEDULER_MAX_INTERVAL', '300'))
+HORIZON_DAYS = float(os.getenv('SCHEDULER_HORIZON_DAYS', '14'))
+# Yeni eklenen SKU'ları yakalamak için tam tarama aralığı
+RESCAN_INTERVAL = float(os.getenv('SCHEDULER_RESCAN_INTERVAL', '600'))
+
+MAX_BATCH = 1000   # bir turda tek sorguyla kontrol edilecek en fazla SKU
+RATE_WINDOW = 60   # checks/sec hesaplama penceresi (saniye)
+
+
+def next_intervals(days_of_supply, thresholds, min_interval=MIN_INTERVAL,
+                   max_interval=MAX_INTERVAL, horizon_days=HORIZON_DAYS):
+    """Eşiğe uzaklığa göre bir sonraki kontrol aralığı (saniye, vektörel)"""
+    margin = np.asarray(days_of_supply, dtype=np.float64) - np.asarray(thresholds, dtype=np.float64)
+    fraction = np.clip(np.nan_to_num(margin / horizon_days, posinf=1.0), 0.0, 1.0)
+    return min_interval + fraction * (max_interval - min_interval)
+
+
+class AdaptiveScheduler:
+    """
+    SKU başına bir sonraki kontrol zamanını tutan heap. Risk arttıkça
+    kontrol sıklaşır; toplam sorgu yükü katalog boyutuyla değil riskle ölçeklenir.
+    """
+
+    def __init__(self, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL,
+                 horizon_days=HORIZON_DAYS, rate_window=RATE_WINDOW, clock=time.monotonic):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.horizon_days = horizon_days
+        self.rate_window = rate_window
+        self.clock = clock
+        self.heap = []
+        self.due = {}
+        self.total_checks = 0
+        self.started_at = clock()
+        self._checks = deque()
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self.due)
+
+    def schedule_many(self, keys, days_of_supply, thresholds, now=None):
+        """SKU'ları days-of-supply'a göre yeniden zamanla (eski kayıt geçersiz olur)"""
+        now = self.clock() if now is None else now
+        intervals = next_intervals(days_of_supply, thresholds, self.min_interval,
+                                   self.max_interval, self.horizon_days)
+        for key, interval in zip(keys, intervals.tolist()):
+            due_at = now + interval
+            self.due[key] = due_at
+            heapq.heappush(self.heap, (due_at, next(self._seq), key))
+        return intervals
+
+    def schedule(self, key, days_of_supply, threshold=THRESHOLD, now=None):
+        return float(self.schedule_many([key], [days_of_supply], [threshold], now)[0])
+
+    def remove(self, key):
+        """SKU'yu takipten çıkar (heap kaydı pop sırasında atlanır)"""
+        self.due.pop(key, None)
+
+    def pop_due(self, now=None, limit=MAX_BATCH):
+        """Zamanı gelmiş SKU'ları döndür; tekrar schedule edilene kadar takip dışıdır"""
+        now = self.clock() if now is None else now
+        keys = []
+        while self.heap and self.heap[0][0] <= now and len(keys) < limit:
+            due_at, _, key = heapq.heappop(self.heap)
+            if self.due.get(key) != due_at:
+                continue  # daha sonra yeniden zamanlanmış eski kayıt
+            del self.due[key]
+            keys.append(key)
+        return keys
+
+    def seconds_until_next(self, now=None):
+        """Bir sonraki kontrole kalan süre (heap boşsa None)"""
+        now = self.clock() if now is None else now
+        while self.heap and self.due.get(self.heap[0][2]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+        if not self.heap:
+            return None
+        return max(0.0, self.heap[0][0] - now)
+
+    def record_checks(self, count, now=None):
+        now = self.clock() if now is None else now
+        self.total_checks += count
+        self._checks.append((now, count))
+
+    def checks_per_second(self, now=None):
+        """Son rate_window saniyede saniye başına yapılan SKU kontrolü"""
+        now = self.clock() if now is None else now
+        while self._checks and self._checks[0][0] <= now - self.rate_window:
+            self._checks.popleft()
+        window = min(self.rate_window, max(now - self.started_at, 1e-9))
+        return sum(count for _, count in self._checks) / window
+
+    def stats(self, now=None):
+        return {
+            'skus': len(self.due),
+            'checks_per_second': round(self.checks_per_second(now), 2),
+            'total_checks': self.total_checks,
+            'next_check_in': self.seconds_until_next(now)
+        }
+
+
+def run_scheduled_cycle(scheduler, keys=None, dispatch=None, default_threshold=THRESHOLD,
+                        alert_state=None):
+    """Verilen SKU'ları (None ise tümünü) tek sorguda kontrol et ve yeniden zamanla"""
+    now = scheduler.clock()
+
+    try:
+        with db_pool.connection() as conn:
+            if keys is None:
+                snapshot = batch_monitor.load_stock_snapshot(conn)
+            else:
+                snapshot = batch_monitor.load_sku_snapshot(conn, keys)
+            evaluation = batch_monitor.evaluate_snapshot(snapshot, default_threshold)
+            rows = batch_monitor.record_evaluation(conn, snapshot, evaluation, alert_state)
+    except Exception:
+        # SKU'lar kaybolmasın: en kısa aralıkla tekrar denenir
+        if keys:
+            scheduler.schedule_many(keys, np.full(len(keys), -np.inf), np.zeros(len(keys)), now)
+        raise
+
+    # stock tablosundan silinen SKU'lar yeniden zamanlanmaz
+    checked = list(zip(snapshot['hospital_id'], snapshot['product_code']))
+    scheduler.schedule_many(checked, evaluation['days_of_supply'], evaluation['threshold'], now)
+    scheduler.record_checks(len(checked), now)
+
+    if dispatch is not None:
+        for row in rows:
+            dispatch(row)
+
+    return {'checked': len(checked), 'breached': len(rows), 'rows': rows}
+
+
+def run_scheduled_monitor(dispatch=None, default_threshold=THRESHOLD, alert_state=None,
+                          scheduler=None, rescan_interval=RESCAN_INTERVAL, report_interval=10):
+    """Adaptif zamanlayıcı modu ana döngüsü"""
+    scheduler = scheduler or AdaptiveScheduler()
+
+    print("=" * 60)
+    print(" Scheduled Monitor - SKU başına adaptif kontrol")
+    print("=" * 60)
+    print(f" Kontrol aralığı: {scheduler.min_interval:g}s (eşikte) - "
+          f"{scheduler.max_interval:g}s (+{scheduler.horizon_days:g} gün)")
+    print(" Ctrl+C ile durdurun")
+    print("=" * 60)
+
+    if alert_state is not None:
+        with db_pool.connection() as conn:
+            print(f" Alert durumu: {alert_state.restore(conn)} açık alert yüklendi")
+
+    next_rescan = scheduler.clock()
+    next_report = scheduler.clock() + report_interval
+
+    while True:
+        try:
+            now = scheduler.clock()
+            if now >= next_rescan:
+                run_scheduled_cycle(scheduler, None, dispatch, default_threshold, alert_state)
+                next_rescan = now + rescan_interval
+            else:
+                keys = scheduler.pop_due(now)
+                if keys:
+                    run_scheduled_cycle(scheduler, keys, dispatch, default_threshold, alert_state)
+
+            if now >= next_report:
+                stats = scheduler.stats()
+                print(f" {datetime.now().strftime('%H:%M:%S')} | SKU: {stats['skus']} "
+                      f"| {stats['checks_per_second']} kontrol/sn | Toplam: {stats['total_checks']}")
+                next_report = now + report_interval
+
+            wait = scheduler.seconds_until_next()
+            wait = 1.0 if wait is None else min(wait, 1.0)
+            time.sleep(max(0.0, min(wait, next_rescan - scheduler.clock())))
+        except KeyboardInterrupt:
+            print("\n\n Program sonlandırılıyor...")
+            break
+        except Exception as e:
+            print(f" Beklenmeyen hata: {e}")
+            time.sleep(scheduler.min_interval)
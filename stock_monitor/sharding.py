@@ -0,0 +1,320 @@
+"""
+Yatay ölçeklenen monitor: SKU'lar (hospital_id, product_code) hash'iyle SHARD_COUNT
+parçaya bölünür, her parçanın sahipliği PostgreSQL advisory lock ile tutulur.
+Aynı komut birden fazla host'ta çalıştırılabilir; bir worker ölünce oturumu kapanır,
+kilitleri düşer ve kalan worker'lar bir sonraki rebalance'ta parçaları devralır.
+
+Kullanım:
+    python stock_monitor/monitor.py --mode sharded --workers 4 --consume
+"""
+import math
+import multiprocessing
+import os
+import sys
+import time
+import uuid
+import zlib
+from datetime import date, datetime
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
+import batch_monitor
+import db_pool
+from simulation import simulate_consumption
+
+
+THRESHOLD = batch_monitor.THRESHOLD
+
+SHARD_COUNT = int(os.getenv('MONITOR_SHARD_COUNT', '64'))
+REBALANCE_INTERVAL = float(os.getenv('MONITOR_REBALANCE_INTERVAL', '5'))
+# pg_try_advisory_lock(LOCK_NAMESPACE, shard): diğer advisory lock kullanıcılarıyla çakışmasın
+LOCK_NAMESPACE = 4644
+WORKER_APP_NAME = 'stock_monitor_shard_worker'
+
+# Host çökmesinde kilitler TCP keepalive ile en geç ~30 sn'de düşer
+SESSION_KEEPALIVES = {'keepalives': 1, 'keepalives_idle': 10,
+                      'keepalives_interval': 5, 'keepalives_count': 4}
+
+# Shard'ı PostgreSQL hesaplar; tüm host'lar aynı fonksiyonu kullandığı için tutarlıdır
+SHARD_FILTER = ("(hashtextextended(s.hospital_id || '/' || s.product_code, 0) & 2147483647) "
+                "%% %(shard_count)s = ANY(%(shards)s)")
+
+LOAD_SHARDS_SQL = f"""
+    SELECT s.id, s.hospital_id, s.product_code, s.current_stock_units,
+           s.daily_consumption_units, s.reorder_threshold
+    FROM stock s
+    WHERE {SHARD_FILTER}
+    ORDER BY s.id
+"""
+
+CONSUME_SHARDS_SQL = """
+    WITH c AS (
+        SELECT * FROM unnest(%(ids)s::int[], %(units)s::int[], %(opening)s::int[])
+            AS c(id, units, opening_stock)
+    ),
+    upd AS (
+        UPDATE stock s
+        SET current_stock_units = GREATEST(0, s.current_stock_units - c.units),
+            days_of_supply = CASE
+                WHEN s.daily_consumption_units > 0
+                THEN ROUND(GREATEST(0, s.current_stock_units - c.units)::numeric
+                           / s.daily_consumption_units, 2)
+                ELSE 0
+            END,
+            last_updated = NOW()
+        FROM c
+        WHERE s.id = c.id
+        RETURNING s.id, s.hospital_id, s.product_code, c.units, c.opening_stock,
+                  s.current_stock_units, s.daily_consumption_units, s.reorder_threshold
+    ),
+    hist AS (
+        INSERT INTO consumption_history
+        (hospital_id, product_code, consumption_date, units_consumed,
+         opening_stock, closing_stock, day_of_week, is_weekend)
+        SELECT hospital_id, product_code, %(consumption_date)s, units,
+               opening_stock, current_stock_units, %(day_of_week)s, %(is_weekend)s
+        FROM upd
+    )
+    SELECT hospital_id, product_code, current_stock_units, daily_consumption_units, reorder_threshold
+    FROM upd
+    ORDER BY id
+"""
+
+
+def fair_share(shard_count, workers):
+    """Worker başına düşen en fazla shard sayısı"""
+    return math.ceil(shard_count / max(workers, 1))
+
+
+def shard_order(worker_id, shard_count):
+    """Worker'a özel başlangıçlı shard sırası (kilit yarışını azaltır)"""
+    start = zlib.crc32(worker_id.encode()) % shard_count
+    return [(start + i) % shard_count for i in range(shard_count)]
+
+
+class ShardCoordinator:
+    """Advisory lock'larla shard sahipliği; sahiplik oturuma bağlı olduğu için ölen worker'ın kilitleri düşer"""
+
+    def __init__(self, worker_id=None, shard_count=SHARD_COUNT, connect=None):
+        self.worker_id = worker_id or f"{os.uname().nodename}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.shard_count = shard_count
+        self.connect = connect or (lambda: db_pool.connect_direct(
+            autocommit=True, application_name=WORKER_APP_NAME, **SESSION_KEEPALIVES))
+        self.conn = None
+        self.owned = set()
+
+    def _session(self):
+        if self.conn is None or self.conn.closed:
+            # Yeni oturumda eski kilitlerin hiçbiri yoktur
+            self.conn = self.connect()
+            self.owned = set()
+        return self.conn
+
+    def live_workers(self):
+        """Veritabanına bağlı (tüm host'lardaki) worker sayısı"""
+        cursor = self._session().cursor()
+        cursor.execute("""
+            SELECT count(*) FROM pg_stat_activity
+            WHERE application_name = %s AND datname = current_database()
+        """, (WORKER_APP_NAME,))
+        count = cursor.fetchone()[0]
+        cursor.close()
+        return count
+
+    def held_shards(self):
+        """Oturumun gerçekte tuttuğu shard kilitleri (pg_locks)"""
+        cursor = self._session().cursor()
+        cursor.execute("""
+            SELECT objid::int FROM pg_locks
+            WHERE locktype = 'advisory' AND pid = pg_backend_pid()
+              AND classid = %s AND objsubid = 2
+        """, (LOCK_NAMESPACE,))
+        held = {row[0] for row in cursor.fetchall()}
+        cursor.close()
+        return held
+
+    def rebalance(self):
+        """Adil paya göre shard bırak/al; sahip olunan shard'ları döndür"""
+        try:
+            target = fair_share(self.shard_count, self.live_workers())
+            self.owned = self.held_shards()
+            cursor = self.conn.cursor()
+
+            # Fazla shard'ları bırak (yeni katılan worker'lar alabilsin)
+            for shard in sorted(self.owned)[target:]:
+                cursor.execute("SELECT pg_advisory_unlock(%s, %s)", (LOCK_NAMESPACE, shard))
+                self.owned.discard(shard)
+
+            # Eksikse boştaki shard'ları dene (ölen worker'ın kilitleri düşmüştür)
+            for shard in shard_order(self.worker_id, self.shard_count):
+                if len(self.owned) >= target:
+                    break
+                if shard in self.owned:
+                    continue
+                cursor.execute("SELECT pg_try_advisory_lock(%s, %s)", (LOCK_NAMESPACE, shard))
+                if cursor.fetchone()[0]:
+                    self.owned.add(shard)
+            cursor.close()
+        except Exception as e:
+            print(f"⚠️  [{self.worker_id}] Shard oturumu koptu, kilitler bırakıldı: {e}")
+            self.close()
+        return sorted(self.owned)
+
+    def close(self):
+        if self.conn is not None and not self.conn.closed:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+        self.conn = None
+        self.owned = set()
+
+
+def load_shard_snapshot(conn, shards, shard_count=SHARD_COUNT, for_update=False):
+    """Sahip olunan shard'lardaki SKU'ları yükle (id'lerle birlikte)"""
+    cursor = conn.cursor()
+    cursor.execute(LOAD_SHARDS_SQL + (" FOR UPDATE" if for_update else ""),
+                   {'shards': list(shards), 'shard_count': shard_count})
+    rows = cursor.fetchall()
+    cursor.close()
+    ids = np.array([r[0] for r in rows], dtype=np.int64)
+    return ids, batch_monitor.snapshot_from_rows([r[1:] for r in rows])
+
+
+def consume_shards(conn, shards, shard_count=SHARD_COUNT, on_date=None, rng=None):
+    """Sahip olunan SKU'lar için tüketimi simüle et; stok düşümü + history tek ifadede"""
+    on_date = on_date or date.today()
+    ids, snapshot = load_shard_snapshot(conn, shards, shard_count, for_update=True)
+    if ids.size == 0:
+        return snapshot
+
+    units = simulate_consumption(snapshot['daily_consumption'], 1, 1, on_date, rng)[0, 0]
+    cursor = conn.cursor()
+    cursor.execute(CONSUME_SHARDS_SQL, {
+        'ids': ids.tolist(),
+        'units': units.tolist(),
+        'opening': snapshot['current_stock'].tolist(),
+        'consumption_date': on_date,
+        'day_of_week': on_date.strftime('%A'),
+        'is_weekend': on_date.weekday() >= 5
+    })
+    rows = cursor.fetchall()
+    cursor.close()
+    return batch_monitor.snapshot_from_rows(rows)
+
+
+def run_shard_cycle(shards, shard_count=SHARD_COUNT, dispatch=None, default_threshold=THRESHOLD,
+                    alert_state=None, consume=False, rng=None):
+    """Sahip olunan shard'lar için bir monitor döngüsü"""
+    if not shards:
+        return {'skus': 0, 'breached': 0, 'rows': []}
+
+    with db_pool.connection() as conn:
+        try:
+            if consume:
+                snapshot = consume_shards(conn, shards, shard_count, rng=rng)
+            else:
+                _, snapshot = load_shard_snapshot(conn, shards, shard_count)
+            evaluation = batch_monitor.evaluate_snapshot(snapshot, default_threshold)
+            # record_evaluation commit eder: tüketim ve alert'ler aynı transaction'da
+            rows = batch_monitor.record_evaluation(conn, snapshot, evaluation, alert_state)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    if dispatch is not None:
+        for row in rows:
+            dispatch(row)
+
+    return {'skus': len(snapshot['product_code']), 'breached': len(rows), 'rows': rows}
+
+
+def run_shard_worker(worker_id=None, dispatch=None, interval=10, default_threshold=THRESHOLD,
+                     shard_count=SHARD_COUNT, consume=False, use_alert_state=True,
+                     rebalance_interval=REBALANCE_INTERVAL):
+    """Tek worker döngüsü: periyodik rebalance + sahip olunan shard'ları izle"""
+    from alert_state import AlertStateMachine
+
+    coordinator = ShardCoordinator(worker_id, shard_count)
+    alert_state = AlertStateMachine() if use_alert_state else None
+    rng = np.random.default_rng()
+    shards = []
+    next_rebalance = 0.0
+    iteration = 0
+
+    print(f" Worker {coordinator.worker_id} başladı ({shard_count} shard)")
+
+    while True:
+        try:
+            now = time.monotonic()
+            if now >= next_rebalance:
+                previous = shards
+                shards = coordinator.rebalance()
+                next_rebalance = now + rebalance_interval
+                if shards != previous:
+                    print(f" [{coordinator.worker_id}] Shard'lar: {len(shards)} "
+                          f"(+{len(set(shards) - set(previous))} / -{len(set(previous) - set(shards))})")
+                    # Devralınan SKU'ların açık alert'leri başka worker'da oluşmuş olabilir
+                    if alert_state is not None:
+                        with db_pool.connection() as conn:
+                            alert_state.restore(conn)
+
+            iteration += 1
+            start = time.perf_counter()
+            summary = run_shard_cycle(shards, shard_count, dispatch, default_threshold,
+                                      alert_state, consume, rng)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            print(f" [{coordinator.worker_id}] #{iteration} {datetime.now().strftime('%H:%M:%S')} "
+                  f"| SKU: {summary['skus']} | Aşım: {summary['breached']} | {elapsed_ms:.1f}ms")
+            time.sleep(interval)
+        except KeyboardInterrupt:
+            break
+        except Exception as e:
+            print(f" [{coordinator.worker_id}] Beklenmeyen hata: {e}")
+            time.sleep(interval)
+
+    coordinator.close()
+
+
+def run_sharded_monitor(workers=None, dispatch=None, interval=10, default_threshold=THRESHOLD,
+                        shard_count=SHARD_COUNT, consume=False):
+    """Yerel worker process'lerini başlat; ölen worker'ı yeniden başlat"""
+    workers = workers or os.cpu_count() or 1
+
+    print("=" * 60)
+    print(f" Sharded Monitor - {workers} worker, {shard_count} shard")
+    print("=" * 60)
+    print(" Diğer host'lardaki worker'larla advisory lock üzerinden paylaşılır")
+    print(" Ctrl+C ile durdurun")
+    print("=" * 60)
+
+    def start(slot):
+        process = multiprocessing.Process(
+            target=run_shard_worker,
+            kwargs={'dispatch': dispatch, 'interval': interval,
+                    'default_threshold': default_threshold, 'shard_count': shard_count,
+                    'consume': consume},
+            name=f"shard-worker-{slot}", daemon=True
+        )
+        process.start()
+        return process
+
+    processes = [start(slot) for slot in range(workers)]
+    try:
+        while True:
+            time.sleep(1)
+            for slot, process in enumerate(processes):
+                if not process.is_alive():
+                    # Kilitleri oturumla birlikte düştü; diğerleri devralır, yenisi payını geri alır
+                    print(f"⚠️  {process.name} durdu (exit={process.exitcode}), yeniden başlatılıyor")
+                    processes[slot] = start(slot)
+    except KeyboardInterrupt:
+        print("\n\n Program sonlandırılıyor...")
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join(timeout=5)
@@ -0,0 +1,195 @@
+"""
+Offline Monte-Carlo stok tükenme simülasyonu.
+
+simulate_daily_consumption ile aynı tüketim modelini (±%15 varyasyon, %5 olasılıkla
+×1.5 spike, hafta sonu ×0.7) N trajectory × D gün × K SKU için NumPy dizileriyle çalıştırır.
+
+Kullanım:
+    python stock_monitor/simulation.py --trajectories 100000 --days 30
+    python stock_monitor/simulation.py --from-db --lead-time 3 --service-level 0.95
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+
+THRESHOLD = 2.0
+VARIATION = 0.15
+SPIKE_PROBABILITY = 0.05
+SPIKE_FACTOR = 1.5
+WEEKEND_FACTOR = 0.7
+
+# Bir chunk'ta üretilecek maksimum rastgele sayı (bellek sınırı)
+MAX_CHUNK_ELEMENTS = 4_000_000
+
+
+def weekend_mask(days, start_date=None):
+    """Simülasyon günleri için hafta sonu maskesi (D,)"""
+    start_date = start_date or date.today()
+    weekdays = (start_date.weekday() + np.arange(days)) % 7
+    return weekdays >= 5
+
+
+def simulate_consumption(base_consumption, trajectories, days, start_date=None, rng=None):
+    """Tüketim matrisi üret: (trajectories, days, K) int64"""
+    rng = rng if rng is not None else np.random.default_rng()
+    base = np.atleast_1d(np.asarray(base_consumption, dtype=np.float64))
+    shape = (trajectories, days, base.size)
+
+    consumption = base * (1 + rng.uniform(-VARIATION, VARIATION, size=shape))
+    consumption *= np.where(rng.random(size=shape) < SPIKE_PROBABILITY, SPIKE_FACTOR, 1.0)
+    consumption *= np.where(weekend_mask(days, start_date), WEEKEND_FACTOR, 1.0)[None, :, None]
+
+    # int(consumption) ile aynı: pozitif değerlerde sıfıra doğru kesme
+    return np.trunc(consumption).astype(np.int64)
+
+
+def _first_day(mask, days):
+    """Her (trajectory, SKU) için maskenin ilk True olduğu gün (1..D), yoksa NaN"""
+    hit = mask.any(axis=1)
+    first = mask.argmax(axis=1).astype(np.float64) + 1
+    first[~hit] = np.nan
+    return first
+
+
+def run_simulation(initial_stock, base_consumption, trajectories=100_000, days=30,
+                   threshold=THRESHOLD, start_date=None, seed=None):
+    """N×D×K Monte-Carlo simülasyonu; SKU başına stok tükenme/eşik istatistikleri"""
+    rng = np.random.default_rng(seed)
+    initial = np.atleast_1d(np.asarray(initial_stock, dtype=np.int64))
+    base = np.atleast_1d(np.asarray(base_consumption, dtype=np.float64))
+    thresholds = np.broadcast_to(np.asarray(threshold, dtype=np.float64), base.shape)
+    skus = base.size
+
+    chunk = max(1, MAX_CHUNK_ELEMENTS // (days * skus))
+    time_to_stockout = np.empty((trajectories, skus))
+    time_to_threshold = np.empty((trajectories, skus))
+    final_stock = np.empty((trajectories, skus), dtype=np.int64)
+
+    for offset in range(0, trajectories, chunk):
+        n = min(chunk, trajectories - offset)
+        consumption = simulate_consumption(base, n, days, start_date, rng)
+        stock = np.maximum(initial - np.cumsum(consumption, axis=1), 0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            days_of_supply = np.where(base > 0, stock / base, np.inf)
+
+        time_to_stockout[offset:offset + n] = _first_day(stock == 0, days)
+        time_to_threshold[offset:offset + n] = _first_day(days_of_supply < thresholds, days)
+        final_stock[offset:offset + n] = stock[:, -1, :]
+
+    return {
+        'trajectories': trajectories,
+        'days': days,
+        'threshold': thresholds.copy(),
+        'initial_stock': initial,
+        'base_consumption': base,
+        'time_to_stockout': time_to_stockout,
+        'time_to_threshold': time_to_threshold,
+        'final_stock': final_stock
+    }
+
+
+def summarize(result, percentiles=(5, 50, 95)):
+    """SKU başına stok tükenme olasılığı ve eşiğe ulaşma süresi dağılımı"""
+    summaries = []
+    for k in range(result['base_consumption'].size):
+        stockout = result['time_to_stockout'][:, k]
+        to_threshold = result['time_to_threshold'][:, k]
+        reached = to_threshold[~np.isnan(to_threshold)]
+
+        summaries.append({
+            'initial_stock': int(result['initial_stock'][k]),
+            'base_consumption': float(result['base_consumption'][k]),
+            'threshold': float(result['threshold'][k]),
+            'stockout_probability': float(np.mean(~np.isnan(stockout))),
+            'threshold_probability': float(reached.size / to_threshold.size),
+            'time_to_threshold': {
+                f'p{p}': float(np.percentile(reached, p)) if reached.size else None
+                for p in percentiles
+            },
+            'mean_final_stock': float(result['final_stock'][:, k].mean())
+        })
+    return summaries
+
+
+def recommend_threshold(base_consumption, lead_time_days, service_level=0.95,
+                        trajectories=100_000, start_date=None, seed=None):
+    """Tedarik süresi boyunca stok tükenmemesi için gereken days-of-supply eşiği"""
+    rng = np.random.default_rng(seed)
+    base = np.atleast_1d(np.asarray(base_consumption, dtype=np.float64))
+    consumption = simulate_consumption(base, trajectories, lead_time_days, start_date, rng)
+    lead_time_demand = consumption.sum(axis=1)
+    required_units = np.quantile(lead_time_demand, service_level, axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(base > 0, required_units / base, 0.0)
+
+
+def _load_skus_from_db():
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
+    import batch_monitor
+    import db_pool
+
+    with db_pool.connection() as conn:
+        snapshot = batch_monitor.load_stock_snapshot(conn)
+    thresholds = np.where(np.isnan(snapshot['reorder_threshold']), THRESHOLD,
+                          snapshot['reorder_threshold'])
+    labels = [f"{h}/{p}" for h, p in zip(snapshot['hospital_id'], snapshot['product_code'])]
+    return labels, snapshot['current_stock'], snapshot['daily_consumption'], thresholds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Monte-Carlo stockout simulator')
+    parser.add_argument('--trajectories', type=int, default=100_000)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--stock', type=int, default=200, help='başlangıç stoku (tek SKU)')
+    parser.add_argument('--consumption', type=float, default=79, help='günlük baz tüketim (tek SKU)')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    parser.add_argument('--from-db', action='store_true', help='tüm stock satırlarını simüle et')
+    parser.add_argument('--lead-time', type=int, default=0,
+                        help='>0 ise bu tedarik süresi için önerilen eşiği de hesapla')
+    parser.add_argument('--service-level', type=float, default=0.95)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.from_db:
+        labels, stock, consumption, threshold = _load_skus_from_db()
+    else:
+        labels = ['Hospital-C/PHYSIO-SALINE-500ML']
+        stock, consumption, threshold = [args.stock], [args.consumption], args.threshold
+
+    start = time.perf_counter()
+    result = run_simulation(stock, consumption, args.trajectories, args.days,
+                            threshold=threshold, seed=args.seed)
+    elapsed = time.perf_counter() - start
+
+    recommended = None
+    if args.lead_time > 0:
+        recommended = recommend_threshold(consumption, args.lead_time, args.service_level,
+                                          args.trajectories, seed=args.seed)
+
+    print("=" * 70)
+    print(f" Monte-Carlo: {args.trajectories} trajectory × {args.days} gün × {len(labels)} SKU "
+          f"({elapsed:.2f}s)")
+    print("=" * 70)
+    for k, (label, summary) in enumerate(zip(labels, summarize(result))):
+        ttt = summary['time_to_threshold']
+        print(f"\n{label}")
+        print(f"  Stok: {summary['initial_stock']} | Tüketim: {summary['base_consumption']:.0f}/gün "
+              f"| Eşik: {summary['threshold']:.2f} gün")
+        print(f"  Stok tükenme olasılığı ({args.days} gün): {summary['stockout_probability'] * 100:.2f}%")
+        print(f"  Eşiğe ulaşma olasılığı: {summary['threshold_probability'] * 100:.2f}%")
+        print(f"  Eşiğe ulaşma günü: p5={ttt['p5']} p50={ttt['p50']} p95={ttt['p95']}")
+        if recommended is not None:
+            print(f"  Önerilen eşik ({args.lead_time} gün tedarik, "
+                  f"%{args.service_level * 100:.0f} servis): {recommended[k]:.2f} gün")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,27 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 import os
 import time
 import json
 from datetime import datetime
 import psycopg2
+from psycopg2.extras import execute_values
 from dotenv import load_dotenv
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import db_pool
+import event_log_writer
+import serving
+from inventory_events import (EVENT_HOSPITAL_IDS, EVENT_VERIFY_STOCK, EVENT_VERIFY_TOLERANCE, PUBLISH_EVENTS_MAX,
+                              StockCache, validate_event, verify_event)
 
 load_dotenv()
 
 app = Flask(__name__)
 
 HOSPITAL_ID = os.getenv('HOSPITAL_ID', 'Hospital-C')
+PRODUCT_CODE = os.getenv('PRODUCT_CODE', 'PHYSIO-SALINE-500ML')
 DB_HOST = os.getenv('DB_HOST', 'localhost')
 DB_PORT = os.getenv('DB_PORT', '5432')
 DB_NAME = os.getenv('DB_NAME', 'hospital_db')
@@ -18,19 +29,46 @@ DB_USER = os.getenv('DB_USER', 'postgres')
 DB_PASSWORD = os.getenv('DB_PASSWORD', 'postgres')
 
 def get_db_connection():
-    """Database bağlantısı"""
+    """Paylaşılan havuzdan database bağlantısı"""
     try:
-        return psycopg2.connect(
-            host=DB_HOST,
-            port=DB_PORT,
-            database=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD
-        )
+        return db_pool.get_connection()
     except Exception as e:
         print(f"❌ DB Error: {e}")
         return None
 
+def release_db_connection(conn):
+    """Bağlantıyı havuza iade et"""
+    db_pool.release_connection(conn)
+
+def load_stock(hospital_id, product_code):
+    """SKU'nun stok satırı: (current_stock_units, daily_consumption_units, days_of_supply) ya da None"""
+    conn = get_db_connection()
+    if not conn:
+        raise RuntimeError('Database connection failed')
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT current_stock_units, daily_consumption_units, days_of_supply
+            FROM stock
+            WHERE hospital_id = %s AND product_code = %s
+        """, (hospital_id, product_code))
+        row = cursor.fetchone()
+        cursor.close()
+        return row
+    finally:
+        release_db_connection(conn)
+
+# Sadece EVENT_VERIFY_STOCK açıkken kullanılır
+stock_cache = StockCache(load_stock)
+
+def insert_event_logs(rows):
+    """event_log satırlarını tek multi-row INSERT ve tek commit ile yaz"""
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        execute_values(cursor, event_log_writer.INSERT_SQL, rows, page_size=len(rows))
+        conn.commit()
+        cursor.close()
+
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
@@ -38,56 +76,53 @@ def health():
         'status': 'UP',
         'service': 'StockMS',
         'hospital': HOSPITAL_ID,
-        'timestamp': time.time()
+        'timestamp': time.time(),
+        'eventLog': event_log_writer.stats(),
+        'stockCache': dict(stock_cache.stats(), enabled=EVENT_VERIFY_STOCK)
     })
 
 @app.route('/publish-event', methods=['POST'])
 def publish_event():
-    """Simulated event publisher"""
+    """InventoryLow event'ini yayınla: gönderilen payload doğrulanıp olduğu gibi kullanılır"""
     start_time = datetime.now()
     
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT current_stock_units, daily_consumption_units, days_of_supply
-            FROM stock
-            WHERE hospital_id = %s
-        """, (HOSPITAL_ID,))
-        
-        result = cursor.fetchone()
-        if not result:
-            return jsonify({'error': 'Stock not found'}), 404
-        
-        event = {
-            'eventId': f'EVT-{int(time.time())}',
-            'eventType': 'InventoryLow',
-            'hospitalId': HOSPITAL_ID,
-            'productCode': 'PHYSIO-SALINE-500ML',
-            'currentStockUnits': result[0],
-            'dailyConsumptionUnits': result[1],
-            'daysOfSupply': float(result[2]),
-            'threshold': 2.0,
-            'timestamp': datetime.now().isoformat()
-        }
+        if not request.get_data():
+            # Gövdesiz eski çağrı: event stock satırından kurulur
+            result = load_stock(HOSPITAL_ID, PRODUCT_CODE)
+            if not result:
+                return jsonify({'error': 'Stock not found'}), 404
+            event = {
+                'eventId': f'EVT-{int(time.time())}',
+                'eventType': 'InventoryLow',
+                'hospitalId': HOSPITAL_ID,
+                'productCode': PRODUCT_CODE,
+                'currentStockUnits': result[0],
+                'dailyConsumptionUnits': result[1],
+                'daysOfSupply': float(result[2]),
+                'threshold': 2.0,
+                'timestamp': datetime.now().isoformat()
+            }
+        else:
+            event = request.get_json(force=True, silent=True)
+            if event is None:
+                return jsonify({'error': 'Invalid JSON'}), 400
+            errors = validate_event(event, EVENT_HOSPITAL_IDS)
+            if errors:
+                return jsonify({'error': 'Invalid InventoryLowEvent', 'details': errors}), 400
+            if EVENT_VERIFY_STOCK:
+                mismatch = verify_event(event, stock_cache, EVENT_VERIFY_TOLERANCE)
+                if mismatch:
+                    status, message = mismatch
+                    return jsonify({'error': message}), status
         
         # Latency hesapla
         end_time = datetime.now()
         latency_ms = int((end_time - start_time).total_seconds() * 1000)
         
-        # Log event (latency ile)
-        cursor.execute("""
-            INSERT INTO event_log 
-            (event_type, direction, architecture, payload, status, latency_ms)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, ('INVENTORY_LOW_EVENT', 'OUTGOING', 'SERVERLESS', json.dumps(event), 'SUCCESS', latency_ms))
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
+        # Log event (latency ile); arka plan writer'ı toplu yazar, istek commit beklemez
+        event_log_writer.log_event('INVENTORY_LOW_EVENT', 'OUTGOING', 'SERVERLESS',
+                                   json.dumps(event), 'SUCCESS', latency_ms=latency_ms)
         
         print(f"✅ Event published: {event['eventId']} (Latency: {latency_ms}ms)")
         
@@ -100,6 +135,59 @@ def publish_event():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/publish-events', methods=['POST'])
+def publish_events():
+    """InventoryLow event dizisini yayınla: tek doğrulama geçişi, tek INSERT, event başına sonuç"""
+    start_time = datetime.now()
+    
+    try:
+        events = request.get_json(force=True, silent=True)
+        if isinstance(events, dict):
+            events = events.get('events')
+        if not isinstance(events, list) or not events:
+            return jsonify({'error': 'Expected a non-empty JSON array of InventoryLowEvent'}), 400
+        if len(events) > PUBLISH_EVENTS_MAX:
+            return jsonify({'error': f'Too many events: {len(events)} > {PUBLISH_EVENTS_MAX}'}), 413
+        
+        results = []
+        accepted = []
+        for index, event in enumerate(events):
+            result = {'index': index, 'eventId': event.get('eventId') if isinstance(event, dict) else None}
+            errors = validate_event(event, EVENT_HOSPITAL_IDS)
+            mismatch = None
+            if not errors and EVENT_VERIFY_STOCK:
+                mismatch = verify_event(event, stock_cache, EVENT_VERIFY_TOLERANCE)
+            if errors:
+                result.update(success=False, status=400, error='Invalid InventoryLowEvent', details=errors)
+            elif mismatch:
+                status, message = mismatch
+                result.update(success=False, status=status, error=message)
+            else:
+                result['success'] = True
+                accepted.append(event)
+            results.append(result)
+        
+        latency_ms = int((datetime.now() - start_time).total_seconds() * 1000)
+        
+        # Geçerli event'ler tek istekte, tek commit ile loglanır
+        if accepted:
+            insert_event_logs([('INVENTORY_LOW_EVENT', 'OUTGOING', 'SERVERLESS', json.dumps(event),
+                                'SUCCESS', None, latency_ms) for event in accepted])
+        
+        failed = len(events) - len(accepted)
+        print(f"✅ Events published: {len(accepted)}/{len(events)} (Latency: {latency_ms}ms)")
+        
+        return jsonify({
+            'success': failed == 0,
+            'published': len(accepted),
+            'failed': failed,
+            'results': results,
+            'latency_ms': latency_ms
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/', methods=['GET'])
 def home():
     return jsonify({
@@ -110,4 +198,4 @@ def home():
 
 if __name__ == '__main__':
     print(f"🚀 StockMS starting for {HOSPITAL_ID}...")
-    app.run(host='0.0.0.0', port=8086, debug=True)
\ No newline at end of file
+    serving.serve(app, 'StockMS', int(os.getenv('STOCKMS_PORT', '8081')))
\ No newline at end of file
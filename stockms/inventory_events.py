@@ -0,0 +1,133 @@
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Gelen event'i stock tablosuna karşı doğrula (kapalıyken payload olduğu gibi yayınlanır, DB okunmaz)
+EVENT_VERIFY_STOCK = os.getenv('EVENT_VERIFY_STOCK', 'false').lower() == 'true'
+# Doğrulama için stok satırları bu kadar saniye bellekte tutulur
+STOCK_CACHE_TTL = float(os.getenv('STOCK_CACHE_TTL', '5'))
+# Gönderilen currentStockUnits ile DB arasındaki kabul edilen fark (birim)
+EVENT_VERIFY_TOLERANCE = int(os.getenv('EVENT_VERIFY_TOLERANCE', '5'))
+# /publish-events isteğinde kabul edilen en fazla event
+PUBLISH_EVENTS_MAX = int(os.getenv('PUBLISH_EVENTS_MAX', '1000'))
+# Virgülle ayrılmış hastane listesi; boşsa desene uyan her hospitalId kabul edilir
+EVENT_HOSPITAL_IDS = tuple(h.strip() for h in os.getenv('EVENT_HOSPITAL_IDS', '').split(',') if h.strip())
+
+EVENT_TYPE = 'InventoryLow'
+# contracts/schemas/InventoryLowEvent.schema.json alanları
+EVENT_FIELDS = ('eventId', 'eventType', 'hospitalId', 'productCode', 'currentStockUnits',
+                'dailyConsumptionUnits', 'daysOfSupply', 'threshold', 'timestamp')
+EVENT_ID_PATTERN = re.compile(r'^[a-zA-Z0-9-]+$')
+# Şemada ^[A-Z0-9-]+$; kendi kimliklerimiz (Hospital-C) küçük harf içerdiği için büyük/küçük harf serbest
+HOSPITAL_ID_PATTERN = re.compile(r'^[A-Za-z0-9-]+$')
+PRODUCT_CODE_PATTERN = re.compile(r'^[A-Z0-9-]+$')
+
+
+def _is_integer(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_event(event, hospital_ids=()):
+    """
+    InventoryLowEvent sözleşmesine göre hata listesi döndür (boş liste = geçerli).
+    hospital_ids verilirse hospitalId bunlardan biri olmalı.
+    """
+    if not isinstance(event, dict):
+        return ['event must be a JSON object']
+
+    errors = [f'missing field: {field}' for field in EVENT_FIELDS if field not in event]
+    errors += [f'unknown field: {field}' for field in event if field not in EVENT_FIELDS]
+
+    event_id = event.get('eventId')
+    if 'eventId' in event and not (isinstance(event_id, str) and EVENT_ID_PATTERN.match(event_id)):
+        errors.append('eventId must match ^[a-zA-Z0-9-]+$')
+    if 'eventType' in event and event['eventType'] != EVENT_TYPE:
+        errors.append(f'eventType must be {EVENT_TYPE}')
+    hospital_id = event.get('hospitalId')
+    if 'hospitalId' in event and not (isinstance(hospital_id, str) and HOSPITAL_ID_PATTERN.match(hospital_id)):
+        errors.append('hospitalId must match ^[A-Za-z0-9-]+$')
+    elif hospital_ids and 'hospitalId' in event and hospital_id not in hospital_ids:
+        errors.append(f"hospitalId must be one of {', '.join(hospital_ids)}")
+    product_code = event.get('productCode')
+    if 'productCode' in event and not (isinstance(product_code, str) and PRODUCT_CODE_PATTERN.match(product_code)):
+        errors.append('productCode must match ^[A-Z0-9-]+$')
+
+    for field in ('currentStockUnits', 'dailyConsumptionUnits'):
+        if field in event and not (_is_integer(event[field]) and event[field] >= 0):
+            errors.append(f'{field} must be a non-negative integer')
+    for field in ('daysOfSupply', 'threshold'):
+        if field in event and not (_is_number(event[field]) and event[field] >= 0):
+            errors.append(f'{field} must be a non-negative number')
+
+    if 'timestamp' in event:
+        try:
+            datetime.fromisoformat(event['timestamp'])
+        except (TypeError, ValueError):
+            errors.append('timestamp must be an ISO8601 date-time')
+    return errors
+
+
+class StockCache:
+    """(hospital_id, product_code) → stok satırı; TTL dolana kadar DB'ye gitmeden döner"""
+
+    def __init__(self, loader, ttl=STOCK_CACHE_TTL, clock=time.monotonic):
+        self._loader = loader
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, hospital_id, product_code, refresh=False):
+        """Satırı döndür (yoksa None; bulunamayan SKU da TTL boyunca tutulur)"""
+        key = (hospital_id, product_code)
+        with self._lock:
+            entry = self._entries.get(key)
+            if not refresh and entry is not None and self._clock() - entry[0] < self.ttl:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        row = self._loader(hospital_id, product_code)
+        with self._lock:
+            self._entries[key] = (self._clock(), row)
+        return row
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries), 'ttl': self.ttl}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def verify_event(event, cache, tolerance=EVENT_VERIFY_TOLERANCE):
+    """
+    Event'i stok satırıyla karşılaştır: uyuşuyorsa None, değilse (HTTP durum, mesaj).
+    Cache'teki değer toleransın dışındaysa red etmeden önce satır DB'den tazelenir.
+    """
+    hospital_id, product_code = event['hospitalId'], event['productCode']
+    stock_units = event['currentStockUnits']
+
+    row = cache.get(hospital_id, product_code)
+    if row is None or abs(row[0] - stock_units) > tolerance:
+        row = cache.get(hospital_id, product_code, refresh=True)
+    if row is None:
+        return 404, f'Stock not found: {hospital_id}/{product_code}'
+    if abs(row[0] - stock_units) > tolerance:
+        return 409, f'currentStockUnits {stock_units} does not match stock ({row[0]})'
+    return None
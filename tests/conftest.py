@@ -0,0 +1,12 @@
+import sys
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def reset_soap_breaker():
+    """SOAP circuit breaker process genelinde tek; testler birbirinin hata geçmişini görmesin"""
+    yield
+    client = sys.modules.get('soap_client.client')
+    if client is not None:
+        client.soap_breaker.reset()
+
@@ -0,0 +1,218 @@
+import sys
+import os
+from unittest.mock import MagicMock
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from stock_monitor.alert_state import (
+    AlertStateMachine, apply_transitions, acknowledge_alert,
+    OK, LOW, CRITICAL, ACKNOWLEDGED
+)
+from stock_monitor import batch_monitor
+
+KEY = ('Hospital-C', 'PHYSIO-SALINE-500ML')
+
+
+def stock(days_of_supply):
+    return {'current_stock': int(days_of_supply * 100), 'daily_consumption': 100,
+            'days_of_supply': days_of_supply}
+
+
+def step(sm, days_of_supply, threshold=2.0, alert_id=1):
+    transition = sm.evaluate(KEY, stock(days_of_supply), threshold)
+    if transition is not None:
+        sm.commit(transition, alert_id)
+    return transition
+
+
+def make_conn(alert_ids=()):
+    conn = MagicMock()
+    cursor = MagicMock()
+    cursor.fetchall.return_value = [(i,) for i in alert_ids]
+    conn.cursor.return_value = cursor
+    return conn, cursor
+
+
+# =========================
+# STATE TRANSITIONS
+# =========================
+
+def test_no_transition_while_ok():
+    sm = AlertStateMachine(hysteresis_days=0.5)
+    assert step(sm, 5.0) is None
+    assert sm.state(KEY) == OK
+
+
+def test_escalation_dispatches_once():
+    sm = AlertStateMachine(hysteresis_days=0.5)
+    first = step(sm, 1.8)
+    assert first['to'] == LOW and first['dispatch'] is True
+    assert step(sm, 1.7) is None
+    assert step(sm, 1.6) is None
+
+    critical = step(sm, 0.8, alert_id=2)
+    assert critical['to'] == CRITICAL and critical['dispatch'] is True
+    assert critical['resolve_alert_id'] == 1
+    assert critical['alert_type'] == 'CRITICAL_STOCK'
+
+
+def test_hysteresis_prevents_flapping_around_threshold():
+    sm = AlertStateMachine(hysteresis_days=0.5)
+    step(sm, 1.9)
+    for dos in (2.1, 1.95, 2.3, 1.99, 2.4):
+        assert step(sm, dos) is None
+    assert sm.state(KEY) == LOW
+
+    resolved = step(sm, 2.6)
+    assert resolved['to'] == OK and resolved['dispatch'] is False
+    assert sm.state(KEY) == OK
+
+
+def test_deescalation_critical_to_low_not_dispatched():
+    sm = AlertStateMachine(hysteresis_days=0.5)
+    step(sm, 0.5)
+    assert step(sm, 1.2) is None
+    transition = step(sm, 1.6)
+    assert transition['to'] == LOW and transition['dispatch'] is False
+
+
+def test_acknowledged_state_cleared_on_escalation():
+    sm = AlertStateMachine(hysteresis_days=0.5)
+    step(sm, 1.5, alert_id=7)
+    assert sm.acknowledge(KEY) == 7
+    assert sm.state(KEY) == ACKNOWLEDGED
+    assert step(sm, 1.4) is None
+
+    step(sm, 0.5, alert_id=8)
+    assert sm.state(KEY) == CRITICAL
+
+
+# =========================
+# PERSISTENCE
+# =========================
+
+def test_restore_from_open_alerts():
+    conn, cursor = make_conn()
+    cursor.fetchall.return_value = [
+        (10, 'Hospital-C', 'PHYSIO-SALINE-500ML', 'CRITICAL_STOCK', False),
+        (11, 'Hospital-C', 'GLOVES-M', 'LOW_STOCK', True),
+    ]
+    sm = AlertStateMachine()
+    assert sm.restore(conn) == 2
+    assert sm.state(KEY) == CRITICAL
+    assert sm.state(('Hospital-C', 'GLOVES-M')) == ACKNOWLEDGED
+    assert "resolved_at IS NULL" in cursor.execute.call_args[0][0]
+
+
+def test_apply_transitions_resolves_and_inserts(monkeypatch):
+    sm = AlertStateMachine(hysteresis_days=0.5)
+    step(sm, 1.5, alert_id=3)
+    transition = sm.evaluate(KEY, stock(0.5), 2.0)
+
+    captured = {}
+
+    def fake_execute_values(cursor, sql, rows, fetch=False):
+        captured['rows'] = rows
+        return [(4,)]
+
+    monkeypatch.setattr("stock_monitor.alert_state.execute_values", fake_execute_values)
+    conn, cursor = make_conn()
+    apply_transitions(conn, sm, [transition])
+
+    assert cursor.execute.call_args[0][1] == ((KEY,),)
+    assert captured['rows'][0][2] == 'CRITICAL_STOCK'
+    conn.commit.assert_called_once()
+    assert sm.states[KEY]['alert_id'] == 4
+
+
+class FakeAlerts:
+    """alerts tablosu yerine: restore SELECT'i, key bazlı resolve UPDATE'i ve execute_values INSERT'i"""
+
+    def __init__(self):
+        self.rows = []
+
+    def add(self, key, alert_type='LOW_STOCK'):
+        self.rows.append({'id': len(self.rows) + 1, 'key': key, 'alert_type': alert_type,
+                          'acknowledged': False, 'resolved': False})
+        return self.rows[-1]['id']
+
+    def connection(self):
+        conn, cursor = make_conn()
+
+        def execute(sql, params=None):
+            if 'DISTINCT ON' in sql:
+                latest = {}
+                for row in self.rows:
+                    if not row['resolved']:
+                        latest[row['key']] = row
+                cursor.fetchall.return_value = [
+                    (r['id'], r['key'][0], r['key'][1], r['alert_type'], r['acknowledged'])
+                    for r in latest.values()]
+            elif 'UPDATE alerts SET resolved_at' in sql:
+                for row in self.rows:
+                    if row['key'] in params[0]:
+                        row['resolved'] = True
+
+        cursor.execute.side_effect = execute
+        return conn
+
+    def insert(self, cursor, sql, rows, fetch=False):
+        return [(self.add((row[0], row[1]), row[2]),) for row in rows]
+
+
+def test_recovery_resolves_every_open_alert_of_the_sku(monkeypatch):
+    """Eski / kopya açık alert'ler de kapanır; restart sonrası restore OK döner"""
+    alerts = FakeAlerts()
+    alerts.add(KEY)
+    alerts.add(KEY)
+    alerts.add(('Hospital-C', 'GLOVES-M'))
+    monkeypatch.setattr("stock_monitor.alert_state.execute_values", alerts.insert)
+
+    sm = AlertStateMachine()
+    assert sm.restore(alerts.connection()) == 2
+    assert sm.state(KEY) == LOW
+
+    apply_transitions(alerts.connection(), sm, [sm.evaluate(KEY, stock(3.0), 2.0)])
+
+    restarted = AlertStateMachine()
+    assert restarted.restore(alerts.connection()) == 1
+    assert restarted.state(KEY) == OK
+    assert restarted.state(('Hospital-C', 'GLOVES-M')) == LOW
+
+
+def test_apply_transitions_empty_is_noop():
+    conn, _ = make_conn()
+    assert apply_transitions(conn, AlertStateMachine(), []) == []
+    conn.cursor.assert_not_called()
+
+
+def test_acknowledge_alert_updates_row():
+    sm = AlertStateMachine()
+    step(sm, 1.5, alert_id=9)
+    conn, cursor = make_conn()
+    assert acknowledge_alert(conn, sm, KEY) is True
+    assert cursor.execute.call_args[0][1] == (9,)
+    assert acknowledge_alert(conn, sm, ('Hospital-C', 'UNKNOWN')) is False
+
+
+# =========================
+# BATCH INTEGRATION
+# =========================
+
+def test_evaluate_transitions_includes_recovering_active_keys():
+    sm = AlertStateMachine(hysteresis_days=0.5)
+    step(sm, 1.5)
+    snapshot = {
+        'hospital_id': np.array(['Hospital-C', 'Hospital-C'], dtype=object),
+        'product_code': np.array(['PHYSIO-SALINE-500ML', 'GLOVES-M'], dtype=object),
+        'current_stock': np.array([500, 10], dtype=np.int64),
+        'daily_consumption': np.array([100, 100], dtype=np.int64),
+        'reorder_threshold': np.array([np.nan, np.nan])
+    }
+    evaluation = batch_monitor.evaluate_snapshot(snapshot)
+    transitions = batch_monitor.evaluate_transitions(snapshot, evaluation, sm)
+
+    by_key = {t['key']: t for t in transitions}
+    assert by_key[KEY]['to'] == OK
+    assert by_key[('Hospital-C', 'GLOVES-M')]['to'] == CRITICAL
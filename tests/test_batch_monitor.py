@@ -0,0 +1,118 @@
+import sys
+import os
+from unittest.mock import MagicMock
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import stock_monitor.batch_monitor as batch_monitor
+
+
+def make_snapshot(stocks, consumptions, thresholds):
+    n = len(stocks)
+    return {
+        'hospital_id': np.array([f'Hospital-{i}' for i in range(n)], dtype=object),
+        'product_code': np.array([f'SKU-{i}' for i in range(n)], dtype=object),
+        'current_stock': np.array(stocks, dtype=np.int64),
+        'daily_consumption': np.array(consumptions, dtype=np.int64),
+        'reorder_threshold': np.array(thresholds, dtype=np.float64)
+    }
+
+
+# =========================
+# DAYS OF SUPPLY
+# =========================
+
+def test_compute_days_of_supply_vectorized():
+    days = batch_monitor.compute_days_of_supply([200, 50, 0], [100, 100, 10])
+    assert days.tolist() == [2.0, 0.5, 0.0]
+
+
+def test_compute_days_of_supply_zero_consumption_is_inf():
+    days = batch_monitor.compute_days_of_supply([100], [0])
+    assert np.isinf(days[0])
+
+
+# =========================
+# EVALUATION
+# =========================
+
+def test_evaluate_snapshot_honors_per_row_threshold():
+    snapshot = make_snapshot([250, 250, 250], [100, 100, 100], [2.0, 3.0, np.nan])
+    evaluation = batch_monitor.evaluate_snapshot(snapshot, default_threshold=2.0)
+    assert evaluation['breach'].tolist() == [False, True, False]
+    assert evaluation['threshold'].tolist() == [2.0, 3.0, 2.0]
+
+
+def test_evaluate_snapshot_severity_bands():
+    snapshot = make_snapshot([50, 150, 250], [100, 100, 100], [5.0, 5.0, 5.0])
+    evaluation = batch_monitor.evaluate_snapshot(snapshot)
+    assert evaluation['severity'].tolist() == ['URGENT', 'HIGH', 'NORMAL']
+    assert evaluation['alert_type'].tolist() == ['CRITICAL_STOCK', 'LOW_STOCK', 'LOW_STOCK']
+
+
+def test_breached_rows_only_returns_breaches():
+    snapshot = make_snapshot([50, 1000], [100, 100], [2.0, 2.0])
+    evaluation = batch_monitor.evaluate_snapshot(snapshot)
+    rows = batch_monitor.breached_rows(snapshot, evaluation)
+    assert len(rows) == 1
+    assert rows[0]['product_code'] == 'SKU-0'
+    assert rows[0]['days_of_supply'] == 0.5
+    assert isinstance(rows[0]['current_stock'], int)
+
+
+# =========================
+# DB HELPERS
+# =========================
+
+def test_load_stock_snapshot_null_threshold():
+    fake_cursor = MagicMock()
+    fake_cursor.fetchall.return_value = [
+        ('Hospital-C', 'PHYSIO-SALINE-500ML', 200, 79, 2.0),
+        ('Hospital-C', 'GLOVES-M', 10, 5, None)
+    ]
+    fake_conn = MagicMock()
+    fake_conn.cursor.return_value = fake_cursor
+
+    snapshot = batch_monitor.load_stock_snapshot(fake_conn)
+    assert snapshot['current_stock'].tolist() == [200, 10]
+    assert np.isnan(snapshot['reorder_threshold'][1])
+
+
+def test_load_stock_snapshot_empty():
+    fake_cursor = MagicMock()
+    fake_cursor.fetchall.return_value = []
+    fake_conn = MagicMock()
+    fake_conn.cursor.return_value = fake_cursor
+
+    snapshot = batch_monitor.load_stock_snapshot(fake_conn)
+    evaluation = batch_monitor.evaluate_snapshot(snapshot)
+    assert batch_monitor.breached_rows(snapshot, evaluation) == []
+
+
+def test_record_alerts_no_rows():
+    fake_conn = MagicMock()
+    assert batch_monitor.record_alerts(fake_conn, []) == 0
+    fake_conn.cursor.assert_not_called()
+
+
+# =========================
+# DISPATCH
+# =========================
+
+def test_run_batch_cycle_dispatch_batch_gets_all_rows_once(monkeypatch):
+    from contextlib import nullcontext
+    snapshot = make_snapshot([10, 500, 15], [10, 10, 10], [2.0, 2.0, 2.0])
+    monkeypatch.setattr(batch_monitor.db_pool, 'connection', lambda: nullcontext(MagicMock()))
+    monkeypatch.setattr(batch_monitor, 'load_stock_snapshot', lambda conn: snapshot)
+    monkeypatch.setattr(batch_monitor, 'record_evaluation',
+                        lambda conn, snap, evaluation, alert_state: batch_monitor.breached_rows(snap, evaluation))
+    dispatch, dispatch_batch = MagicMock(), MagicMock()
+
+    summary = batch_monitor.run_batch_cycle(dispatch=dispatch, dispatch_batch=dispatch_batch)
+
+    assert summary['breached'] == 2
+    dispatch_batch.assert_called_once()
+    assert [r['product_code'] for r in dispatch_batch.call_args.args[0]] == ['SKU-0', 'SKU-2']
+    dispatch.assert_not_called()
@@ -0,0 +1,153 @@
+import sys
+import os
+import time
+from unittest.mock import MagicMock
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from soap_client import client
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    transitions = []
+    b = CircuitBreaker('test', failure_rate=0.5, window=10, min_calls=4, open_seconds=5,
+                       half_open_probes=2, clock=clock,
+                       on_transition=lambda old, new, stats: transitions.append((old, new)))
+    b.seen = transitions
+    return b
+
+
+def trip(breaker):
+    for _ in range(4):
+        breaker.record_failure()
+
+
+# ============ STATE MACHINE TESTS ============
+
+def test_stays_closed_below_min_calls(breaker):
+    """min_calls dolmadan oran ne olursa olsun açılmaz"""
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_opens_at_failure_rate(breaker):
+    """Penceredeki hata oranı eşiğe ulaşınca OPEN"""
+    breaker.record_success()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.seen == [(CLOSED, OPEN)]
+
+
+def test_rolling_window_forgets_old_failures(breaker, clock):
+    """Pencere dışına düşen hatalar oranı etkilemez"""
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now = 11
+    breaker.record_failure()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.stats()['window_calls'] == 2
+
+
+def test_open_rejects_until_timeout_then_probes(breaker, clock):
+    """OPEN reddeder; süre dolunca HALF_OPEN en fazla probe kadar çağrı geçirir"""
+    trip(breaker)
+    assert breaker.allow() is False
+    assert breaker.stats()['rejected'] == 1
+
+    clock.now = 5
+    assert breaker.allow() is True
+    assert breaker.allow() is True
+    assert breaker.allow() is False
+    assert breaker.state == HALF_OPEN
+
+
+def test_half_open_closes_after_successful_probes(breaker, clock):
+    trip(breaker)
+    clock.now = 5
+    breaker.allow()
+    breaker.allow()
+    breaker.record_success()
+    assert breaker.state == HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.seen == [(CLOSED, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, CLOSED)]
+    assert breaker.stats()['window_calls'] == 0
+
+
+def test_half_open_probe_failure_reopens(breaker, clock):
+    trip(breaker)
+    clock.now = 5
+    breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.allow() is False
+    assert breaker.stats()['transitions'] == {OPEN: 2, HALF_OPEN: 1, CLOSED: 0}
+
+
+# ============ SOAP CLIENT TESTS ============
+
+STOCK = {'currentStockUnits': 50, 'dailyConsumptionUnits': 79, 'daysOfSupply': 0.63}
+
+
+def test_send_stock_update_short_circuits_when_open(monkeypatch):
+    """Devre açıkken istek, retry ve DB yazımı yok; mikro saniyeler içinde döner"""
+    session = MagicMock()
+    log = MagicMock()
+    monkeypatch.setattr(client, 'get_http_session', lambda: session)
+    monkeypatch.setattr(client, 'log_event', log)
+    for _ in range(client.soap_breaker.min_calls):
+        client.soap_breaker.record_failure()
+    log.reset_mock()
+
+    start = time.perf_counter()
+    result = client.send_stock_update_async(STOCK).result()
+    elapsed = time.perf_counter() - start
+
+    assert result['success'] is False
+    assert result['circuit_open'] is True
+    assert result['attempts'] == 0
+    session.post.assert_not_called()
+    log.assert_not_called()
+    assert elapsed < 0.01
+    assert client.breaker_stats()['rejected'] == 1
+
+
+def test_breaker_transitions_written_to_event_log(monkeypatch):
+    """Hatalar devreyi açar; geçiş event_log'a yazılır ve retry zamanlanmaz"""
+    session = MagicMock()
+    session.post.side_effect = ConnectionError('refused')
+    log = MagicMock()
+    monkeypatch.setattr(client, 'get_http_session', lambda: session)
+    monkeypatch.setattr(client, 'log_event', log)
+    monkeypatch.setattr(client, 'SOAP_RETRY_BASE_DELAY', 0.001)
+    for _ in range(client.soap_breaker.min_calls - 1):
+        client.soap_breaker.record_failure()
+
+    result = client.send_stock_update(STOCK, max_retries=3)
+
+    assert result['success'] is False
+    assert session.post.call_count == 1
+    events = [(c.kwargs['event_type'], c.kwargs['status']) for c in log.call_args_list]
+    assert events == [('CIRCUIT_BREAKER_OPEN', 'FAILURE'), ('STOCK_UPDATE_SENT', 'FAILURE')]
+    assert 'refused' in log.call_args_list[1].kwargs['error_message']
@@ -0,0 +1,205 @@
+import sys
+import os
+import threading
+import time
+from unittest.mock import MagicMock
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'utils')))
+
+import event_log_writer
+from event_log_writer import EventLogWriter
+
+
+class FakeDB:
+    """execute_values çağrılarını kaydeden sahte bağlantı kaynağı"""
+
+    def __init__(self, gate=None, fail=False):
+        """fail: True ise her yazma, sayıysa ilk fail yazma hata verir"""
+        self.batches = []
+        self.gate = gate
+        self.fail = fail
+        self.conn = MagicMock()
+        self.released = 0
+
+    def get_connection(self):
+        if self.gate is not None:
+            self.gate.wait(2)
+        return self.conn
+
+    def release_connection(self, conn):
+        self.released += 1
+
+    def execute_values(self, cursor, sql, rows, page_size):
+        if self.fail is True or self.fail > 0:
+            if self.fail is not True:
+                self.fail -= 1
+            raise RuntimeError('db down')
+        self.batches.append(list(rows))
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    db = FakeDB()
+    monkeypatch.setattr(event_log_writer, 'execute_values', db.execute_values)
+    return db
+
+
+def make_writer(db, **kwargs):
+    return EventLogWriter(get_connection=db.get_connection, release_connection=db.release_connection,
+                          **kwargs)
+
+
+# ============ BATCHING TESTS ============
+
+def test_rows_written_in_multi_row_batches(fake_db):
+    """Birikmiş satırlar batch_size'lık tek INSERT'lerle yazılır"""
+    gate = threading.Event()
+    fake_db.gate = gate
+    writer = make_writer(fake_db, batch_size=4, flush_interval=0.05)
+
+    for i in range(10):
+        assert writer.log(f'E{i}', 'OUTGOING', 'SOA', latency_ms=i)
+    gate.set()
+    assert writer.flush(2)
+
+    sizes = [len(b) for b in fake_db.batches]
+    assert sum(sizes) == 10
+    assert max(sizes) <= 4
+    assert len(sizes) <= 4
+    assert fake_db.batches[0][0] == ('E0', 'OUTGOING', 'SOA', None, 'SUCCESS', None, 0)
+    fake_db.conn.commit.assert_called()
+    assert writer.stats()['written'] == 10
+    writer.close()
+
+
+def test_time_trigger_flushes_partial_batch(fake_db):
+    """batch_size dolmasa da flush_interval sonunda yazılır"""
+    writer = make_writer(fake_db, batch_size=500, flush_interval=0.05)
+    writer.log('ONE', 'OUTGOING', 'SOA')
+
+    deadline = time.monotonic() + 1
+    while not fake_db.batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert fake_db.batches == [[('ONE', 'OUTGOING', 'SOA', None, 'SUCCESS', None, None)]]
+    writer.close()
+
+
+def test_log_does_not_wait_for_database(fake_db):
+    """DB yavaşken bile log() hemen döner"""
+    gate = threading.Event()
+    fake_db.gate = gate
+    writer = make_writer(fake_db, batch_size=10, flush_interval=0.01)
+
+    start = time.perf_counter()
+    for i in range(100):
+        writer.log('FAST', 'OUTGOING', 'SOA')
+    assert time.perf_counter() - start < 0.05
+    assert writer.stats()['backlog'] > 0
+
+    gate.set()
+    assert writer.flush(2)
+    assert writer.stats()['backlog'] == 0
+    writer.close()
+
+
+# ============ BACKPRESSURE / ERROR TESTS ============
+
+def test_full_queue_drops_and_counts(fake_db):
+    """Kuyruk doluyken yeni satırlar düşürülür ve sayılır"""
+    gate = threading.Event()
+    fake_db.gate = gate
+    writer = make_writer(fake_db, queue_size=5, batch_size=1, flush_interval=0.01)
+
+    results = [writer.log(f'E{i}', 'OUTGOING', 'SOA') for i in range(20)]
+    stats = writer.stats()
+    assert results.count(False) == stats['dropped'] > 0
+    assert stats['backlog'] <= 5
+
+    gate.set()
+    assert writer.flush(2)
+    assert writer.stats()['written'] == results.count(True)
+    writer.close()
+
+
+def test_write_failure_counts_rows_and_rolls_back(fake_db):
+    """INSERT hata verirse satırlar failed sayılır, bağlantı iade edilir"""
+    fake_db.fail = True
+    writer = make_writer(fake_db, batch_size=10, flush_interval=0.01, retry_delay=0.01)
+    for _ in range(3):
+        writer.log('BROKEN', 'OUTGOING', 'SOA')
+
+    assert writer.flush(2)
+    stats = writer.stats()
+    assert stats['failed'] == 3
+    assert stats['written'] == 0
+    fake_db.conn.rollback.assert_called()
+    assert fake_db.released >= 1
+    writer.close()
+
+
+def test_failed_batch_is_retried(fake_db):
+    """Geçici hata sonrası batch tekrar denenir, satırlar kaybolmaz"""
+    fake_db.fail = 2
+    writer = make_writer(fake_db, batch_size=10, flush_interval=0.01, write_retries=3, retry_delay=0.01)
+    for _ in range(3):
+        writer.log('FLAKY', 'OUTGOING', 'SOA')
+
+    assert writer.flush(2)
+    stats = writer.stats()
+    assert stats['written'] == 3
+    assert stats['failed'] == 0
+    assert stats['retries'] == 2
+    writer.close()
+
+
+def test_failed_batch_retries_are_bounded(fake_db):
+    """write_retries kadar denemeden sonra satırlar failed sayılır"""
+    fake_db.fail = True
+    writer = make_writer(fake_db, batch_size=10, flush_interval=0.01, write_retries=2, retry_delay=0.01)
+    writer.log('BROKEN', 'OUTGOING', 'SOA')
+
+    assert writer.flush(2)
+    assert writer.stats()['retries'] == 2
+    assert fake_db.conn.rollback.call_count == 3
+    writer.close()
+
+
+def test_async_commit_is_opt_in(fake_db):
+    """synchronous_commit OFF sadece async_commit=True ile"""
+    for async_commit, expected in ((False, 0), (True, 1)):
+        fake_db.conn.reset_mock()
+        writer = make_writer(fake_db, flush_interval=0.01, async_commit=async_commit)
+        writer.log('E', 'OUTGOING', 'SOA')
+        assert writer.flush(2)
+        calls = [c for c in fake_db.conn.cursor.return_value.execute.call_args_list
+                 if 'synchronous_commit' in c[0][0]]
+        assert len(calls) == expected
+        writer.close()
+
+
+def test_log_after_close_is_rejected(fake_db):
+    """close() sonrası satır kuyruğa girmez (okuyacak thread yok)"""
+    writer = make_writer(fake_db, flush_interval=0.01)
+    writer.log('BEFORE', 'OUTGOING', 'SOA')
+    assert writer.close(2)
+
+    assert writer.log('AFTER', 'OUTGOING', 'SOA') is False
+    stats = writer.stats()
+    assert stats['backlog'] == 0
+    assert stats['dropped'] == 1
+    assert [row[0] for batch in fake_db.batches for row in batch] == ['BEFORE']
+
+
+def test_client_log_event_uses_shared_writer(monkeypatch):
+    """SOAP client log_event kuyruğa SOA/OUTGOING satırı ekler"""
+    from soap_client import client
+
+    writer = MagicMock()
+    writer.log.return_value = True
+    monkeypatch.setattr(client.event_log_writer, '_writer', writer)
+
+    client.log_event('STOCK_UPDATE_SENT', 'SUCCESS', 'payload', None, 12)
+    writer.log.assert_called_once_with('STOCK_UPDATE_SENT', 'OUTGOING', 'SOA', 'payload',
+                                       'SUCCESS', None, 12)
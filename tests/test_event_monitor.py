@@ -0,0 +1,86 @@
+import sys
+import os
+import json
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import stock_monitor.event_monitor as event_monitor
+
+
+def make_notify(hospital_id, product_code, stock, consumption, threshold=2.0):
+    notify = MagicMock()
+    notify.payload = json.dumps({
+        'hospital_id': hospital_id,
+        'product_code': product_code,
+        'current_stock_units': stock,
+        'daily_consumption_units': consumption,
+        'reorder_threshold': threshold
+    })
+    return notify
+
+
+# =========================
+# NOTIFICATION DRAIN
+# =========================
+
+def test_drain_notifications_keeps_latest_per_sku():
+    fake_conn = MagicMock()
+    fake_conn.notifies = [
+        make_notify('Hospital-C', 'PHYSIO-SALINE-500ML', 200, 79),
+        make_notify('Hospital-C', 'PHYSIO-SALINE-500ML', 120, 79),
+        make_notify('Hospital-C', 'GLOVES-M', 10, 5)
+    ]
+
+    payloads = event_monitor.drain_notifications(fake_conn)
+    assert len(payloads) == 2
+    saline = [p for p in payloads if p['product_code'] == 'PHYSIO-SALINE-500ML'][0]
+    assert saline['current_stock_units'] == 120
+    assert fake_conn.notifies == []
+
+
+def test_drain_notifications_skips_invalid_payload():
+    bad = MagicMock()
+    bad.payload = 'not json'
+    fake_conn = MagicMock()
+    fake_conn.notifies = [bad]
+
+    assert event_monitor.drain_notifications(fake_conn) == []
+
+
+# =========================
+# THRESHOLD CHECK
+# =========================
+
+def test_handle_notifications_dispatches_only_breaches(monkeypatch):
+    recorded = []
+
+    @contextmanager
+    def fake_connection():
+        yield MagicMock()
+
+    monkeypatch.setattr(event_monitor.db_pool, "connection", fake_connection)
+    monkeypatch.setattr(
+        event_monitor.batch_monitor,
+        "record_alerts",
+        lambda conn, rows: recorded.extend(rows)
+    )
+
+    dispatched = []
+    payloads = [
+        {'hospital_id': 'Hospital-C', 'product_code': 'A', 'current_stock_units': 50,
+         'daily_consumption_units': 79, 'reorder_threshold': 2.0},
+        {'hospital_id': 'Hospital-C', 'product_code': 'B', 'current_stock_units': 500,
+         'daily_consumption_units': 79, 'reorder_threshold': None}
+    ]
+
+    rows = event_monitor.handle_notifications(payloads, dispatch=dispatched.append)
+    assert [r['product_code'] for r in rows] == ['A']
+    assert dispatched == rows
+    assert recorded == rows
+
+
+def test_handle_notifications_empty():
+    assert event_monitor.handle_notifications([]) == []
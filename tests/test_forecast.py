@@ -0,0 +1,128 @@
+import sys
+import os
+from datetime import date, timedelta
+from unittest.mock import MagicMock
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from stock_monitor.forecast import ConsumptionForecaster
+
+KEY = ('Hospital-C', 'PHYSIO-SALINE-500ML')
+MONDAY = date(2026, 1, 5)
+
+
+def feed_weeks(forecaster, weeks, weekday_units=100, weekend_units=70):
+    for _ in range(weeks):
+        for d in range(7):
+            forecaster.update(KEY, weekend_units if d >= 5 else weekday_units, d)
+
+
+# =========================
+# INCREMENTAL STATE
+# =========================
+
+def test_forecast_converges_to_constant_consumption():
+    forecaster = ConsumptionForecaster()
+    for i in range(30):
+        forecaster.update(KEY, 79, i % 7)
+    assert forecaster.forecast(KEY, MONDAY) == pytest.approx(79, rel=0.01)
+
+
+def test_forecast_learns_weekend_seasonality():
+    forecaster = ConsumptionForecaster()
+    feed_weeks(forecaster, 20)
+    saturday = MONDAY + timedelta(days=5)
+    assert forecaster.forecast(KEY, MONDAY) == pytest.approx(100, rel=0.05)
+    assert forecaster.forecast(KEY, saturday) == pytest.approx(70, rel=0.05)
+
+
+def test_has_forecast_requires_min_observations():
+    forecaster = ConsumptionForecaster(min_observations=3)
+    forecaster.update(KEY, 79, 0)
+    forecaster.update(KEY, 79, 1)
+    assert not forecaster.has_forecast(KEY)
+    forecaster.update(KEY, 79, 2)
+    assert forecaster.has_forecast(KEY)
+
+
+def test_zero_consumption_does_not_break_division():
+    forecaster = ConsumptionForecaster()
+    for i in range(50):
+        forecaster.update(KEY, 0 if i % 7 == 5 else 79, i % 7)
+    assert forecaster.forecast(KEY, MONDAY) > 0
+
+
+# =========================
+# DAYS OF SUPPLY
+# =========================
+
+def test_days_of_supply_constant_rate():
+    forecaster = ConsumptionForecaster()
+    for i in range(30):
+        forecaster.update(KEY, 100, i % 7)
+    assert forecaster.days_of_supply(KEY, 250, MONDAY) == pytest.approx(2.5, rel=0.01)
+
+
+def test_days_of_supply_accounts_for_weekend():
+    forecaster = ConsumptionForecaster()
+    feed_weeks(forecaster, 20)
+    friday = MONDAY + timedelta(days=4)
+    # Cuma 100 + Cumartesi 70 = 170 birim -> 2 gün
+    assert forecaster.days_of_supply(KEY, 170, friday) == pytest.approx(2.0, rel=0.05)
+
+
+# =========================
+# SYNC
+# =========================
+
+def history_row(row_id, units=80, day=MONDAY):
+    return (row_id, 'Hospital-C', 'PHYSIO-SALINE-500ML', units, day.strftime('%A'), day)
+
+
+def sync_conn(*batches):
+    """Her sync'te sıradaki satır listesini döndüren bağlantı"""
+    conn = MagicMock()
+    cursor = MagicMock()
+    cursor.__iter__.side_effect = [iter(rows) for rows in batches]
+    conn.cursor.return_value = cursor
+    return conn, cursor
+
+
+def test_sync_only_reads_new_rows():
+    forecaster = ConsumptionForecaster(overlap_ids=0)
+    fake_conn, fake_cursor = sync_conn(
+        [history_row(1, 80), history_row(2, 78, MONDAY + timedelta(days=1))], [])
+
+    assert forecaster.sync(fake_conn) == 2
+    assert forecaster.last_history_id == 2
+    assert forecaster.states[KEY]['observations'] == 2
+
+    assert forecaster.sync(fake_conn) == 0
+    assert fake_cursor.execute.call_args[0][1] == (2,)
+
+
+def test_first_sync_streams_with_named_cursor():
+    forecaster = ConsumptionForecaster()
+    fake_conn, fake_cursor = sync_conn([history_row(1)], [])
+
+    forecaster.sync(fake_conn)
+    forecaster.sync(fake_conn)
+
+    assert fake_conn.cursor.call_args_list[0].kwargs == {'name': 'forecast_sync'}
+    assert fake_conn.cursor.call_args_list[1].kwargs == {}
+    fake_cursor.fetchall.assert_not_called()
+
+
+def test_sync_picks_up_late_commit_with_lower_id():
+    """id 3 id 4'ten sonra commit oldu: tekrar okunan pencerede yakalanır, uygulanmış olanlar atlanır"""
+    forecaster = ConsumptionForecaster(overlap_ids=10)
+    fake_conn, fake_cursor = sync_conn(
+        [history_row(1), history_row(2), history_row(4)],
+        [history_row(1), history_row(2), history_row(3), history_row(4), history_row(5)])
+
+    assert forecaster.sync(fake_conn) == 3
+    assert forecaster.sync(fake_conn) == 2
+    assert fake_cursor.execute.call_args[0][1] == (0,)
+    assert forecaster.states[KEY]['observations'] == 5
+    assert forecaster.last_history_id == 5
@@ -0,0 +1,256 @@
+import sys
+import os
+import random
+from unittest.mock import MagicMock
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import stock_monitor.monitor as monitor
+from stock_monitor import outbox
+from stock_monitor.outbox import OutboxRelay, SOAP, EVENT_HUB, PENDING, DEAD
+
+
+class FakeDB:
+    """CLAIM_SQL'e verilen satırları döndüren, yazılan UPDATE'leri kaydeden bağlantı"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.cursor = MagicMock()
+        self.cursor.fetchall.return_value = rows
+        self.conn = MagicMock()
+        self.conn.cursor.return_value = self.cursor
+        self.failed_rows = []
+        self.released = 0
+
+    def get_connection(self):
+        return self.conn
+
+    def release_connection(self, conn):
+        self.released += 1
+
+    def execute_values(self, cursor, sql, rows, template=None, page_size=100, fetch=False):
+        self.failed_rows.extend(rows)
+
+    def sent_ids(self):
+        for call in self.cursor.execute.call_args_list:
+            if call.args[0] is outbox.MARK_SENT_SQL:
+                return call.args[1][0]
+        return []
+
+
+@pytest.fixture
+def make_relay(monkeypatch):
+    def factory(rows, senders, **kwargs):
+        db = FakeDB(rows)
+        monkeypatch.setattr(outbox, 'execute_values', db.execute_values)
+        relay = OutboxRelay(senders, get_connection=db.get_connection,
+                            release_connection=db.release_connection,
+                            rng=random.Random(1), **kwargs)
+        return relay, db
+    return factory
+
+
+def ok(payloads):
+    return [{'success': True} for _ in payloads]
+
+
+# ============ ENQUEUE TESTS ============
+
+def test_enqueue_writes_json_rows_without_commit(monkeypatch):
+    """Mesajlar çağıranın cursor'ıyla tek INSERT; commit çağırana kalır"""
+    captured = {}
+
+    def fake_execute_values(cursor, sql, rows, template=None):
+        captured.update(sql=sql, rows=rows, template=template)
+
+    monkeypatch.setattr(outbox, 'execute_values', fake_execute_values)
+    cursor = MagicMock()
+    assert outbox.enqueue(cursor, [(SOAP, {'a': 1}), (EVENT_HUB, {'b': 2})]) == 2
+    assert captured['rows'] == [(SOAP, '{"a": 1}'), (EVENT_HUB, '{"b": 2}')]
+    assert captured['template'] == '(%s, %s::jsonb)'
+    assert outbox.enqueue(cursor, []) == 0
+
+
+def test_consume_and_check_enqueues_before_single_commit(monkeypatch):
+    """Stok düşümü, alert geçişi ve outbox mesajları aynı transaction'da commit edilir"""
+    calls = []
+    fake_cursor = MagicMock()
+    fake_cursor.fetchone.return_value = (100, 50, 79, 0.63, None, None)
+    fake_conn = MagicMock()
+    fake_conn.cursor.return_value = fake_cursor
+    fake_conn.commit.side_effect = lambda: calls.append('commit')
+    monkeypatch.setattr(monitor, 'get_db_connection', lambda: fake_conn)
+    monkeypatch.setattr(monitor, 'release_db_connection', lambda conn: None)
+    monkeypatch.setattr(monitor.outbox, 'enqueue',
+                        lambda cursor, messages: calls.append([m[0] for m in messages]))
+    # monitor alert_state'i sys.path üzerinden yalın modül olarak import eder
+    monkeypatch.setattr(sys.modules[monitor.apply_transitions.__module__], 'execute_values',
+                        lambda *a, **kw: [(7,)])
+
+    alert_state = monitor.AlertStateMachine()
+    result = monitor.consume_and_check(50, record_alert=False, alert_state=alert_state,
+                                       enqueue=monitor.enqueue_breaches)
+
+    assert result['transition']['dispatch'] is True
+    assert calls == [[SOAP, EVENT_HUB], 'commit']
+    fake_conn.commit.assert_called_once()
+
+    # Aynı seviyede kalınca geçiş yok; outbox'a tekrar yazılmaz
+    calls.clear()
+    result = monitor.consume_and_check(50, record_alert=False, alert_state=alert_state,
+                                       enqueue=monitor.enqueue_breaches)
+    assert result['transition'] is None
+    assert calls == ['commit']
+
+
+def test_enqueue_breaches_builds_soap_and_event_payloads(monkeypatch):
+    messages = []
+    monkeypatch.setattr(monitor.outbox, 'enqueue', lambda cursor, m: messages.extend(m) or len(m))
+    monitor.enqueue_breaches(None, [{'current_stock': 50, 'daily_consumption': 79,
+                                     'days_of_supply': 0.63}])
+
+    assert messages[0] == (SOAP, {'hospitalId': 'Hospital-C', 'productCode': 'PHYSIO-SALINE-500ML',
+                                  'currentStockUnits': 50, 'dailyConsumptionUnits': 79,
+                                  'daysOfSupply': 0.63})
+    assert messages[1][0] == EVENT_HUB
+    assert messages[1][1]['eventType'] == 'InventoryLow'
+
+
+# ============ RELAY TESTS ============
+
+def test_drain_batch_claims_with_skip_locked_and_marks_sent(make_relay):
+    """Satırlar SKIP LOCKED ile kiralanır, kanal başına tek çağrıyla gönderilir"""
+    rows = [(3, SOAP, {'p': 2}, 1), (1, SOAP, {'p': 1}, 1), (2, EVENT_HUB, {'e': 1}, 1)]
+    seen = {}
+
+    def soap(payloads):
+        seen[SOAP] = payloads
+        return ok(payloads)
+
+    relay, db = make_relay(rows, {SOAP: soap, EVENT_HUB: ok}, batch_size=10, lease_seconds=60)
+    assert relay.drain_batch() == 3
+
+    claim = db.cursor.execute.call_args_list[0]
+    assert 'FOR UPDATE SKIP LOCKED' in claim.args[0]
+    assert 'available_at = NOW() + make_interval' in claim.args[0]
+    assert claim.args[1] == (60, 10)
+    assert seen[SOAP] == [{'p': 1}, {'p': 2}]
+    assert sorted(db.sent_ids()) == [1, 2, 3]
+    assert db.conn.commit.call_count == 2
+    assert db.released == 2
+    assert relay.stats()['relayed'] == 3
+
+
+def test_send_happens_outside_any_transaction(make_relay):
+    """Claim commit edilip bağlantı iade edildikten sonra gönderilir; işaretleme ayrı transaction"""
+    rows = [(1, SOAP, {}, 1)]
+    during_send = {}
+
+    def soap(payloads):
+        during_send['commits'] = db.conn.commit.call_count
+        during_send['released'] = db.released
+        return ok(payloads)
+
+    relay, db = make_relay(rows, {SOAP: soap})
+    relay.drain_batch()
+
+    assert during_send == {'commits': 1, 'released': 1}
+    assert db.conn.commit.call_count == 2
+
+
+def test_mark_failure_leaves_rows_to_lease_expiry(make_relay):
+    """İşaretleme başarısızsa hata sayılır; kira dolunca satırlar tekrar gönderilir"""
+    rows = [(1, SOAP, {}, 1)]
+    relay, db = make_relay(rows, {SOAP: ok})
+    db.cursor.execute.side_effect = [None, RuntimeError('db down')]
+
+    assert relay.drain_batch() == 0
+    db.conn.rollback.assert_called_once()
+    assert db.released == 2
+    assert relay.stats()['errors'] == 1
+
+
+def test_failed_mark_is_fenced_by_attempts(make_relay):
+    """Kira dolup satırı başka relay aldıysa başarısız işaretlemesi onu ezmez"""
+    assert 'o.attempts = f.attempts' in outbox.MARK_FAILED_SQL
+    assert "o.status = 'PENDING'" in outbox.MARK_FAILED_SQL
+    rows = [(1, SOAP, {}, 4)]
+    relay, db = make_relay(rows, {SOAP: lambda p: [{'success': False, 'error': 'HTTP 500'}]})
+    relay.drain_batch()
+
+    assert db.failed_rows[0][0] == 1
+    assert db.failed_rows[0][4] == 4
+
+
+def test_failed_rows_rescheduled_and_dead_after_max_attempts(make_relay):
+    """Başarısızlar backoff ile tekrar PENDING; deneme sınırında DEAD"""
+    rows = [(1, SOAP, {}, 1), (2, SOAP, {}, 3), (3, SOAP, {}, 1)]
+
+    def soap(payloads):
+        return [{'success': False, 'error': 'HTTP 500'}, {'success': False, 'error': 'HTTP 500'},
+                {'success': True}]
+
+    relay, db = make_relay(rows, {SOAP: soap}, max_attempts=3, retry_base_delay=5)
+    relay.drain_batch()
+
+    assert db.sent_ids() == [3]
+    failed = {row[0]: row for row in db.failed_rows}
+    assert failed[1][1] == PENDING
+    assert failed[1][2] == 'HTTP 500'
+    assert 4.0 <= failed[1][3] <= 5.0
+    assert failed[2][1] == DEAD
+    stats = relay.stats()
+    assert (stats['relayed'], stats['failed'], stats['dead']) == (1, 2, 1)
+
+
+def test_sender_exception_and_unknown_channel_fail_rows(make_relay):
+    rows = [(1, SOAP, {}, 1), (2, EVENT_HUB, {}, 1)]
+
+    def broken(payloads):
+        raise ConnectionError('refused')
+
+    relay, db = make_relay(rows, {SOAP: broken})
+    relay.drain_batch()
+
+    errors = {row[0]: row[2] for row in db.failed_rows}
+    assert errors[1] == 'refused'
+    assert 'EVENT_HUB' in errors[2]
+    assert db.conn.commit.call_count == 2
+
+
+def test_database_error_rolls_back_and_releases(make_relay):
+    """Claim/işaretleme hatasında transaction geri alınır; satırlar kilitten çıkar"""
+    relay, db = make_relay([], {SOAP: ok})
+    db.cursor.execute.side_effect = RuntimeError('db down')
+
+    assert relay.drain_batch() == 0
+    db.conn.rollback.assert_called_once()
+    assert db.released == 1
+    assert relay.stats()['errors'] == 1
+
+
+def test_drain_stops_on_partial_batch(make_relay):
+    rows = [(i, SOAP, {}, 1) for i in range(2)]
+    relay, db = make_relay(rows, {SOAP: ok}, batch_size=2)
+    db.cursor.fetchall.side_effect = [rows, rows[:1]]
+
+    assert relay.drain() == 3
+    assert relay.stats()['batches'] == 2
+
+
+def test_permanent_failure_goes_dead_on_first_attempt(make_relay):
+    """retryable=False (örn. SOAP Client fault) deneme sınırını beklemeden DEAD"""
+    rows = [(1, SOAP, {}, 1)]
+    relay, db = make_relay(rows, {SOAP: lambda p: [{'success': False, 'retryable': False,
+                                                    'error': '[soap:Client] bad'}]})
+    relay.drain_batch()
+
+    assert db.failed_rows[0][:3] == (1, DEAD, '[soap:Client] bad')
+    assert relay.stats()['dead'] == 1
+
+
+def test_monitor_relay_disables_soap_client_retries():
+    """Relay retry katmanı; SOAP tekli fallback'i tek deneme yapar"""
+    relay = monitor.create_outbox_relay()
+    assert relay.senders[SOAP].keywords == {'max_retries': 1}
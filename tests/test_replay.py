@@ -0,0 +1,109 @@
+import sys
+import os
+from datetime import date
+from unittest.mock import MagicMock
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from stock_monitor import replay
+from stock_monitor.alert_state import AlertStateMachine, LEVEL_RANK
+
+START = date(2026, 1, 5)  # Pazartesi
+
+
+def run(stock, consumption, days, **kwargs):
+    chunks = list(replay.replay_chunks(
+        ['Hospital-C'] * len(stock), [f"SKU-{i}" for i in range(len(stock))],
+        stock, consumption, days, start_date=START, seed=1, **kwargs
+    ))
+    history = ''.join(c[0] for c in chunks)
+    alerts = ''.join(c[1] for c in chunks)
+    return chunks, history.splitlines(), alerts.splitlines()
+
+
+# =========================
+# SIMULATED CLOCK
+# =========================
+
+def test_simulated_clock_advances_without_wall_clock():
+    clock = replay.SimulatedClock(START)
+    assert clock.today() == START
+    clock.advance(6)
+    assert clock.today() == date(2026, 1, 11)
+    assert clock.now().date() == date(2026, 1, 11)
+
+
+# =========================
+# HYSTERESIS
+# =========================
+
+@pytest.mark.parametrize("level", [0, 1, 2])
+def test_target_levels_matches_alert_state_machine(level):
+    sm = AlertStateMachine(critical_days=1.0, hysteresis_days=0.5)
+    names = {v: k for k, v in LEVEL_RANK.items()}
+    dos = np.linspace(0, 4, 81)
+    vectorized = replay.target_levels(np.full(dos.size, level), dos, np.full(dos.size, 2.0),
+                                      critical_days=1.0, hysteresis_days=0.5)
+    expected = [LEVEL_RANK[sm.target_level(names[level], d, 2.0)] for d in dos]
+    assert vectorized.tolist() == expected
+
+
+# =========================
+# ROW GENERATION
+# =========================
+
+def test_replay_generates_one_history_row_per_sku_day():
+    chunks, history, _ = run([500, 800, 300], [50, 80, 30], 30, rows_per_chunk=10)
+    assert len(history) == 90
+    assert len(chunks) >= 9
+    first = history[0].split('\t')
+    assert first[:3] == ['Hospital-C', 'SKU-0', '2026-01-05']
+    assert first[6:9] == ['Monday', 'f', 'replay']
+    assert len(first) == len(replay.HISTORY_COLUMNS)
+
+
+def test_replay_stock_is_continuous_and_restocked():
+    _, history, alerts = run([300], [100], 60, restock_days=10, lead_time_days=1)
+    rows = [line.split('\t') for line in history]
+    for prev, cur in zip(rows, rows[1:]):
+        assert int(cur[4]) >= int(prev[5])
+    assert any(int(cur[4]) > int(prev[5]) for prev, cur in zip(rows, rows[1:]))
+    assert min(int(r[5]) for r in rows[5:]) >= 0
+    assert alerts
+
+
+def test_replay_alerts_resolved_or_left_open():
+    _, _, alerts = run([300], [100], 60, restock_days=10, lead_time_days=1)
+    fields = [line.split('\t') for line in alerts]
+    assert all(len(f) == len(replay.ALERT_COLUMNS) for f in fields)
+    assert all(f[2] in ('LOW_STOCK', 'CRITICAL_STOCK') for f in fields)
+    open_alerts = [f for f in fields if f[8] == '\\N']
+    assert len(open_alerts) <= 1
+
+
+# =========================
+# COPY
+# =========================
+
+def test_run_replay_copies_each_chunk_and_commits():
+    conn = MagicMock()
+    cursor = MagicMock()
+    conn.cursor.return_value = cursor
+    chunks = [("h1\n", "a1\n", 1, 1), ("h2\n", "", 1, 0)]
+
+    totals = replay.run_replay(conn, chunks)
+
+    assert totals == {'history_rows': 2, 'alert_rows': 1}
+    assert cursor.copy_expert.call_count == 3
+    assert cursor.copy_expert.call_args_list[0][0][0].startswith("COPY consumption_history")
+    assert conn.commit.call_count == 2
+
+
+def test_run_replay_rolls_back_on_error():
+    conn = MagicMock()
+    conn.cursor.return_value.copy_expert.side_effect = Exception("boom")
+    with pytest.raises(Exception):
+        replay.run_replay(conn, [("h\n", "", 1, 0)])
+    conn.rollback.assert_called_once()
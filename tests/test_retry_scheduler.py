@@ -0,0 +1,230 @@
+import sys
+import os
+import random
+import threading
+import time
+from concurrent.futures import CancelledError
+from unittest.mock import MagicMock
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.retry_scheduler import RetryScheduler, RetryPolicy, backoff_delay
+from soap_client import client
+
+
+@pytest.fixture
+def scheduler():
+    s = RetryScheduler(workers=2)
+    yield s
+    s.shutdown()
+
+
+def flaky(failures, result='ok'):
+    """İlk `failures` denemede hata veren fonksiyon; deneme numaralarını kaydeder"""
+    attempts = []
+
+    def fn(attempt):
+        attempts.append(attempt)
+        if attempt <= failures:
+            raise ConnectionError(f'fail {attempt}')
+        return result
+
+    return fn, attempts
+
+
+# ============ BACKOFF TESTS ============
+
+def test_backoff_delay_exponential_with_cap():
+    """Jitter yokken 1, 2, 4, 8 ve cap"""
+    delays = [backoff_delay(n, 1.0, 5.0, 0.0) for n in range(1, 6)]
+    assert delays == [1.0, 2.0, 4.0, 5.0, 5.0]
+
+
+def test_backoff_delay_jitter_bounds():
+    """Jitter gecikmeyi sadece aşağı kaydırır"""
+    rng = random.Random(7)
+    delays = [backoff_delay(3, 1.0, 30.0, 0.5, rng) for _ in range(200)]
+    assert all(2.0 <= d <= 4.0 for d in delays)
+    assert len(set(delays)) > 100
+
+
+# ============ SCHEDULER TESTS ============
+
+def test_submit_returns_immediately_and_retries(scheduler):
+    """Çağıran bloklanmaz; başarısız denemeler arka planda tekrar edilir"""
+    fn, attempts = flaky(2)
+    on_retry = MagicMock()
+    policy = RetryPolicy(max_attempts=3, base_delay=0.05, max_delay=1, jitter=0)
+
+    start = time.perf_counter()
+    future = scheduler.submit(fn, policy, on_retry=on_retry)
+    assert time.perf_counter() - start < 0.02
+
+    assert future.result(timeout=2) == 'ok'
+    assert attempts == [1, 2, 3]
+    assert [c.args[0] for c in on_retry.call_args_list] == [1, 2]
+    assert [c.args[2] for c in on_retry.call_args_list] == [0.05, 0.1]
+
+
+def test_gives_up_after_max_attempts(scheduler):
+    """Deneme hakkı bitince son hata Future'a geçer"""
+    fn, attempts = flaky(10)
+    future = scheduler.submit(fn, RetryPolicy(max_attempts=2, base_delay=0.01, jitter=0))
+
+    with pytest.raises(ConnectionError, match='fail 2'):
+        future.result(timeout=2)
+    assert attempts == [1, 2]
+
+
+def test_on_failure_value_completes_future(scheduler):
+    """on_failure verilirse Future onun dönüşüyle tamamlanır"""
+    fn, _ = flaky(10)
+    future = scheduler.submit(fn, RetryPolicy(max_attempts=1),
+                              on_failure=lambda exc, attempts: {'error': str(exc), 'attempts': attempts})
+    assert future.result(timeout=2) == {'error': 'fail 1', 'attempts': 1}
+
+
+def test_deadline_stops_before_next_attempt(scheduler):
+    """Sonraki deneme deadline'ı aşacaksa beklemeden vazgeçilir"""
+    fn, attempts = flaky(10)
+    policy = RetryPolicy(max_attempts=10, base_delay=0.2, jitter=0, deadline=0.5)
+
+    start = time.perf_counter()
+    with pytest.raises(ConnectionError):
+        scheduler.submit(fn, policy).result(timeout=2)
+
+    # 0.2 + 0.4 > 0.5: ikinci denemeden sonra vazgeçilir
+    assert attempts == [1, 2]
+    assert time.perf_counter() - start < 0.45
+
+
+def test_non_retryable_error_fails_fast(scheduler):
+    """retryable False ise tekrar yok"""
+    fn, attempts = flaky(10)
+    policy = RetryPolicy(max_attempts=5, base_delay=0.01,
+                         retryable=lambda exc: not isinstance(exc, ConnectionError))
+    with pytest.raises(ConnectionError):
+        scheduler.submit(fn, policy).result(timeout=2)
+    assert attempts == [1]
+
+
+def test_earlier_retry_is_not_blocked_by_later_one(scheduler):
+    """Uzun beklemedeki retry, sonradan eklenen kısa olanı geciktirmez"""
+    slow, _ = flaky(1)
+    fast, _ = flaky(1)
+    scheduler.submit(slow, RetryPolicy(base_delay=5, jitter=0))
+    time.sleep(0.05)
+
+    start = time.perf_counter()
+    scheduler.submit(fast, RetryPolicy(base_delay=0.05, jitter=0)).result(timeout=2)
+    assert time.perf_counter() - start < 0.5
+    assert scheduler.pending() == 1
+
+
+def test_shutdown_cancels_pending(scheduler):
+    """Kapatılınca bekleyen retry iptal edilir"""
+    fn, attempts = flaky(10)
+    future = scheduler.submit(fn, RetryPolicy(base_delay=5, jitter=0))
+    while not attempts:
+        time.sleep(0.01)
+
+    scheduler.shutdown()
+    with pytest.raises(CancelledError):
+        future.result(timeout=1)
+    assert attempts == [1]
+
+
+# ============ SOAP CLIENT TESTS ============
+
+def test_send_stock_update_async_logs_retry_outcomes(monkeypatch):
+    """Retry ve başarı log_event'e yazılır, çağıran hemen Future alır"""
+    ok = MagicMock(status_code=200, content=b'''<soap:Envelope
+        xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"><soap:Body>
+        <tns:StockUpdateResponse xmlns:tns="http://hospital-supply-chain.example.com/soap">
+        <tns:success>true</tns:success><tns:message>OK</tns:message>
+        <tns:orderTriggered>false</tns:orderTriggered></tns:StockUpdateResponse>
+        </soap:Body></soap:Envelope>''')
+    session = MagicMock()
+    session.post.side_effect = [MagicMock(status_code=503, text='busy'), ok]
+    log = MagicMock()
+    release = threading.Event()
+    monkeypatch.setattr(client, 'get_http_session', lambda: session)
+    monkeypatch.setattr(client, 'log_event', lambda **kw: (release.wait(2), log(**kw)))
+    monkeypatch.setattr(client, 'SOAP_RETRY_BASE_DELAY', 0.01)
+
+    future = client.send_stock_update_async(
+        {'currentStockUnits': 50, 'dailyConsumptionUnits': 79, 'daysOfSupply': 0.63})
+    assert not future.done()
+    release.set()
+
+    result = future.result(timeout=2)
+    assert result['success'] is True
+    assert result['attempts'] == 2
+    assert [c.kwargs['status'] for c in log.call_args_list] == ['RETRY', 'SUCCESS']
+    assert 'HTTP 503' in log.call_args_list[0].kwargs['error_message']
+
+
+def test_send_stock_update_failure_result(monkeypatch):
+    """Tüm denemeler başarısızsa FAILURE kaydı ve eski sonuç formatı"""
+    session = MagicMock()
+    session.post.side_effect = ConnectionError('refused')
+    log = MagicMock()
+    monkeypatch.setattr(client, 'get_http_session', lambda: session)
+    monkeypatch.setattr(client, 'log_event', log)
+    monkeypatch.setattr(client, 'SOAP_RETRY_BASE_DELAY', 0.01)
+
+    result = client.send_stock_update(
+        {'currentStockUnits': 50, 'dailyConsumptionUnits': 79, 'daysOfSupply': 0.63}, max_retries=2)
+
+    assert result['success'] is False
+    assert result['attempts'] == 2
+    assert 'refused' in result['error']
+    assert [c.kwargs['status'] for c in log.call_args_list] == ['RETRY', 'FAILURE']
+
+
+def test_send_stock_update_wait_is_bounded(monkeypatch):
+    """Süren deneme bitmese de senkron çağrı timeout'ta TIMEOUT sonucuyla döner"""
+    release = threading.Event()
+    session = MagicMock()
+    session.post.side_effect = lambda *a, **kw: release.wait(2)
+    monkeypatch.setattr(client, 'get_http_session', lambda: session)
+    monkeypatch.setattr(client, 'log_event', MagicMock())
+
+    start = time.perf_counter()
+    result = client.send_stock_update(
+        {'currentStockUnits': 50, 'dailyConsumptionUnits': 79, 'daysOfSupply': 0.63}, timeout=0.1)
+    release.set()
+
+    assert time.perf_counter() - start < 1
+    assert result['success'] is False
+    assert result['error_code'] == 'TIMEOUT'
+    assert result['retryable'] is True
+
+
+def test_get_scheduler_recreated_after_fork(monkeypatch):
+    """Başka process'ten devralınan zamanlayıcı kullanılmaz (thread'leri fork'ta kopyalanmaz)"""
+    shared = client.retry_scheduler
+    first = shared.get_scheduler()
+    assert shared.get_scheduler() is first
+
+    monkeypatch.setattr(shared, '_scheduler_pid', -1)
+    second = shared.get_scheduler()
+
+    assert second is not first
+    assert second.submit(lambda attempt: 'ok').result(timeout=2) == 'ok'
+
+
+def test_send_stock_update_timeout_bounds_each_attempt(monkeypatch):
+    """Deadline'a kalan süre denemenin HTTP timeout'u olur; varsayılan SOAP_REQUEST_TIMEOUT"""
+    session = MagicMock()
+    session.post.side_effect = ConnectionError('refused')
+    monkeypatch.setattr(client, 'get_http_session', lambda: session)
+    monkeypatch.setattr(client, 'log_event', MagicMock())
+    stock = {'currentStockUnits': 50, 'dailyConsumptionUnits': 79, 'daysOfSupply': 0.63}
+
+    client.send_stock_update(stock, max_retries=1, timeout=2)
+    assert 0 < session.post.call_args.kwargs['timeout'] <= 2
+
+    client.send_stock_update(stock, max_retries=1)
+    assert session.post.call_args.kwargs['timeout'] == client.SOAP_REQUEST_TIMEOUT
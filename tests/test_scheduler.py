@@ -0,0 +1,147 @@
+import sys
+import os
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from stock_monitor import scheduler as sched
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_scheduler(**kwargs):
+    clock = FakeClock()
+    return sched.AdaptiveScheduler(min_interval=2, max_interval=300, horizon_days=14,
+                                   clock=clock, **kwargs), clock
+
+
+def snapshot(rows):
+    return sched.batch_monitor.snapshot_from_rows(rows)
+
+
+# =========================
+# INTERVALS
+# =========================
+
+def test_next_intervals_scale_with_risk():
+    intervals = sched.next_intervals([1.0, 2.0, 9.0, 16.0, 60.0, np.inf], 2.0,
+                                     min_interval=2, max_interval=300, horizon_days=14)
+    assert intervals[0] == 2
+    assert intervals[1] == 2
+    assert 2 < intervals[2] < intervals[3]
+    assert intervals[3] == pytest.approx(300)
+    assert intervals[4] == 300 and intervals[5] == 300
+
+
+# =========================
+# HEAP
+# =========================
+
+def test_pop_due_returns_risky_skus_first():
+    scheduler, clock = make_scheduler()
+    scheduler.schedule(('H', 'SAFE'), 30.0, 2.0)
+    scheduler.schedule(('H', 'RISKY'), 1.5, 2.0)
+
+    clock.now = 2.0
+    assert scheduler.pop_due() == [('H', 'RISKY')]
+    assert scheduler.pop_due() == []
+    assert scheduler.seconds_until_next() == pytest.approx(298)
+
+    clock.now = 300.0
+    assert scheduler.pop_due() == [('H', 'SAFE')]
+    assert len(scheduler) == 0
+
+
+def test_reschedule_invalidates_old_entry():
+    scheduler, clock = make_scheduler()
+    key = ('H', 'P')
+    scheduler.schedule(key, 1.0, 2.0)
+    scheduler.schedule(key, 30.0, 2.0)
+
+    clock.now = 10.0
+    assert scheduler.pop_due() == []
+    assert len(scheduler) == 1
+
+
+def test_pop_due_respects_limit_and_remove():
+    scheduler, clock = make_scheduler()
+    for i in range(5):
+        scheduler.schedule(('H', f'P{i}'), 0.5, 2.0)
+    scheduler.remove(('H', 'P0'))
+
+    clock.now = 5.0
+    assert len(scheduler.pop_due(limit=3)) == 3
+    assert len(scheduler.pop_due()) == 1
+
+
+def test_checks_per_second_uses_window():
+    scheduler, clock = make_scheduler(rate_window=10)
+    clock.now = 10.0
+    scheduler.record_checks(50)
+    assert scheduler.checks_per_second() == pytest.approx(5.0)
+
+    clock.now = 25.0
+    assert scheduler.checks_per_second() == 0.0
+    assert scheduler.stats()['total_checks'] == 50
+
+
+# =========================
+# CYCLE
+# =========================
+
+def patch_db(monkeypatch, snap):
+    conn = MagicMock()
+
+    @contextmanager
+    def fake_connection():
+        yield conn
+
+    monkeypatch.setattr(sched.db_pool, "connection", fake_connection)
+    monkeypatch.setattr(sched.batch_monitor, "load_sku_snapshot", lambda conn, keys: snap)
+    monkeypatch.setattr(sched.batch_monitor, "load_stock_snapshot", lambda conn: snap)
+    monkeypatch.setattr(sched.batch_monitor, "record_alerts", lambda conn, rows: len(rows))
+    return conn
+
+
+def test_run_scheduled_cycle_checks_and_reschedules(monkeypatch):
+    snap = snapshot([('H', 'LOW', 100, 100, 2.0), ('H', 'OK', 3000, 100, None)])
+    patch_db(monkeypatch, snap)
+    scheduler, clock = make_scheduler()
+    dispatched = []
+
+    summary = sched.run_scheduled_cycle(scheduler, [('H', 'LOW'), ('H', 'OK')],
+                                        dispatch=dispatched.append)
+
+    assert summary['checked'] == 2
+    assert [r['product_code'] for r in dispatched] == ['LOW']
+    assert scheduler.due[('H', 'LOW')] == 2
+    assert scheduler.due[('H', 'OK')] == pytest.approx(300)
+    assert scheduler.total_checks == 2
+
+
+def test_run_scheduled_cycle_drops_deleted_skus(monkeypatch):
+    patch_db(monkeypatch, snapshot([('H', 'KEPT', 3000, 100, None)]))
+    scheduler, _ = make_scheduler()
+
+    sched.run_scheduled_cycle(scheduler, [('H', 'KEPT'), ('H', 'GONE')])
+    assert ('H', 'GONE') not in scheduler.due
+
+
+def test_run_scheduled_cycle_requeues_on_db_error(monkeypatch):
+    patch_db(monkeypatch, None)
+    monkeypatch.setattr(sched.batch_monitor, "load_sku_snapshot",
+                        MagicMock(side_effect=Exception("db down")))
+    scheduler, _ = make_scheduler()
+
+    with pytest.raises(Exception):
+        sched.run_scheduled_cycle(scheduler, [('H', 'P')])
+    assert scheduler.due[('H', 'P')] == 2
@@ -9,13 +9,14 @@ from soap_client.client import send_stock_update, create_soap_envelope
 
 # ============ SEND STOCK UPDATE TESTS ============
 
-@patch('soap_client.client.requests.post')
-def test_send_stock_update_success(mock_post):
+@patch('soap_client.client.get_http_session')
+def test_send_stock_update_success(mock_session):
     """send_stock_update başarılı çalışıyor mu?"""
+    mock_post = mock_session.return_value.post
 
     mock_response = MagicMock()
     mock_response.status_code = 200
-    mock_response.text = '''<?xml version="1.0"?>
+    mock_response.content = b'''<?xml version="1.0"?>
     <soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
         <soap:Body>
             <tns:StockUpdateResponse xmlns:tns="http://hospital-supply-chain.example.com/soap/stock">
@@ -39,12 +40,13 @@ def test_send_stock_update_success(mock_post):
     assert result is not None
     assert result['success'] == True
 
-@patch('soap_client.client.requests.post')
-def test_send_stock_update_no_order(mock_post):
+@patch('soap_client.client.get_http_session')
+def test_send_stock_update_no_order(mock_session):
     """send_stock_update - sipariş yok"""
+    mock_post = mock_session.return_value.post
     mock_response = MagicMock()
     mock_response.status_code = 200
-    mock_response.text = '''<?xml version="1.0"?>
+    mock_response.content = b'''<?xml version="1.0"?>
     <soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
         <soap:Body>
             <tns:StockUpdateResponse xmlns:tns="http://hospital-supply-chain.example.com/soap/stock">
@@ -68,16 +70,17 @@ def test_send_stock_update_no_order(mock_post):
     if result and 'orderTriggered' in result:
         assert result['orderTriggered'] == False
 
-@patch('soap_client.client.requests.post')
-def test_send_stock_update_retry(mock_post):
+@patch('soap_client.client.get_http_session')
+def test_send_stock_update_retry(mock_session):
     """send_stock_update retry mekanizması"""
+    mock_post = mock_session.return_value.post
    
     mock_response_fail = MagicMock()
     mock_response_fail.status_code = 500
     
     mock_response_success = MagicMock()
     mock_response_success.status_code = 200
-    mock_response_success.text = '''<?xml version="1.0"?>
+    mock_response_success.content = b'''<?xml version="1.0"?>
     <soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
         <soap:Body>
             <tns:StockUpdateResponse xmlns:tns="http://hospital-supply-chain.example.com/soap/stock">
@@ -104,9 +107,10 @@ def test_send_stock_update_retry(mock_post):
     result = send_stock_update(stock_data, max_retries=3)
     assert result is not None
 
-@patch('soap_client.client.requests.post')
-def test_send_stock_update_timeout(mock_post):
+@patch('soap_client.client.get_http_session')
+def test_send_stock_update_timeout(mock_session):
     """send_stock_update timeout"""
+    mock_post = mock_session.return_value.post
     mock_post.side_effect = Exception("Connection timeout")
     
     stock_data = {
@@ -118,12 +122,13 @@ def test_send_stock_update_timeout(mock_post):
     result = send_stock_update(stock_data, max_retries=1)
 
 
-@patch('soap_client.client.requests.post')
-def test_send_stock_update_creates_envelope(mock_post):
+@patch('soap_client.client.get_http_session')
+def test_send_stock_update_creates_envelope(mock_session):
     """send_stock_update SOAP envelope oluşturuyor mu?"""
+    mock_post = mock_session.return_value.post
     mock_response = MagicMock()
     mock_response.status_code = 200
-    mock_response.text = '''<?xml version="1.0"?>
+    mock_response.content = b'''<?xml version="1.0"?>
     <soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
         <soap:Body>
             <tns:StockUpdateResponse xmlns:tns="http://hospital-supply-chain.example.com/soap/stock">
@@ -149,5 +154,5 @@ def test_send_stock_update_creates_envelope(mock_post):
  
     call_args = mock_post.call_args
     sent_data = call_args[1]['data']
-    assert 'Hospital-C' in sent_data
-    assert 'PHYSIO-SALINE-500ML' in sent_data
\ No newline at end of file
+    assert b'Hospital-C' in sent_data
+    assert b'PHYSIO-SALINE-500ML' in sent_data
\ No newline at end of file
@@ -0,0 +1,98 @@
+import sys
+import os
+import subprocess
+import time
+from unittest.mock import MagicMock
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'utils')))
+
+import serving
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+# ============ OPTIONS / MODE TESTS ============
+
+def test_gunicorn_options_enable_threads_and_recycling():
+    options = serving.gunicorn_options('0.0.0.0', 8081, workers=3, threads=8, max_requests=500)
+
+    assert options['bind'] == '0.0.0.0:8081'
+    assert (options['workers'], options['threads']) == (3, 8)
+    assert options['worker_class'] == 'gthread'
+    assert options['max_requests'] == 500
+    assert options['max_requests_jitter'] == serving.WEB_MAX_REQUESTS_JITTER
+    assert options['graceful_timeout'] == serving.WEB_GRACEFUL_TIMEOUT
+    assert options['worker_exit'] is serving.worker_exit
+
+
+def test_serve_production_runs_gunicorn(monkeypatch):
+    pytest.importorskip('gunicorn')
+    run = MagicMock()
+    monkeypatch.setattr(serving, 'run_gunicorn', run)
+    app = MagicMock()
+
+    serving.serve(app, 'StockMS', 8081, argv=['--workers', '2', '--threads', '4'])
+
+    app.run.assert_not_called()
+    called_app, options = run.call_args.args
+    assert called_app is app
+    assert options['bind'] == '0.0.0.0:8081'
+    assert (options['workers'], options['threads']) == (2, 4)
+
+
+def test_serve_dev_mode_uses_flask_server():
+    app = MagicMock()
+    serving.serve(app, 'OrderMS', 8082, argv=['--mode', 'dev', '--port', '9000'])
+    app.run.assert_called_once_with(host='0.0.0.0', port=9000, debug=True)
+
+
+def test_worker_exit_flushes_event_log_and_closes_pool(monkeypatch):
+    flush, close = MagicMock(), MagicMock()
+    monkeypatch.setattr(serving.event_log_writer, 'flush', flush)
+    monkeypatch.setattr(serving.db_pool, 'close_pool', close)
+
+    serving.worker_exit(None, None)
+
+    flush.assert_called_once()
+    close.assert_called_once()
+
+
+# ============ RECYCLING TESTS ============
+
+def test_worker_recycling_keeps_service_available():
+    """
+    Tek worker her 5 istekte yenilenir. Stock gthread yenilenirken kabul ettiği bağlantıyı
+    kapatabilir; idempotent GET'i bir kez tekrar deneyen client hiç hata görmez.
+    """
+    pytest.importorskip('gunicorn')
+    port = 18500 + os.getpid() % 1000
+    env = dict(os.environ, WEB_MAX_REQUESTS_JITTER='0')
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'stockms', 'app.py'), '--host', '127.0.0.1', '--port', str(port),
+         '--workers', '1', '--threads', '2', '--max-requests', '5'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    url = f'http://127.0.0.1:{port}/health'
+    try:
+        deadline = time.time() + 20
+        while True:
+            try:
+                requests.get(url, timeout=1)
+                break
+            except requests.RequestException:
+                assert time.time() < deadline, 'StockMS açılmadı'
+                time.sleep(0.2)
+
+        session = requests.Session()
+        session.mount('http://', HTTPAdapter(max_retries=Retry(total=2, backoff_factor=0.05)))
+        statuses = [session.get(url, timeout=10).status_code for _ in range(30)]
+    finally:
+        process.terminate()
+        _, stderr = process.communicate(timeout=35)
+
+    assert statuses == [200] * 30
+    assert stderr.count('Autorestarting worker') >= 5
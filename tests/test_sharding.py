@@ -0,0 +1,173 @@
+import sys
+import os
+from contextlib import contextmanager
+from datetime import date
+from unittest.mock import MagicMock
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from stock_monitor import sharding
+
+
+class FakeLockDB:
+    """pg_try_advisory_lock / pg_advisory_unlock / pg_locks davranışını taklit eder"""
+
+    def __init__(self, workers=1, taken=()):
+        self.workers = workers
+        self.taken = set(taken)   # başka oturumların tuttuğu shard'lar
+        self.held = set()
+        self.closed = False
+
+    def cursor(self):
+        db = self
+        cursor = MagicMock()
+        state = {}
+
+        def execute(sql, params=None):
+            if "pg_stat_activity" in sql:
+                state['result'] = [(db.workers,)]
+            elif "pg_locks" in sql:
+                state['result'] = [(s,) for s in db.held]
+            elif "pg_try_advisory_lock" in sql:
+                shard = params[1]
+                ok = shard not in db.taken
+                if ok:
+                    db.held.add(shard)
+                state['result'] = [(ok,)]
+            elif "pg_advisory_unlock" in sql:
+                db.held.discard(params[1])
+                state['result'] = [(True,)]
+
+        cursor.execute.side_effect = execute
+        cursor.fetchone.side_effect = lambda: state['result'][0]
+        cursor.fetchall.side_effect = lambda: state['result']
+        return cursor
+
+    def close(self):
+        self.closed = True
+
+
+# =========================
+# PARTITIONING
+# =========================
+
+def test_fair_share():
+    assert sharding.fair_share(64, 1) == 64
+    assert sharding.fair_share(64, 3) == 22
+    assert sharding.fair_share(64, 0) == 64
+
+
+def test_shard_order_is_a_rotation_per_worker():
+    order = sharding.shard_order("host-a-1", 16)
+    assert sorted(order) == list(range(16))
+    assert order == sharding.shard_order("host-a-1", 16)
+
+
+def test_shard_filter_is_computed_in_postgres():
+    assert "hashtextextended" in sharding.LOAD_SHARDS_SQL
+    assert "%(shards)s" in sharding.LOAD_SHARDS_SQL
+
+
+# =========================
+# COORDINATION
+# =========================
+
+def test_rebalance_takes_fair_share_of_free_shards():
+    db = FakeLockDB(workers=4)
+    coordinator = sharding.ShardCoordinator("w1", shard_count=16, connect=lambda: db)
+    assert len(coordinator.rebalance()) == 4
+    assert db.held == set(coordinator.owned)
+
+
+def test_rebalance_skips_shards_locked_by_others():
+    db = FakeLockDB(workers=2, taken=range(8))
+    coordinator = sharding.ShardCoordinator("w1", shard_count=16, connect=lambda: db)
+    assert coordinator.rebalance() == list(range(8, 16))
+
+
+def test_rebalance_releases_extras_when_workers_join():
+    db = FakeLockDB(workers=1)
+    coordinator = sharding.ShardCoordinator("w1", shard_count=16, connect=lambda: db)
+    assert len(coordinator.rebalance()) == 16
+
+    db.workers = 4
+    assert len(coordinator.rebalance()) == 4
+    assert len(db.held) == 4
+
+
+def test_rebalance_picks_up_shards_of_dead_worker():
+    db = FakeLockDB(workers=2, taken=range(8))
+    coordinator = sharding.ShardCoordinator("w1", shard_count=16, connect=lambda: db)
+    coordinator.rebalance()
+
+    db.workers, db.taken = 1, set()
+    assert coordinator.rebalance() == list(range(16))
+
+
+def test_rebalance_drops_ownership_when_session_lost():
+    db = FakeLockDB(workers=1)
+    coordinator = sharding.ShardCoordinator("w1", shard_count=4, connect=lambda: db)
+    coordinator.rebalance()
+
+    coordinator.conn = MagicMock(closed=False)
+    coordinator.conn.cursor.side_effect = Exception("connection lost")
+    assert coordinator.rebalance() == []
+    assert coordinator.conn is None
+
+
+# =========================
+# CYCLE
+# =========================
+
+def test_run_shard_cycle_without_shards_skips_db(monkeypatch):
+    connection = MagicMock()
+    monkeypatch.setattr(sharding.db_pool, "connection", connection)
+    assert sharding.run_shard_cycle([])['skus'] == 0
+    connection.assert_not_called()
+
+
+def test_run_shard_cycle_consumes_and_dispatches(monkeypatch):
+    conn = MagicMock()
+    cursor = MagicMock()
+    conn.cursor.return_value = cursor
+    cursor.fetchall.side_effect = [
+        [(1, 'H', 'LOW', 150, 100, None), (2, 'H', 'OK', 5000, 100, None)],
+        [('H', 'LOW', 90, 100, None), ('H', 'OK', 4900, 100, None)],
+    ]
+
+    @contextmanager
+    def fake_connection():
+        yield conn
+
+    monkeypatch.setattr(sharding.db_pool, "connection", fake_connection)
+    monkeypatch.setattr(sharding.batch_monitor, "record_alerts", lambda conn, rows: len(rows))
+    monkeypatch.setattr(sharding, "simulate_consumption",
+                        lambda base, n, days, on_date, rng: np.array([[[60, 100]]]))
+    dispatched = []
+
+    summary = sharding.run_shard_cycle([0, 1], 4, dispatch=dispatched.append, consume=True)
+
+    assert summary['skus'] == 2
+    assert [r['product_code'] for r in dispatched] == ['LOW']
+    consume_params = cursor.execute.call_args_list[1][0][1]
+    assert consume_params['ids'] == [1, 2]
+    assert consume_params['units'] == [60, 100]
+    assert consume_params['opening'] == [150, 5000]
+    assert "FOR UPDATE" in cursor.execute.call_args_list[0][0][0]
+    conn.commit.assert_called()
+
+
+def test_run_shard_cycle_rolls_back_on_error(monkeypatch):
+    conn = MagicMock()
+    conn.cursor.return_value.execute.side_effect = Exception("boom")
+
+    @contextmanager
+    def fake_connection():
+        yield conn
+
+    monkeypatch.setattr(sharding.db_pool, "connection", fake_connection)
+    with pytest.raises(Exception):
+        sharding.run_shard_cycle([0], 4)
+    conn.rollback.assert_called_once()
@@ -0,0 +1,69 @@
+import sys
+import os
+from datetime import date
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import stock_monitor.simulation as simulation
+
+MONDAY = date(2026, 1, 5)
+
+
+# =========================
+# CONSUMPTION MODEL
+# =========================
+
+def test_simulate_consumption_shape_and_bounds():
+    rng = np.random.default_rng(1)
+    consumption = simulation.simulate_consumption([100, 10], 1000, 7, MONDAY, rng)
+    assert consumption.shape == (1000, 7, 2)
+
+    weekday = consumption[:, :5, 0]
+    assert weekday.min() >= 85
+    assert weekday.max() <= int(100 * 1.15 * 1.5)
+
+
+def test_simulate_consumption_weekend_factor():
+    rng = np.random.default_rng(2)
+    consumption = simulation.simulate_consumption([100], 20000, 7, MONDAY, rng)
+    weekday_mean = consumption[:, :5, 0].mean()
+    weekend_mean = consumption[:, 5:, 0].mean()
+    assert weekend_mean == pytest.approx(weekday_mean * 0.7, rel=0.02)
+
+
+def test_weekend_mask():
+    assert simulation.weekend_mask(7, MONDAY).tolist() == [False] * 5 + [True, True]
+
+
+# =========================
+# SIMULATION
+# =========================
+
+def test_run_simulation_is_reproducible_with_seed():
+    a = simulation.run_simulation(500, 79, trajectories=200, days=10, seed=7, start_date=MONDAY)
+    b = simulation.run_simulation(500, 79, trajectories=200, days=10, seed=7, start_date=MONDAY)
+    assert np.array_equal(a['final_stock'], b['final_stock'])
+
+
+def test_run_simulation_stockout_probabilities():
+    result = simulation.run_simulation([100, 100000], [79, 79], trajectories=500, days=10,
+                                       seed=3, start_date=MONDAY)
+    summary = simulation.summarize(result)
+    assert summary[0]['stockout_probability'] == 1.0
+    assert summary[1]['stockout_probability'] == 0.0
+    assert summary[1]['time_to_threshold']['p50'] is None
+
+
+def test_run_simulation_chunked_matches_shape(monkeypatch):
+    monkeypatch.setattr(simulation, "MAX_CHUNK_ELEMENTS", 50)
+    result = simulation.run_simulation(300, 79, trajectories=101, days=10, seed=4)
+    assert result['time_to_stockout'].shape == (101, 1)
+    assert not np.isnan(result['time_to_threshold']).any()
+
+
+def test_recommend_threshold_covers_lead_time():
+    threshold = simulation.recommend_threshold([79], lead_time_days=3, service_level=0.95,
+                                               trajectories=5000, seed=5, start_date=MONDAY)
+    assert 3.0 <= threshold[0] <= 3.0 * 1.15 * 1.5
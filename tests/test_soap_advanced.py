@@ -10,7 +10,8 @@ from soap_client.client import (
     get_current_stock,
     create_soap_envelope,
     parse_soap_response,
-    log_event
+    log_event,
+    flush_events
 )
 
 # ============ SOAP ENVELOPE ADVANCED TESTS ============
@@ -120,6 +121,7 @@ def test_parse_response_malformed():
 def test_log_event_success():
     """Başarılı event logging"""
     log_event('TEST_SUCCESS', 'SUCCESS', 'test payload', None, 50)
+    assert flush_events()
     
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -140,6 +142,7 @@ def test_log_event_success():
 def test_log_event_failure():
     """Başarısız event logging"""
     log_event('TEST_FAILURE', 'FAILURE', 'fail payload', 'Test error message', 200)
+    assert flush_events()
     
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -0,0 +1,250 @@
+import sys
+import os
+import pytest
+import requests
+from unittest.mock import MagicMock
+from urllib3.exceptions import NewConnectionError
+from xml.etree import ElementTree as ET
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from soap_client import client
+from soap_client.envelope import build_batch_envelope, TNS_NS, STOCK_NS
+from soap_client.response import parse_batch_response
+
+
+def make_items(n):
+    return [{
+        'productCode': f'SKU-{i:03d}',
+        'currentStockUnits': 10 + i,
+        'dailyConsumptionUnits': 20,
+        'daysOfSupply': (10 + i) / 20
+    } for i in range(n)]
+
+
+def batch_response(results):
+    body = ''.join(
+        f'<tns:result><tns:hospitalId>Hospital-C</tns:hospitalId>'
+        f'<tns:productCode>{code}</tns:productCode><tns:success>true</tns:success>'
+        f'<tns:message>ok {code}</tns:message><tns:orderTriggered>{str(order).lower()}</tns:orderTriggered>'
+        f'{"<tns:orderId>ORD-" + code + "</tns:orderId>" if order else ""}</tns:result>'
+        for code, order in results
+    )
+    return f'''<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
+        <soap:Body><tns:StockUpdateBatchResponse xmlns:tns="{STOCK_NS}">{body}
+        </tns:StockUpdateBatchResponse></soap:Body></soap:Envelope>'''.encode('utf-8')
+
+
+def fault_response(code, text='Unknown operation'):
+    return f'''<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
+        <soap:Body><soap:Fault><faultcode>{code}</faultcode>
+        <faultstring>{text}</faultstring></soap:Fault></soap:Body></soap:Envelope>'''.encode('utf-8')
+
+
+@pytest.fixture
+def soap(monkeypatch):
+    """Batch desteği açık, HTTP session / tekli gönderim / log mock'lu client"""
+    monkeypatch.setattr(client, '_batch_disabled_until', 0.0)
+    session = MagicMock()
+    single = MagicMock(side_effect=lambda item, **kwargs: {'success': True, 'single': item['productCode']})
+    monkeypatch.setattr(client, 'get_http_session', lambda: session)
+    monkeypatch.setattr(client, 'send_stock_update', single)
+    monkeypatch.setattr(client, 'log_event', MagicMock())
+    return session.post, single
+
+
+def respond(post, status, content):
+    response = MagicMock()
+    response.status_code = status
+    response.content = content
+    post.return_value = response
+
+
+# ============ BATCH ENVELOPE TESTS ============
+
+def test_build_batch_envelope_contains_every_item():
+    """Her kalem ayrı <tns:request> bloğunda"""
+    root = ET.fromstring(build_batch_envelope(make_items(3)))
+    requests = root.findall(f'.//{{{TNS_NS}}}StockUpdateBatch/{{{TNS_NS}}}request')
+    codes = [r.find(f'{{{STOCK_NS}}}productCode').text for r in requests]
+    assert codes == ['SKU-000', 'SKU-001', 'SKU-002']
+
+
+def test_parse_batch_response_non_batch_body():
+    """Tekli yanıt batch yanıtı sayılmaz"""
+    xml = b'''<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"><soap:Body>
+        <tns:StockUpdateResponse xmlns:tns="http://hospital-supply-chain.example.com/soap">
+        <tns:success>true</tns:success></tns:StockUpdateResponse></soap:Body></soap:Envelope>'''
+    assert parse_batch_response(xml)['results'] is None
+
+
+# ============ SEND STOCK UPDATES TESTS ============
+
+def test_send_stock_updates_maps_results_by_sku(soap):
+    """Sırası karışık sonuçlar doğru SKU'ya eşleniyor mu?"""
+    post, single = soap
+    respond(post, 200, batch_response([('SKU-002', True), ('SKU-000', False), ('SKU-001', False)]))
+
+    results = client.send_stock_updates(make_items(3))
+
+    assert post.call_count == 1
+    assert post.call_args[1]['headers']['SOAPAction'] == client.STOCK_UPDATE_BATCH_ACTION
+    assert [r['response']['message'] for r in results] == ['ok SKU-000', 'ok SKU-001', 'ok SKU-002']
+    assert results[2]['response']['orderId'] == 'ORD-SKU-002'
+    assert all(r['batched'] for r in results)
+    single.assert_not_called()
+
+
+def test_send_stock_updates_splits_into_batches(soap):
+    """batch_size aşılınca birden çok envelope"""
+    post, single = soap
+    items = make_items(5)
+    post.side_effect = lambda *a, **k: MagicMock(
+        status_code=200,
+        content=batch_response([(code, False) for code in
+                                [i['productCode'] for i in items] if code.encode() in k['data']]))
+
+    results = client.send_stock_updates(items, batch_size=2)
+
+    assert post.call_count == 3
+    assert all(r['batched'] for r in results)
+
+
+def batch_enabled():
+    return client._batch_disabled_until <= client.time.monotonic()
+
+
+def test_send_stock_updates_missing_result_is_not_resent(soap):
+    """Yanıtta olmayan kalem tekrar gönderilmez; tekrar denenebilir hata olarak döner"""
+    post, single = soap
+    respond(post, 200, batch_response([('SKU-000', False)]))
+
+    results = client.send_stock_updates(make_items(2))
+
+    assert results[0]['batched'] is True
+    assert results[1]['success'] is False
+    assert results[1]['error_code'] == 'BATCH_RESULT_MISSING'
+    assert results[1]['retryable'] is True
+    single.assert_not_called()
+    assert batch_enabled()
+
+
+@pytest.mark.parametrize('status,content', [
+    (404, b''),
+    (501, b''),
+    (500, fault_response('soap:Client', 'Operation StockUpdateBatch is not supported')),
+    (500, fault_response('a:ActionNotSupported', 'ContractFilter mismatch at the EndpointDispatcher')),
+])
+def test_send_stock_updates_rejected_disables_batch(soap, status, content, monkeypatch):
+    """Batch desteklenmiyorsa kalemler tekli gider ve batch SOAP_BATCH_RETRY_AFTER boyunca kapanır"""
+    post, single = soap
+    respond(post, status, content)
+
+    results = client.send_stock_updates(make_items(3))
+
+    assert [r['single'] for r in results] == ['SKU-000', 'SKU-001', 'SKU-002']
+    assert not batch_enabled()
+
+    client.send_stock_updates(make_items(2))
+    assert post.call_count == 1
+
+    # Süre dolunca batch tekrar denenir
+    monkeypatch.setattr(client, '_batch_disabled_until', client.time.monotonic() - 1)
+    client.send_stock_updates(make_items(2))
+    assert post.call_count == 2
+
+
+@pytest.mark.parametrize('status,content,retryable', [
+    (500, fault_response('soap:Server'), True),
+    (500, fault_response('soap:Client', 'Invalid productCode'), False),
+    (400, b'', False),
+    (200, b'<html>not soap</html>', True),
+])
+def test_send_stock_updates_failed_chunk_is_not_resent(soap, status, content, retryable):
+    """İstek uzak tarafa ulaştıktan sonraki hata kalemleri tekli göndermez; batch açık kalır"""
+    post, single = soap
+    respond(post, status, content)
+    post.return_value.text = ''
+
+    results = client.send_stock_updates(make_items(2))
+
+    single.assert_not_called()
+    assert [r['success'] for r in results] == [False, False]
+    assert [r['retryable'] for r in results] == [retryable, retryable]
+    assert batch_enabled()
+
+
+def test_send_stock_updates_read_timeout_is_not_resent(soap):
+    """Okuma timeout'unda kalemler işlenmiş olabilir; tekli çağrı yapılmaz"""
+    post, single = soap
+    post.side_effect = requests.exceptions.ReadTimeout('read timed out')
+
+    results = client.send_stock_updates(make_items(2))
+
+    single.assert_not_called()
+    assert all(r['retryable'] and r['error_code'] == 'TIMEOUT' for r in results)
+
+
+def test_send_stock_updates_connect_error_falls_back(soap):
+    """Bağlantı hiç kurulamadıysa istek gitmedi; kalemler tekli çağrılarla gönderilir"""
+    post, single = soap
+    post.side_effect = requests.exceptions.ConnectionError(
+        MagicMock(reason=NewConnectionError(None, 'connection refused')))
+
+    results = client.send_stock_updates(make_items(2))
+
+    assert [r['single'] for r in results] == ['SKU-000', 'SKU-001']
+    assert batch_enabled()
+
+
+def test_send_stock_updates_passes_max_retries_to_fallback(soap):
+    """Retry'ı çağıran yapıyorsa (outbox relay) tekli çağrılar tek deneme yapar"""
+    post, single = soap
+    respond(post, 404, b'')
+
+    client.send_stock_updates(make_items(1), max_retries=1)
+
+    assert single.call_args.kwargs['max_retries'] == 1
+
+
+def test_send_stock_updates_bounds_requests_by_timeout(soap):
+    """Batch isteği kalan süreyle sınırlanır; süre dolunca kalan kalemler gönderilmez"""
+    post, single = soap
+    items = make_items(4)
+
+    def slow_post(*args, **kwargs):
+        client.time.sleep(0.1)
+        codes = [i['productCode'] for i in items if i['productCode'].encode() in kwargs['data']]
+        return MagicMock(status_code=200, content=batch_response([(code, False) for code in codes]))
+
+    post.side_effect = slow_post
+    results = client.send_stock_updates(items, batch_size=1, timeout=0.05)
+
+    timeouts = [call.kwargs['timeout'] for call in post.call_args_list]
+    assert len(timeouts) == 1
+    assert 0 < timeouts[0] <= 0.05
+    assert [r['success'] for r in results] == [True, False, False, False]
+    assert all(r['error_code'] == 'TIMEOUT' and r['retryable'] for r in results[1:])
+    single.assert_not_called()
+
+
+def test_send_stock_updates_fallback_gets_remaining_time(soap):
+    """Tekli fallback çağrıları kalan süreyi timeout olarak alır"""
+    post, single = soap
+    respond(post, 404, b'')
+
+    client.send_stock_updates(make_items(1), timeout=5)
+
+    assert 0 < single.call_args.kwargs['timeout'] <= 5
+
+
+def test_map_batch_results_duplicates_and_unkeyed():
+    """Aynı SKU iki kez: gönderim sırasıyla; anahtarsız sonuç boş kaleme"""
+    items = [{'productCode': 'A'}, {'productCode': 'A'}, {'productCode': 'B'}]
+    results = [
+        {'productCode': 'A', 'hospitalId': None, 'message': 'first'},
+        {'productCode': None, 'hospitalId': None, 'message': 'unkeyed'},
+        {'productCode': 'A', 'hospitalId': 'Hospital-C', 'message': 'second'},
+    ]
+    mapped = client.map_batch_results(items, results)
+    assert [m['message'] for m in mapped] == ['first', 'second', 'unkeyed']
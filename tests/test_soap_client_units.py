@@ -10,7 +10,8 @@ from soap_client.client import (
     get_current_stock,
     create_soap_envelope,
     parse_soap_response,
-    log_event
+    log_event,
+    flush_events
 )
 
 # =========================
@@ -27,6 +28,7 @@ def test_get_db_connection_failure(monkeypatch):
     """Coverage booster – DB connection failure"""
     import soap_client.client as client
 
+    client.db_pool.close_pool()
     monkeypatch.setattr(
         client.psycopg2,
         "connect",
@@ -141,6 +143,7 @@ def test_parse_soap_response_none():
 
 def test_log_event():
     log_event('TEST', 'SUCCESS', 'payload', None, 100)
+    assert flush_events()
 
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -180,3 +183,41 @@ def test_parse_soap_response_missing_tags():
     assert result["success"] is True
 
 
+
+
+# =========================
+# HTTP SESSION (keep-alive)
+# =========================
+
+def test_http_session_is_shared_and_pooled():
+    from soap_client import client
+
+    client.http_session.close_session()
+    session = client.get_http_session()
+    assert client.get_http_session() is session
+
+    adapter = session.get_adapter("https://example.com")
+    assert adapter._pool_maxsize == client.http_session.HTTP_POOL_MAXSIZE
+    assert adapter.max_retries.total == 0
+    client.http_session.close_session()
+
+
+def test_warmup_opens_requested_connections():
+    from soap_client import client
+
+    session = MagicMock()
+    opened = client.http_session.warmup("https://soap.example.com/CentralServices",
+                                        connections=3, session=session)
+    assert opened == 3
+    assert session.head.call_count == 3
+    assert session.head.call_args[0][0] == "https://soap.example.com/"
+
+
+def test_warmup_connections_disabled_by_default(monkeypatch):
+    from soap_client import client
+
+    warmup = MagicMock()
+    monkeypatch.setattr(client.http_session, "warmup", warmup)
+    monkeypatch.setattr(client, "SOAP_WARMUP_CONNECTIONS", 0)
+    assert client.warmup_connections() == 0
+    warmup.assert_not_called()
@@ -0,0 +1,81 @@
+import sys
+import os
+from datetime import datetime
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from soap_client.envelope import build_envelope, build_envelopes, STOCK_NS
+
+STOCK = {'currentStockUnits': 150, 'dailyConsumptionUnits': 79, 'daysOfSupply': 1.8987}
+TS = datetime(2026, 1, 5, 10, 30, 0)
+
+
+def field(envelope, name):
+    return ET.fromstring(envelope).find(f'.//{{{STOCK_NS}}}{name}').text
+
+
+# =========================
+# OUTPUT
+# =========================
+
+def test_build_envelope_returns_parseable_bytes():
+    envelope = build_envelope(STOCK, TS)
+    assert isinstance(envelope, bytes)
+    assert envelope.startswith(b'<?xml version="1.0" encoding="UTF-8"?>')
+    assert field(envelope, 'hospitalId') == 'Hospital-C'
+    assert field(envelope, 'productCode') == 'PHYSIO-SALINE-500ML'
+    assert field(envelope, 'currentStockUnits') == '150'
+    assert field(envelope, 'daysOfSupply') == '1.90'
+    assert field(envelope, 'timestamp') == '2026-01-05T10:30:00'
+
+
+def test_build_envelope_matches_previous_layout():
+    legacy = f"""<?xml version="1.0" encoding="UTF-8"?>
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"
+               xmlns:tns="http://hospital-supply-chain.example.com/soap"
+               xmlns:stock="http://hospital-supply-chain.example.com/soap/stock">
+    <soap:Body>
+        <tns:StockUpdate>
+            <tns:request>
+                <stock:hospitalId>Hospital-C</stock:hospitalId>
+                <stock:productCode>PHYSIO-SALINE-500ML</stock:productCode>
+                <stock:currentStockUnits>150</stock:currentStockUnits>
+                <stock:dailyConsumptionUnits>79</stock:dailyConsumptionUnits>
+                <stock:daysOfSupply>1.90</stock:daysOfSupply>
+                <stock:timestamp>{TS.isoformat()}</stock:timestamp>
+            </tns:request>
+        </tns:StockUpdate>
+    </soap:Body>
+</soap:Envelope>"""
+    assert build_envelope(STOCK, TS) == legacy.encode('utf-8')
+
+
+# =========================
+# ESCAPING
+# =========================
+
+def test_build_envelope_escapes_markup_in_fields():
+    data = dict(STOCK, hospitalId='Hospital <C> & Sons', productCode='SALINE&<0.9%>')
+    envelope = build_envelope(data, TS)
+    assert b'&amp;' in envelope and b'&lt;' in envelope
+    assert field(envelope, 'hospitalId') == 'Hospital <C> & Sons'
+    assert field(envelope, 'productCode') == 'SALINE&<0.9%>'
+
+
+def test_build_envelope_encodes_non_ascii_as_utf8():
+    envelope = build_envelope(dict(STOCK, hospitalId='Hastane-Çankaya'), TS)
+    assert field(envelope, 'hospitalId') == 'Hastane-Çankaya'
+
+
+# =========================
+# BATCH
+# =========================
+
+def test_build_envelopes_batch_shares_timestamp():
+    items = [dict(STOCK, productCode=f'SKU-{i}', currentStockUnits=i) for i in range(1000)]
+    envelopes = build_envelopes(items, TS)
+    assert len(envelopes) == 1000
+    assert field(envelopes[42], 'productCode') == 'SKU-42'
+    assert field(envelopes[42], 'currentStockUnits') == '42'
+    assert {field(e, 'timestamp') for e in envelopes[:10]} == {TS.isoformat()}
@@ -0,0 +1,135 @@
+import sys
+import os
+from unittest.mock import MagicMock
+import pytest
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from soap_client import client
+from soap_client.faults import (SoapFaultError, fault_class, fault_error, response_error,
+                                is_retryable, error_code, format_error)
+
+
+def fault_body(code, error_code=None, message='Invalid namespace'):
+    detail = ''
+    if error_code:
+        detail = f'''<detail><tns:StockUpdateFault xmlns:tns="http://hospital-supply-chain.example.com/soap/stock">
+            <tns:errorCode>{error_code}</tns:errorCode><tns:errorMessage>{message}</tns:errorMessage>
+            </tns:StockUpdateFault></detail>'''
+    return f'''<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"><soap:Body>
+        <soap:Fault><faultcode>{code}</faultcode><faultstring>{message}</faultstring>{detail}</soap:Fault>
+        </soap:Body></soap:Envelope>'''.encode()
+
+
+STOCK = {'currentStockUnits': 50, 'dailyConsumptionUnits': 79, 'daysOfSupply': 0.63}
+
+
+@pytest.fixture
+def soap(monkeypatch):
+    session = MagicMock()
+    log = MagicMock()
+    monkeypatch.setattr(client, 'get_http_session', lambda: session)
+    monkeypatch.setattr(client, 'log_event', log)
+    monkeypatch.setattr(client, 'SOAP_RETRY_BASE_DELAY', 0.001)
+    return session, log
+
+
+def logged(log):
+    return [(c.kwargs['status'], c.kwargs['error_message']) for c in log.call_args_list]
+
+
+# ============ CLASSIFICATION TESTS ============
+
+def test_fault_class_strips_prefix_and_subcode():
+    assert fault_class('soap:Client') == 'Client'
+    assert fault_class('SOAP-ENV:Client.Validation') == 'Client'
+    assert fault_class('Server') == 'Server'
+
+
+def test_client_fault_is_permanent_with_error_code():
+    """Client fault (şema/namespace) kalıcı; kod detail errorCode'u içerir"""
+    error = response_error(500, fault_body('soap:Client', 'SCHEMA_VALIDATION'))
+    assert error.retryable is False
+    assert error.code == 'soap:Client/SCHEMA_VALIDATION'
+    assert str(error) == '[soap:Client/SCHEMA_VALIDATION] Invalid namespace (HTTP 500)'
+
+
+def test_server_fault_is_retryable():
+    error = response_error(500, fault_body('soap:Server', message='DB busy'))
+    assert error.retryable is True
+    assert error.code == 'soap:Server'
+
+
+@pytest.mark.parametrize('status,retryable', [(400, False), (404, False), (415, False),
+                                              (500, True), (503, True), (429, True)])
+def test_http_status_without_fault(status, retryable):
+    error = response_error(status, b'<html>oops</html>', 'oops')
+    assert error.retryable is retryable
+    assert error.code == f'HTTP_{status}'
+
+
+def test_unknown_fault_code_falls_back_to_http_status():
+    assert fault_error({'faultCode': 'tns:Quota'}, 400).retryable is False
+    assert fault_error({'faultCode': 'tns:Quota'}, 500).retryable is True
+
+
+def test_network_errors_are_retryable_and_coded():
+    timeout = requests.exceptions.Timeout('read timed out')
+    assert is_retryable(timeout)
+    assert error_code(timeout) == 'TIMEOUT'
+    assert format_error(ConnectionError('refused')) == '[CONNECTION_ERROR] refused'
+
+
+# ============ SOAP CLIENT TESTS ============
+
+def test_permanent_fault_fails_fast_without_retry(soap):
+    """Client fault: tek deneme, RETRY yok, FAILURE satırında fault kodu"""
+    session, log = soap
+    session.post.return_value = MagicMock(status_code=500, text='fault',
+                                          content=fault_body('soap:Client', 'NAMESPACE_MISMATCH'))
+
+    result = client.send_stock_update(STOCK, max_retries=3)
+
+    assert session.post.call_count == 1
+    assert result['success'] is False
+    assert result['attempts'] == 1
+    assert result['retryable'] is False
+    assert result['error_code'] == 'soap:Client/NAMESPACE_MISMATCH'
+    assert logged(log) == [('FAILURE', '[soap:Client/NAMESPACE_MISMATCH] Invalid namespace (HTTP 500)')]
+
+
+def test_transient_fault_is_retried(soap):
+    session, log = soap
+    session.post.return_value = MagicMock(status_code=500, text='fault',
+                                          content=fault_body('soap:Server', message='busy'))
+
+    result = client.send_stock_update(STOCK, max_retries=3)
+
+    assert session.post.call_count == 3
+    assert result['retryable'] is True
+    assert [status for status, _ in logged(log)] == ['RETRY', 'RETRY', 'FAILURE']
+    assert all(message.startswith('[soap:Server]') for _, message in logged(log))
+
+
+def test_fault_in_http_200_body_is_not_success(soap):
+    session, log = soap
+    session.post.return_value = MagicMock(status_code=200, content=fault_body('soap:Client'))
+
+    result = client.send_stock_update(STOCK, max_retries=3)
+
+    assert result['success'] is False
+    assert session.post.call_count == 1
+    assert logged(log)[0][1].startswith('[soap:Client]')
+
+
+def test_permanent_faults_do_not_trip_breaker(soap):
+    """Uzak taraf cevap verdiği için kalıcı fault'lar devreyi açmaz"""
+    session, _ = soap
+    session.post.return_value = MagicMock(status_code=400, text='bad request', content=b'')
+
+    for _ in range(client.soap_breaker.min_calls + 1):
+        client.send_stock_update(STOCK, max_retries=3)
+
+    assert client.breaker_stats()['state'] == 'CLOSED'
+    assert client.breaker_stats()['window_failures'] == 0
@@ -0,0 +1,144 @@
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from soap_client.response import parse_response, RESPONSE_NAMESPACES
+from soap_client.client import parse_soap_response
+from soap_client.faults import fault_error
+
+
+def response_xml(ns, order_id=True):
+    order = '<tns:orderId>ORD-9</tns:orderId>' if order_id else ''
+    return f'''<?xml version="1.0" encoding="UTF-8"?>
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
+    <soap:Body>
+        <tns:StockUpdateResponse xmlns:tns="{ns}">
+            <tns:success>true</tns:success>
+            <tns:message>Order &amp; restock created</tns:message>
+            <tns:orderTriggered>true</tns:orderTriggered>
+            {order}
+        </tns:StockUpdateResponse>
+    </soap:Body>
+</soap:Envelope>'''.encode('utf-8')
+
+
+FAULT_XML = b'''<?xml version="1.0" encoding="UTF-8"?>
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
+    <soap:Body>
+        <soap:Fault>
+            <faultcode>soap:Client</faultcode>
+            <faultstring>Invalid request</faultstring>
+            <detail>
+                <tns:StockUpdateFault xmlns:tns="http://hospital-supply-chain.example.com/soap/stock">
+                    <tns:errorCode>INVALID_HOSPITAL</tns:errorCode>
+                    <tns:errorMessage>Unknown hospital Hospital-Z</tns:errorMessage>
+                    <tns:hospitalId>Hospital-Z</tns:hospitalId>
+                    <tns:timestamp>2026-01-08T10:00:00</tns:timestamp>
+                </tns:StockUpdateFault>
+            </detail>
+        </soap:Fault>
+    </soap:Body>
+</soap:Envelope>'''
+
+
+# ============ STREAMING PARSE TESTS ============
+
+@pytest.mark.parametrize('ns', RESPONSE_NAMESPACES)
+def test_parse_response_both_namespaces(ns):
+    """Client ve WSDL namespace'leri aynı sonucu veriyor mu?"""
+    result = parse_response(response_xml(ns))
+    assert result == {
+        'success': True,
+        'message': 'Order & restock created',
+        'orderTriggered': True,
+        'orderId': 'ORD-9',
+        'fault': None
+    }
+
+
+def test_parse_response_small_chunks():
+    """Etiketler parça sınırlarında bölündüğünde de doğru parse"""
+    body = response_xml(RESPONSE_NAMESPACES[1])
+    chunks = (body[i:i + 7] for i in range(0, len(body), 7))
+    result = parse_response(chunks)
+    assert result['orderId'] == 'ORD-9'
+    assert result['success'] is True
+
+
+def test_parse_response_stops_early():
+    """Dört alan bulununca kalan gövde okunmuyor mu?"""
+    body = response_xml(RESPONSE_NAMESPACES[0])
+    cut = body.index(b'</tns:orderId>') + len(b'</tns:orderId>')
+
+    def chunks():
+        yield body[:cut]
+        raise AssertionError('gövdenin kalanı okunmamalı')
+
+    assert parse_response(chunks())['orderId'] == 'ORD-9'
+
+
+def test_parse_response_without_order_id_stops_at_response_end():
+    """orderId yoksa StockUpdateResponse kapanışında durur"""
+    body = response_xml(RESPONSE_NAMESPACES[0], order_id=False)
+    cut = body.index(b'</tns:StockUpdateResponse>') + len(b'</tns:StockUpdateResponse>')
+
+    result = parse_response([body[:cut], b'<<< okunmaz'])
+    assert result['orderTriggered'] is True
+    assert result['orderId'] is None
+
+
+# ============ SOAP FAULT TESTS ============
+
+def test_parse_response_fault_details():
+    """SOAP Fault ve StockUpdateFault detayı"""
+    result = parse_response(FAULT_XML)
+    assert result['success'] is False
+    assert result['message'] == 'Unknown hospital Hospital-Z'
+    assert result['fault'] == {
+        'faultCode': 'soap:Client',
+        'faultString': 'Invalid request',
+        'errorCode': 'INVALID_HOSPITAL',
+        'errorMessage': 'Unknown hospital Hospital-Z',
+        'hospitalId': 'Hospital-Z',
+        'timestamp': '2026-01-08T10:00:00'
+    }
+
+
+def test_parse_soap_response_fault_without_detail():
+    """Detail yoksa mesaj faultstring'den gelir"""
+    xml = '''<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
+        <soap:Body><soap:Fault>
+            <faultcode>soap:Server</faultcode><faultstring>Database unavailable</faultstring>
+        </soap:Fault></soap:Body></soap:Envelope>'''
+    result = parse_soap_response(xml)
+    assert result['success'] is False
+    assert result['message'] == 'Database unavailable'
+    assert result['fault']['faultCode'] == 'soap:Server'
+
+
+@pytest.mark.parametrize('code,retryable', [('env:Sender', False), ('env:Receiver', True)])
+def test_parse_response_soap12_fault(code, retryable):
+    """SOAP 1.2 Fault: Code/Value ve Reason/Text; Subcode değeri faultCode'u ezmez"""
+    xml = f'''<env:Envelope xmlns:env="http://www.w3.org/2003/05/soap-envelope">
+        <env:Body><env:Fault>
+            <env:Code><env:Value>{code}</env:Value>
+                <env:Subcode><env:Value>m:StockUpdate</env:Value></env:Subcode></env:Code>
+            <env:Reason><env:Text xml:lang="en">Stock update failed</env:Text>
+                <env:Text xml:lang="tr">Stok güncellenemedi</env:Text></env:Reason>
+        </env:Fault></env:Body></env:Envelope>'''.encode('utf-8')
+    result = parse_response(xml)
+    assert result['success'] is False
+    assert result['message'] == 'Stock update failed'
+    assert result['fault'] == {'faultCode': code, 'faultString': 'Stock update failed'}
+    assert fault_error(result['fault'], 500).retryable is retryable
+
+
+def test_parse_response_truncated_raises():
+    """Kesik XML parse_response'ta hata, parse_soap_response'ta güvenli sonuç"""
+    body = response_xml(RESPONSE_NAMESPACES[0])
+    truncated = body[:body.index(b'<tns:success>')]
+    with pytest.raises(Exception):
+        parse_response(truncated)
+    assert parse_soap_response(truncated)['success'] is False
@@ -0,0 +1,132 @@
+import sys
+import os
+from unittest.mock import MagicMock
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'standins')))
+
+from servers import FaultInjector, parse_items, start_soap_standin, start_eventhub_standin
+import driver
+from soap_client import client
+from soap_client.envelope import build_envelope, build_batch_envelope
+import stock_monitor.monitor as monitor
+
+STOCK = {'currentStockUnits': 50, 'dailyConsumptionUnits': 79, 'daysOfSupply': 0.63}
+
+
+@pytest.fixture
+def soap_standin(monkeypatch):
+    servers = []
+
+    def factory(**injection):
+        server = start_soap_standin(FaultInjector(seed=1, **injection))
+        servers.append(server)
+        monkeypatch.setattr(client, 'SOAP_URL', server.url)
+        return server
+
+    monkeypatch.setattr(client, 'log_event', MagicMock())
+    monkeypatch.setattr(client, 'SOAP_RETRY_BASE_DELAY', 0.001)
+    yield factory
+    for server in servers:
+        server.close()
+
+
+@pytest.fixture
+def event_standin(monkeypatch):
+    server = start_eventhub_standin(FaultInjector(seed=1))
+    monkeypatch.setattr(monitor, 'STOCKMS_URL', server.url)
+    yield server
+    server.close()
+
+
+# ============ FAULT INJECTOR TESTS ============
+
+def test_injector_rates_and_latency_are_reproducible():
+    a = FaultInjector(latency_ms=10, jitter_ms=5, error_rate=0.2, fault_rate=0.1, seed=7)
+    b = FaultInjector(latency_ms=10, jitter_ms=5, error_rate=0.2, fault_rate=0.1, seed=7)
+    decisions = [a.decide() for _ in range(1000)]
+
+    assert decisions == [b.decide() for _ in range(1000)]
+    assert all(0.010 <= delay <= 0.015 for delay, _ in decisions)
+    stats = a.stats()
+    assert stats['requests'] == 1000
+    assert 50 < stats['faults'] < 150
+    assert 130 < stats['errors'] < 270
+
+
+def test_parse_items_single_and_batch():
+    assert parse_items(build_envelope(STOCK)) == [
+        {'hospitalId': 'Hospital-C', 'productCode': 'PHYSIO-SALINE-500ML', 'daysOfSupply': '0.63'}]
+    items = [dict(STOCK, productCode=f'SKU-{i}') for i in range(3)]
+    assert [i['productCode'] for i in parse_items(build_batch_envelope(items))] == ['SKU-0', 'SKU-1', 'SKU-2']
+
+
+# ============ SOAP STAND-IN TESTS ============
+
+def test_send_stock_update_against_standin(soap_standin):
+    """Gerçek HTTP üzerinden: düşük stokta sipariş tetiklenir"""
+    server = soap_standin(latency_ms=1)
+    result = client.send_stock_update(STOCK)
+
+    assert result['success'] is True
+    assert result['response']['orderTriggered'] is True
+    assert result['response']['orderId'].startswith('ORD-STANDIN-')
+    assert server.stats()['ok'] == 1
+
+
+def test_injected_client_fault_fails_fast(soap_standin):
+    server = soap_standin(fault_rate=1.0, fault_code='soap:Client', fault_error_code='SCHEMA_VALIDATION')
+    result = client.send_stock_update(STOCK, max_retries=3)
+
+    assert result['success'] is False
+    assert result['error_code'] == 'soap:Client/SCHEMA_VALIDATION'
+    assert server.stats()['requests'] == 1
+
+
+def test_injected_errors_are_retried(soap_standin):
+    server = soap_standin(error_rate=1.0, error_status=503)
+    result = client.send_stock_update(STOCK, max_retries=2)
+
+    assert result['error_code'] == 'HTTP_503'
+    assert server.stats()['requests'] == 2
+
+
+def test_batch_against_standin(soap_standin, monkeypatch):
+    monkeypatch.setattr(client, '_batch_disabled_until', 0.0)
+    server = soap_standin()
+    items = [dict(STOCK, productCode=f'SKU-{i}') for i in range(5)]
+    results = client.send_stock_updates(items, batch_size=5)
+
+    assert all(r['success'] and r['batched'] for r in results)
+    assert server.stats()['requests'] == 1
+
+
+# ============ EVENT HUB STAND-IN / DRIVER TESTS ============
+
+def test_publish_event_against_standin(event_standin):
+    result = monitor.publish_event_to_hub({'current_stock': 50, 'daily_consumption': 79,
+                                           'days_of_supply': 0.63})
+    assert result['success'] is True
+    assert result['response']['event']['eventType'] == 'InventoryLow'
+    assert event_standin.stats()['ok'] == 1
+
+
+def test_driver_measures_throughput_and_error_codes(soap_standin):
+    soap_standin(latency_ms=1, fault_rate=0.5, fault_code='soap:Client', fault_error_code='BAD')
+    samples, elapsed = driver.run_load(driver.soap_call(client, 1), requests=40, concurrency=4)
+    summary = driver.summarize('SOAP', samples, elapsed)
+
+    assert summary['requests'] == 40
+    assert summary['success'] + summary['errors']['soap:Client/BAD'] == 40
+    assert summary['throughput_rps'] > 0
+    assert summary['p50_ms'] <= summary['p95_ms'] <= summary['p99_ms'] <= summary['max_ms']
+
+
+def test_post_events_against_standin(event_standin):
+    payloads = [monitor.build_event_payload({'current_stock': 50, 'daily_consumption': 79,
+                                             'days_of_supply': 0.63}) for _ in range(10)]
+    results = monitor.post_events(payloads, batch_size=10)
+
+    assert all(r['success'] and r['batched'] for r in results)
+    assert event_standin.stats()['requests'] == 1
@@ -1,5 +1,6 @@
 import sys
 import os
+import threading
 from unittest.mock import MagicMock
 import pytest
 
@@ -20,6 +21,7 @@ def test_get_db_connection_success(monkeypatch):
 
 
 def test_get_db_connection_failure(monkeypatch):
+    monitor.db_pool.close_pool()
     monkeypatch.setattr(
         monitor.psycopg2,
         "connect",
@@ -182,6 +184,7 @@ def test_get_db_connection_called_with_kwargs(monkeypatch):
     """Coverage booster – connect kwargs path"""
 
     called = {}
+    monitor.db_pool.close_pool()
 
     def fake_connect(**kwargs):
         called.update(kwargs)
@@ -203,3 +206,354 @@ def test_simulate_daily_consumption_spike(monkeypatch):
 
     result = monitor.simulate_daily_consumption(100)
     assert result >= 100
+
+
+# =========================
+# CONNECTION POOL
+# =========================
+
+def test_db_pool_reuses_released_connection(monkeypatch):
+    monitor.db_pool.close_pool()
+    created = []
+
+    def fake_connect(**kwargs):
+        conn = MagicMock()
+        conn.closed = 0
+        conn.info.transaction_status = monitor.db_pool.extensions.TRANSACTION_STATUS_IDLE
+        created.append(conn)
+        return conn
+
+    monkeypatch.setattr(monitor.psycopg2, "connect", fake_connect)
+
+    conn1 = monitor.get_db_connection()
+    monitor.release_db_connection(conn1)
+    conn2 = monitor.get_db_connection()
+    monitor.release_db_connection(conn2)
+
+    assert conn1 is conn2
+    stats = monitor.db_pool.pool_stats()
+    assert stats["created"] == len(created)
+    assert stats["reused"] >= 1
+    assert stats["in_use"] == 0
+    monitor.db_pool.close_pool()
+
+
+def test_db_pool_discards_closed_connection(monkeypatch):
+    monitor.db_pool.close_pool()
+
+    def fake_connect(**kwargs):
+        conn = MagicMock()
+        conn.closed = 0
+        conn.info.transaction_status = monitor.db_pool.extensions.TRANSACTION_STATUS_IDLE
+        return conn
+
+    monkeypatch.setattr(monitor.psycopg2, "connect", fake_connect)
+
+    conn1 = monitor.get_db_connection()
+    conn1.closed = 1
+    monitor.release_db_connection(conn1)
+    conn2 = monitor.get_db_connection()
+
+    assert conn2 is not conn1
+    assert monitor.db_pool.pool_stats()["discarded"] >= 1
+    monitor.db_pool.close_pool()
+
+
+def test_db_pool_exhausted_raises():
+    pool = monitor.db_pool.ConnectionPool(min_size=0, max_size=1, timeout=0.01)
+    fake_conn = MagicMock()
+    fake_conn.closed = 0
+    pool._connect = lambda: fake_conn
+
+    assert pool.getconn() is fake_conn
+    with pytest.raises(monitor.db_pool.PoolExhaustedError):
+        pool.getconn()
+    assert pool.stats()["timeouts"] == 1
+
+
+def make_pool_conn():
+    conn = MagicMock()
+    conn.closed = 0
+    conn.info.transaction_status = monitor.db_pool.extensions.TRANSACTION_STATUS_IDLE
+    return conn
+
+
+def test_db_pool_slow_connect_does_not_block_other_callers():
+    """Yeni bağlantı kilit dışında açılır; beklerken iade / yeniden kullanım çalışır"""
+    pool = monitor.db_pool.ConnectionPool(min_size=0, max_size=2, timeout=1)
+    first = make_pool_conn()
+    pool._connect = lambda: first
+    conn1 = pool.getconn()
+
+    connecting = threading.Event()
+    release = threading.Event()
+    slow = make_pool_conn()
+
+    def slow_connect():
+        connecting.set()
+        release.wait(5)
+        return slow
+
+    pool._connect = slow_connect
+    result = {}
+    worker = threading.Thread(target=lambda: result.setdefault("conn", pool.getconn()))
+    worker.start()
+    assert connecting.wait(2)
+
+    pool.putconn(conn1)
+    assert pool.getconn() is conn1
+    assert pool.stats()["size"] == 2
+
+    release.set()
+    worker.join(2)
+    assert result["conn"] is slow
+    assert pool.stats()["in_use"] == 2
+
+
+def test_db_pool_failed_connect_returns_slot():
+    pool = monitor.db_pool.ConnectionPool(min_size=0, max_size=1, timeout=0.01)
+
+    def refuse():
+        raise monitor.psycopg2.OperationalError("refused")
+
+    pool._connect = refuse
+    with pytest.raises(monitor.psycopg2.OperationalError):
+        pool.getconn()
+    assert pool.stats()["size"] == 0
+
+    conn = make_pool_conn()
+    pool._connect = lambda: conn
+    assert pool.getconn() is conn
+
+
+def test_db_pool_unhealthy_idle_connection_is_replaced():
+    pool = monitor.db_pool.ConnectionPool(min_size=0, max_size=1, timeout=0.5, health_check_interval=0)
+    dead, fresh = make_pool_conn(), make_pool_conn()
+    dead.cursor.side_effect = monitor.psycopg2.OperationalError("gone")
+    connections = iter([dead, fresh])
+    pool._connect = lambda: next(connections)
+
+    pool.putconn(pool.getconn())
+    assert pool.getconn() is fresh
+    stats = pool.stats()
+    assert (stats["health_check_failures"], stats["discarded"], stats["created"]) == (1, 1, 2)
+
+
+# =========================
+# CONSUME AND CHECK (single round-trip)
+# =========================
+
+def test_consume_and_check_breach(monkeypatch):
+    fake_cursor = MagicMock()
+    fake_cursor.fetchone.return_value = (100, 50, 79, 0.63, 42, 'URGENT')
+
+    fake_conn = MagicMock()
+    fake_conn.cursor.return_value = fake_cursor
+
+    monkeypatch.setattr(monitor, "get_db_connection", lambda: fake_conn)
+
+    result = monitor.consume_and_check(50)
+    assert result["breach"] is True
+    assert result["alert_id"] == 42
+    assert result["current_stock"] == 50
+    assert fake_cursor.execute.call_count == 1
+    fake_conn.commit.assert_called_once()
+
+
+def test_consume_and_check_no_breach(monkeypatch):
+    fake_cursor = MagicMock()
+    fake_cursor.fetchone.return_value = (300, 250, 79, 3.16, None, None)
+
+    fake_conn = MagicMock()
+    fake_conn.cursor.return_value = fake_cursor
+
+    monkeypatch.setattr(monitor, "get_db_connection", lambda: fake_conn)
+
+    result = monitor.consume_and_check(50)
+    assert result["breach"] is False
+    assert result["days_of_supply"] == 3.16
+
+
+def test_consume_and_check_missing_row(monkeypatch):
+    fake_cursor = MagicMock()
+    fake_cursor.fetchone.return_value = None
+
+    fake_conn = MagicMock()
+    fake_conn.cursor.return_value = fake_cursor
+
+    monkeypatch.setattr(monitor, "get_db_connection", lambda: fake_conn)
+
+    assert monitor.consume_and_check(10) is None
+
+
+def test_consume_and_check_db_error_rolls_back(monkeypatch):
+    fake_conn = MagicMock()
+    fake_conn.cursor.side_effect = Exception("Cursor error")
+
+    monkeypatch.setattr(monitor, "get_db_connection", lambda: fake_conn)
+
+    assert monitor.consume_and_check(10) is None
+    fake_conn.rollback.assert_called_once()
+
+
+# =========================
+# DUAL PATH DISPATCH
+# =========================
+
+BREACH_DATA = {
+    "current_stock": 50,
+    "daily_consumption": 79,
+    "days_of_supply": 0.63
+}
+
+
+def test_dispatch_dual_path_runs_paths_concurrently(monkeypatch):
+    def slow_soap(data, timeout=None):
+        monitor.time.sleep(0.3)
+        return {"success": True, "latency_ms": 300, "response": {}}
+
+    def slow_event(data, timeout=None):
+        monitor.time.sleep(0.3)
+        return {"success": True, "latency_ms": 300, "event_id": "EVT-1"}
+
+    monkeypatch.setattr(monitor, "send_stock_update", slow_soap)
+    monkeypatch.setattr(monitor, "publish_event_to_hub", slow_event)
+
+    start = monitor.time.perf_counter()
+    soap_result, event_result = monitor.dispatch_dual_path(BREACH_DATA)
+    elapsed = monitor.time.perf_counter() - start
+
+    assert soap_result["success"] and event_result["success"]
+    assert elapsed < 0.55
+    assert soap_result["path_latency_ms"] >= 300
+    assert event_result["path_latency_ms"] >= 300
+
+
+def test_dispatch_dual_path_soap_deadline(monkeypatch):
+    def hanging_soap(data, timeout=None):
+        monitor.time.sleep(0.5)
+        return {"success": True, "latency_ms": 500, "response": {}}
+
+    monkeypatch.setattr(monitor, "send_stock_update", hanging_soap)
+    monkeypatch.setattr(
+        monitor,
+        "publish_event_to_hub",
+        lambda data, timeout=None: {"success": True, "latency_ms": 1, "event_id": "EVT-2"}
+    )
+
+    soap_result, event_result = monitor.dispatch_dual_path(BREACH_DATA, soap_deadline=0.1)
+
+    assert soap_result["success"] is False
+    assert soap_result["timed_out"] is True
+    assert event_result["success"] is True
+
+
+def test_dispatch_dual_path_path_exception(monkeypatch):
+    def broken_event(data, timeout=None):
+        raise Exception("boom")
+
+    monkeypatch.setattr(
+        monitor,
+        "send_stock_update",
+        lambda data, timeout=None: {"success": True, "latency_ms": 1, "response": {}}
+    )
+    monkeypatch.setattr(monitor, "publish_event_to_hub", broken_event)
+
+    soap_result, event_result = monitor.dispatch_dual_path(BREACH_DATA)
+    assert soap_result["success"] is True
+    assert event_result["success"] is False
+    assert "boom" in event_result["error"]
+
+
+def test_dispatch_dual_path_survives_saturated_pool(monkeypatch):
+    """Deadline'ı kaçıran yollar worker tutmaya devam etmez; sonraki dispatch hâlâ çalışır"""
+    hung = threading.Event()
+    returned = threading.Semaphore(0)
+    timeouts = []
+
+    def hanging_soap(data, timeout=None):
+        # Gerçek HTTP isteği gibi: cevap gelmez, verilen timeout dolunca döner
+        timeouts.append(timeout)
+        hung.wait(timeout)
+        returned.release()
+        return {"success": False, "error": "timeout", "latency_ms": 0}
+
+    monkeypatch.setattr(monitor, "send_stock_update", hanging_soap)
+    monkeypatch.setattr(monitor, "publish_event_to_hub",
+                        lambda data, timeout=None: {"success": True, "latency_ms": 1, "event_id": "EVT-3"})
+
+    calls = monitor._dispatch_executor._max_workers + 2
+    try:
+        # Havuzdaki worker sayısından fazla askıda SOAP çağrısı
+        for _ in range(calls):
+            soap_result, _ = monitor.dispatch_dual_path(BREACH_DATA, soap_deadline=0.05)
+            assert soap_result["success"] is False
+        assert all(t is not None and t <= 0.05 for t in timeouts)
+        # Hepsi kendi timeout'larıyla (test serbest bırakmadan) döndü: worker'lar boşaldı
+        assert all(returned.acquire(timeout=5) for _ in range(len(timeouts)))
+
+        monkeypatch.setattr(monitor, "send_stock_update",
+                            lambda data, timeout=None: {"success": True, "latency_ms": 1, "response": {}})
+        soap_result, event_result = monitor.dispatch_dual_path(BREACH_DATA)
+    finally:
+        hung.set()
+
+    assert soap_result["success"] and event_result["success"]
+
+
+def test_run_path_skips_when_deadline_passed_in_queue():
+    path = MagicMock()
+    result = monitor._run_path(path, BREACH_DATA, monitor.time.perf_counter() - 1)
+    path.assert_not_called()
+    assert result["timed_out"] is True
+
+
+def test_check_threshold_breach_uses_forecast(monkeypatch):
+    monkeypatch.setattr(
+        monitor,
+        "get_current_stock",
+        lambda: {
+            "current_stock": 300,
+            "daily_consumption": 79,
+            "days_of_supply": 3.8
+        }
+    )
+    monkeypatch.setattr(monitor, "sync_forecaster", lambda forecaster: 0)
+    monkeypatch.setattr(monitor, "get_db_connection", lambda: MagicMock())
+
+    forecaster = monitor.ConsumptionForecaster(min_observations=1)
+    for i in range(30):
+        forecaster.update((monitor.HOSPITAL_ID, monitor.PRODUCT_CODE), 200, i % 7)
+
+    breach, data = monitor.check_threshold_breach(forecaster)
+    assert breach is True
+    assert data["days_of_supply"] == pytest.approx(1.5, rel=0.01)
+
+
+def test_check_threshold_breach_alert_state_dispatches_only_on_transition(monkeypatch):
+    monkeypatch.setattr(
+        monitor,
+        "get_current_stock",
+        lambda: {
+            "current_stock": 150,
+            "daily_consumption": 100,
+            "days_of_supply": 1.5
+        }
+    )
+    applied = []
+    monkeypatch.setattr(monitor, "get_db_connection", lambda: MagicMock())
+    monkeypatch.setattr(monitor, "release_db_connection", lambda conn: None)
+    monkeypatch.setattr(
+        monitor, "apply_transitions",
+        lambda conn, sm, transitions: [sm.commit(t, len(applied) + 1) or applied.append(t) for t in transitions]
+    )
+
+    alert_state = monitor.AlertStateMachine()
+    breach, data = monitor.check_threshold_breach(alert_state=alert_state)
+    assert breach is True
+    assert data is not None
+
+    breach, data = monitor.check_threshold_breach(alert_state=alert_state)
+    assert breach is False
+    assert data is None
+    assert len(applied) == 1
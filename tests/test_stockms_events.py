@@ -0,0 +1,380 @@
+import sys
+import os
+import json
+import threading
+import time
+from unittest.mock import MagicMock
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import stockms.app as stockms
+from stockms.inventory_events import StockCache, validate_event, verify_event
+import stock_monitor.monitor as monitor
+
+BREACH = {'current_stock': 50, 'daily_consumption': 79, 'days_of_supply': 0.63}
+
+
+def make_event(**overrides):
+    return dict(monitor.build_event_payload(BREACH), **overrides)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def client(monkeypatch):
+    log_event = MagicMock()
+    load_stock = MagicMock(return_value=(50, 79, 0.63))
+    monkeypatch.setattr(stockms.event_log_writer, 'log_event', log_event)
+    monkeypatch.setattr(stockms, 'load_stock', load_stock)
+    monkeypatch.setattr(stockms, 'stock_cache', StockCache(load_stock))
+    test_client = stockms.app.test_client()
+    test_client.log_event = log_event
+    test_client.load_stock = load_stock
+    return test_client
+
+
+# ============ VALIDATION TESTS ============
+
+def test_monitor_payload_is_valid():
+    assert validate_event(make_event()) == []
+
+
+@pytest.mark.parametrize('overrides, error', [
+    ({'eventType': 'InventoryHigh'}, 'eventType must be InventoryLow'),
+    ({'hospitalId': 'Hospital X'}, 'hospitalId must match ^[A-Za-z0-9-]+$'),
+    ({'currentStockUnits': -1}, 'currentStockUnits must be a non-negative integer'),
+    ({'currentStockUnits': 5.5}, 'currentStockUnits must be a non-negative integer'),
+    ({'dailyConsumptionUnits': True}, 'dailyConsumptionUnits must be a non-negative integer'),
+    ({'daysOfSupply': '0.6'}, 'daysOfSupply must be a non-negative number'),
+    ({'timestamp': 'yesterday'}, 'timestamp must be an ISO8601 date-time'),
+    ({'productCode': 'saline 500'}, 'productCode must match ^[A-Z0-9-]+$'),
+    ({'eventId': 'EVT 1'}, 'eventId must match ^[a-zA-Z0-9-]+$'),
+    ({'extra': 1}, 'unknown field: extra'),
+])
+def test_invalid_fields_are_reported(overrides, error):
+    assert error in validate_event(make_event(**overrides))
+
+
+def test_hospital_allow_list():
+    event = make_event(hospitalId='Hospital-A')
+    assert validate_event(event) == []
+    assert validate_event(event, ('Hospital-A', 'Hospital-C')) == []
+    assert validate_event(event, ('Hospital-C',)) == ['hospitalId must be one of Hospital-C']
+
+
+def test_missing_fields_and_non_object():
+    event = make_event()
+    del event['threshold']
+    assert validate_event(event) == ['missing field: threshold']
+    assert validate_event([event]) == ['event must be a JSON object']
+
+
+# ============ STOCK CACHE / VERIFICATION TESTS ============
+
+def test_stock_cache_serves_within_ttl():
+    clock = FakeClock()
+    loader = MagicMock(side_effect=[(50, 79, 0.63), (40, 79, 0.51)])
+    cache = StockCache(loader, ttl=5, clock=clock)
+
+    assert cache.get('Hospital-C', 'SKU') == (50, 79, 0.63)
+    clock.now = 4.9
+    assert cache.get('Hospital-C', 'SKU') == (50, 79, 0.63)
+    clock.now = 5
+    assert cache.get('Hospital-C', 'SKU') == (40, 79, 0.51)
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 2
+
+
+def test_verify_accepts_within_tolerance_from_cache():
+    loader = MagicMock(return_value=(52, 79, 0.66))
+    cache = StockCache(loader, ttl=5, clock=FakeClock())
+    cache.get('Hospital-C', 'PHYSIO-SALINE-500ML')
+
+    assert verify_event(make_event(), cache, tolerance=5) is None
+    assert loader.call_count == 1
+
+
+def test_verify_refreshes_stale_cache_before_rejecting():
+    loader = MagicMock(side_effect=[(90, 79, 1.14), (50, 79, 0.63), (90, 79, 1.14), (90, 79, 1.14)])
+    cache = StockCache(loader, ttl=5, clock=FakeClock())
+
+    cache.get('Hospital-C', 'PHYSIO-SALINE-500ML')
+    assert verify_event(make_event(), cache, tolerance=5) is None
+    cache.get('Hospital-C', 'PHYSIO-SALINE-500ML', refresh=True)
+    status, message = verify_event(make_event(), cache, tolerance=5)
+    assert status == 409 and '(90)' in message
+
+
+def test_verify_unknown_sku_is_404():
+    cache = StockCache(MagicMock(return_value=None), ttl=5, clock=FakeClock())
+    assert verify_event(make_event(), cache)[0] == 404
+
+
+# ============ /publish-event TESTS ============
+
+def test_posted_event_is_published_without_stock_read(client):
+    event = make_event()
+    r = client.post('/publish-event', json=event)
+
+    assert r.status_code == 200
+    assert r.get_json()['event'] == event
+    client.load_stock.assert_not_called()
+    logged = client.log_event.call_args.args
+    assert logged[:3] == ('INVENTORY_LOW_EVENT', 'OUTGOING', 'SERVERLESS')
+    assert json.loads(logged[3]) == event
+
+
+def test_event_from_other_hospital_is_published(client, inserted):
+    event = make_event(hospitalId='Hospital-A')
+    assert client.post('/publish-event', json=event).status_code == 200
+    assert client.post('/publish-events', json=[event, make_event()]).get_json()['published'] == 2
+
+
+def test_invalid_event_is_rejected(client):
+    r = client.post('/publish-event', json=make_event(currentStockUnits=-5, eventType='X'))
+
+    assert r.status_code == 400
+    assert len(r.get_json()['details']) == 2
+    client.log_event.assert_not_called()
+
+
+def test_malformed_json_is_rejected(client):
+    r = client.post('/publish-event', data='{not json', content_type='application/json')
+    assert r.status_code == 400
+    assert r.get_json()['error'] == 'Invalid JSON'
+
+
+def test_bodyless_call_builds_event_from_stock_row(client):
+    r = client.post('/publish-event')
+
+    assert r.status_code == 200
+    assert r.get_json()['event']['currentStockUnits'] == 50
+    client.load_stock.assert_called_once_with('Hospital-C', 'PHYSIO-SALINE-500ML')
+
+
+def test_verification_rejects_mismatched_stock(client, monkeypatch):
+    monkeypatch.setattr(stockms, 'EVENT_VERIFY_STOCK', True)
+
+    assert client.post('/publish-event', json=make_event()).status_code == 200
+    r = client.post('/publish-event', json=make_event(currentStockUnits=500))
+    assert r.status_code == 409
+    # İlki cache'e yükledi; uyuşmazlıkta bir kez tazelendi
+    assert client.load_stock.call_count == 2
+
+
+# ============ /publish-events TESTS ============
+
+@pytest.fixture
+def inserted(monkeypatch):
+    insert = MagicMock()
+    monkeypatch.setattr(stockms, 'insert_event_logs', insert)
+    return insert
+
+
+def test_bulk_publish_returns_per_event_results(client, inserted):
+    events = [make_event(productCode=f'SKU-{i}') for i in range(3)]
+    events[1]['currentStockUnits'] = -1
+    r = client.post('/publish-events', json=events)
+    body = r.get_json()
+
+    assert r.status_code == 200
+    assert (body['published'], body['failed'], body['success']) == (2, 1, False)
+    assert [x['success'] for x in body['results']] == [True, False, True]
+    assert body['results'][1]['status'] == 400
+    assert body['results'][2]['eventId'] == events[2]['eventId']
+    # Geçerli event'ler tek çağrıda (tek INSERT + commit) yazılır
+    rows = inserted.call_args.args[0]
+    inserted.assert_called_once()
+    assert [json.loads(row[3])['productCode'] for row in rows] == ['SKU-0', 'SKU-2']
+    client.log_event.assert_not_called()
+
+
+def test_bulk_publish_accepts_wrapped_events(client, inserted):
+    r = client.post('/publish-events', json={'events': [make_event()]})
+    assert r.get_json()['published'] == 1
+
+
+@pytest.mark.parametrize('body', [[], {'events': 'x'}, make_event()])
+def test_bulk_publish_rejects_non_array(client, inserted, body):
+    assert client.post('/publish-events', json=body).status_code == 400
+    inserted.assert_not_called()
+
+
+def test_bulk_publish_limit(client, inserted, monkeypatch):
+    monkeypatch.setattr(stockms, 'PUBLISH_EVENTS_MAX', 2)
+    assert client.post('/publish-events', json=[make_event()] * 3).status_code == 413
+
+
+def test_bulk_publish_all_invalid_skips_insert(client, inserted):
+    r = client.post('/publish-events', json=[{'eventId': 'EVT-1'}])
+    assert r.get_json()['failed'] == 1
+    inserted.assert_not_called()
+
+
+def test_bulk_publish_insert_failure_is_500(client, monkeypatch):
+    monkeypatch.setattr(stockms, 'insert_event_logs', MagicMock(side_effect=RuntimeError('db down')))
+    r = client.post('/publish-events', json=[make_event()])
+    assert r.status_code == 500
+
+
+# ============ CLIENT TESTS ============
+
+def fake_response(status, body=None):
+    response = MagicMock(status_code=status, text='')
+    response.json.return_value = body
+    return response
+
+
+def test_post_events_sends_one_request_per_chunk(monkeypatch):
+    calls = []
+
+    def post(url, json, timeout):
+        calls.append((url, len(json)))
+        return fake_response(200, {'results': [{'index': i, 'success': i != 1, 'status': 400, 'error': 'bad'}
+                                               for i in range(len(json))]})
+
+    monkeypatch.setattr(monitor.requests, 'post', post)
+    payloads = [make_event() for _ in range(5)]
+    results = monitor.post_events(payloads, batch_size=3)
+
+    assert calls == [(monitor.STOCKMS_URL + '/publish-events', 3), (monitor.STOCKMS_URL + '/publish-events', 2)]
+    assert [r['success'] for r in results] == [True, False, True, True, False]
+    assert results[0]['event_id'] == payloads[0]['eventId']
+    assert results[1]['retryable'] is False
+
+
+def test_post_events_falls_back_when_bulk_endpoint_missing(monkeypatch):
+    monkeypatch.setattr(monitor, '_bulk_events_supported', True)
+    urls = []
+
+    def post(url, json, timeout):
+        urls.append(url.rsplit('/', 1)[1])
+        return fake_response(404) if url.endswith('/publish-events') else fake_response(200, {'success': True})
+
+    monkeypatch.setattr(monitor.requests, 'post', post)
+    results = monitor.post_events([make_event(), make_event()])
+    monitor.post_events([make_event()])
+
+    assert all(r['success'] for r in results)
+    assert urls.count('publish-events') == 1
+    assert urls.count('publish-event') == 3
+
+
+def test_only_schema_rejections_are_permanent(monkeypatch):
+    """400 ve 409 dead-letter'a gider; 404 geç teslimde zamanlama kaynaklı, outbox tekrar dener"""
+    statuses = [400, 404, 409]
+    monkeypatch.setattr(monitor.requests, 'post', lambda url, json, timeout: fake_response(200, {'results': [
+        {'index': i, 'success': False, 'status': status, 'error': 'x'} for i, status in enumerate(statuses)]}))
+
+    results = monitor.post_events([make_event() for _ in statuses])
+    assert [r['retryable'] for r in results] == [False, True, False]
+
+
+def test_post_events_does_not_resend_after_timeout(monkeypatch):
+    """İstek gittikten sonraki hata tekli çağrılara düşmez (event'ler yazılmış olabilir)"""
+    monkeypatch.setattr(monitor, '_bulk_events_supported', True)
+    urls = []
+
+    def post(url, json, timeout):
+        urls.append(url)
+        raise monitor.requests.exceptions.ReadTimeout('read timed out')
+
+    monkeypatch.setattr(monitor.requests, 'post', post)
+    results = monitor.post_events([make_event(), make_event()])
+
+    assert urls == [monitor.STOCKMS_URL + '/publish-events']
+    assert [(r['success'], r['retryable']) for r in results] == [(False, True), (False, True)]
+    assert monitor._bulk_events_supported is True
+
+
+def test_post_events_falls_back_when_connection_refused(monkeypatch):
+    monkeypatch.setattr(monitor, '_bulk_events_supported', True)
+    refused = monitor.requests.post
+    calls = []
+
+    def post(url, json, timeout):
+        calls.append(url.rsplit('/', 1)[1])
+        if url.endswith('/publish-events'):
+            return refused('http://127.0.0.1:1/publish-events', json=json, timeout=1)
+        return fake_response(200, {'success': True})
+
+    monkeypatch.setattr(monitor.requests, 'post', post)
+    results = monitor.post_events([make_event(), make_event()])
+
+    assert all(r['success'] for r in results)
+    assert calls.count('publish-event') == 2
+
+
+def test_post_events_fallback_inside_saturated_dispatch_pool(monkeypatch):
+    """Dual-path havuzunun bütün worker'ları post_events çalıştırırken tekli çağrılar kilitlenmez"""
+    monkeypatch.setattr(monitor, '_bulk_events_supported', False)
+    monkeypatch.setattr(monitor.requests, 'post', lambda url, json, timeout: fake_response(200, {'success': True}))
+
+    workers = monitor._dispatch_executor._max_workers
+    all_busy = threading.Barrier(workers)
+
+    def sweep():
+        all_busy.wait(timeout=5)
+        return monitor.post_events([make_event() for _ in range(3)])
+
+    futures = [monitor._dispatch_executor.submit(sweep) for _ in range(workers)]
+
+    assert all(all(r['success'] for r in f.result(timeout=5)) for f in futures)
+
+
+def test_dispatch_breaches_honors_path_deadlines(monkeypatch):
+    """Takılan SOAP batch'i taramayı bekletmez; satırları zaman aşımı sonucu döner"""
+    release = threading.Event()
+    timeouts = {}
+
+    def send_stock_updates(items, timeout=None):
+        timeouts['soap'] = timeout
+        return release.wait(5) and []
+
+    def post_events(payloads, timeout=None):
+        timeouts['event'] = timeout
+        return [{'success': True} for _ in payloads]
+
+    monkeypatch.setattr(monitor, 'send_stock_updates', send_stock_updates)
+    monkeypatch.setattr(monitor, 'post_events', post_events)
+    rows = [dict(BREACH, product_code=f'SKU-{i}') for i in range(3)]
+
+    start = time.perf_counter()
+    soap_results, event_results = monitor.dispatch_breaches(rows, soap_deadline=0.1)
+    release.set()
+
+    assert time.perf_counter() - start < 1
+    assert all(r['success'] for r in event_results)
+    assert len(soap_results) == 3 and all(r['timed_out'] for r in soap_results)
+    # Kalan süre yolların HTTP timeout'u olarak verilir
+    assert 0 < timeouts['soap'] <= 0.1
+    assert 0 < timeouts['event'] <= monitor.EVENT_PATH_DEADLINE
+
+
+def test_post_events_bounds_requests_by_timeout(monkeypatch):
+    """Her istek kalan süreyle sınırlanır; süre dolunca kalan parçalar gönderilmez"""
+    monkeypatch.setattr(monitor, '_bulk_events_supported', True)
+    timeouts = []
+
+    def post(url, json, timeout):
+        timeouts.append(timeout)
+        time.sleep(0.1)
+        return fake_response(200, {'results': [{'index': i, 'success': True} for i in range(len(json))]})
+
+    monkeypatch.setattr(monitor.requests, 'post', post)
+    results = monitor.post_events([make_event() for _ in range(6)], batch_size=2, timeout=0.05)
+
+    assert len(timeouts) == 1
+    assert 0 < timeouts[0] <= 0.05
+    assert [r['success'] for r in results] == [True] * 2 + [False] * 4
+    assert all(r['timed_out'] and r['retryable'] for r in results[2:])
+
+
+def test_build_event_payload_ids_are_unique():
+    assert len({monitor.build_event_payload(BREACH)['eventId'] for _ in range(100)}) == 100
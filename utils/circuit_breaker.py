@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import deque
+
+
+CLOSED = 'CLOSED'
+OPEN = 'OPEN'
+HALF_OPEN = 'HALF_OPEN'
+
+
+class CircuitOpenError(Exception):
+    """Devre açık; çağrı uzak tarafa gitmeden reddedildi"""
+
+
+class CircuitBreaker:
+    """
+    Kayan zaman penceresindeki hata oranına göre açılan devre kesici.
+    CLOSED: çağrılar geçer, sonuçlar pencereye yazılır; oran eşiği aşınca OPEN.
+    OPEN: çağrılar anında reddedilir; open_seconds sonra HALF_OPEN.
+    HALF_OPEN: en fazla half_open_probes deneme geçer; hepsi başarılıysa CLOSED, biri hata verirse OPEN.
+    on_transition(old, new, stats) her geçişte kilit dışında çağrılır.
+    """
+
+    def __init__(self, name, failure_rate=0.5, window=60.0, min_calls=5, open_seconds=30.0,
+                 half_open_probes=1, clock=time.monotonic, on_transition=None):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.window = window
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.on_transition = on_transition
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._clear()
+
+    def reset(self):
+        """CLOSED'a dön, pencere ve sayaçları sıfırla (geçiş yayınlanmaz)"""
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self.state = CLOSED
+        self._calls = deque()
+        self._failures = 0
+        self._opened_at = None
+        self._probes = 0
+        self._probe_successes = 0
+        self.rejected = 0
+        self.transitions = {OPEN: 0, HALF_OPEN: 0, CLOSED: 0}
+
+    def allow(self):
+        """Çağrı yapılabilir mi? OPEN'da süre dolduysa HALF_OPEN'a geçip probe izni verir"""
+        transition = None
+        with self._lock:
+            if self.state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+                transition = self._transition(HALF_OPEN)
+            if self.state == CLOSED:
+                allowed = True
+            elif self.state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                allowed = True
+            else:
+                self.rejected += 1
+                allowed = False
+        self._publish(transition)
+        return allowed
+
+    def record_success(self):
+        transition = None
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_probes:
+                    transition = self._transition(CLOSED)
+            elif self.state == CLOSED:
+                self._record(True)
+        self._publish(transition)
+
+    def record_failure(self):
+        transition = None
+        with self._lock:
+            if self.state == HALF_OPEN:
+                transition = self._transition(OPEN)
+            elif self.state == CLOSED:
+                self._record(False)
+                calls = len(self._calls)
+                if calls >= self.min_calls and self._failures / calls >= self.failure_rate:
+                    transition = self._transition(OPEN)
+        self._publish(transition)
+
+    def stats(self):
+        """Metrik olarak dışa verilen anlık durum"""
+        with self._lock:
+            self._prune(self._clock())
+            calls = len(self._calls)
+            return {
+                'name': self.name,
+                'state': self.state,
+                'window_calls': calls,
+                'window_failures': self._failures,
+                'failure_rate': round(self._failures / calls, 4) if calls else 0.0,
+                'rejected': self.rejected,
+                'transitions': dict(self.transitions)
+            }
+
+    def _record(self, ok):
+        now = self._clock()
+        self._calls.append((now, ok))
+        if not ok:
+            self._failures += 1
+        self._prune(now)
+
+    def _prune(self, now):
+        # Pencere dışına düşen sonuçları soldan at; hata sayacı birlikte güncellenir
+        horizon = now - self.window
+        calls = self._calls
+        while calls and calls[0][0] < horizon:
+            if not calls.popleft()[1]:
+                self._failures -= 1
+
+    def _transition(self, new_state):
+        old_state = self.state
+        self.state = new_state
+        self.transitions[new_state] += 1
+        calls = len(self._calls)
+        failure_rate = round(self._failures / calls, 4) if calls else 0.0
+        if new_state == OPEN:
+            self._opened_at = self._clock()
+        if new_state != CLOSED:
+            self._probes = 0
+            self._probe_successes = 0
+        if new_state == CLOSED:
+            self._calls.clear()
+            self._failures = 0
+        return old_state, new_state, {'failure_rate': failure_rate, 'window_calls': calls,
+                                      'rejected': self.rejected}
+
+    def _publish(self, transition):
+        if transition is not None and self.on_transition is not None:
+            self.on_transition(*transition)
@@ -0,0 +1,291 @@
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DB_HOST = os.getenv('DB_HOST', 'localhost')
+DB_PORT = os.getenv('DB_PORT', '5432')
+DB_NAME = os.getenv('DB_NAME', 'hospital_db')
+DB_USER = os.getenv('DB_USER', 'postgres')
+DB_PASSWORD = os.getenv('DB_PASSWORD', 'postgres')
+
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '1'))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '5'))
+DB_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', '30'))
+
+
+class PoolExhaustedError(Exception):
+    """Havuzda timeout süresince boş bağlantı bulunamadı"""
+
+
+class ConnectionPool:
+    """Thread-safe PostgreSQL bağlantı havuzu (health-check + istatistik)"""
+
+    def __init__(self, min_size=DB_POOL_MIN_SIZE, max_size=DB_POOL_MAX_SIZE,
+                 timeout=DB_POOL_TIMEOUT, health_check_interval=DB_POOL_HEALTH_CHECK_INTERVAL,
+                 **connect_kwargs):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError(f"Geçersiz havuz boyutu: min={min_size}, max={max_size}")
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.connect_kwargs = connect_kwargs or {
+            'host': DB_HOST,
+            'port': DB_PORT,
+            'database': DB_NAME,
+            'user': DB_USER,
+            'password': DB_PASSWORD
+        }
+
+        self._idle = deque()
+        # Kapatılmadan unutulan bağlantılar GC ile düşer, slot sızmaz
+        self._in_use = weakref.WeakSet()
+        self._cond = threading.Condition()
+        self._pending = 0
+        self._closed = False
+        self._stats = {
+            'created': 0,
+            'reused': 0,
+            'discarded': 0,
+            'health_checks': 0,
+            'health_check_failures': 0,
+            'waits': 0,
+            'timeouts': 0
+        }
+
+        for _ in range(min_size):
+            try:
+                self._idle.append((self._connect(), time.monotonic()))
+                self._stats['created'] += 1
+            except Exception as e:
+                print(f"⚠️  Havuz ön-bağlantı hatası: {e}")
+                break
+
+    def _connect(self):
+        return psycopg2.connect(**self.connect_kwargs)
+
+    def _size(self):
+        # _pending: kilit dışında bağlanan / kontrol edilen bağlantıların ayrılmış slotları
+        return len(self._idle) + len(self._in_use) + self._pending
+
+    def _needs_check(self, idle_since):
+        return time.monotonic() - idle_since >= self.health_check_interval
+
+    def _ping(self, conn):
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        self._stats['discarded'] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _reserve(self, deadline):
+        """Kilit altında: boşta bağlantı ya da yeni bağlantı için slot ayır; (conn, idle_since) döndür"""
+        while True:
+            if self._closed:
+                raise PoolExhaustedError("Bağlantı havuzu kapatıldı")
+
+            while self._idle:
+                conn, idle_since = self._idle.pop()
+                if conn.closed:
+                    self._discard(conn)
+                    continue
+                self._pending += 1
+                return conn, idle_since
+
+            # Çağıran tarafından doğrudan close() edilenleri say dışı bırak
+            for conn in [c for c in self._in_use if c.closed]:
+                self._in_use.discard(conn)
+
+            if self._size() < self.max_size:
+                self._pending += 1
+                return None, None
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._stats['timeouts'] += 1
+                raise PoolExhaustedError(
+                    f"Bağlantı havuzu dolu ({self.max_size} bağlantı, {self.timeout}s beklendi)"
+                )
+            self._stats['waits'] += 1
+            self._cond.wait(remaining)
+
+    def getconn(self):
+        """
+        Havuzdan bağlantı al (gerekirse yeni bağlantı aç). Slot kilit altında ayrılır; bağlantı
+        açma ve health-check kilit dışında yapılır, yavaş bir connect diğer çağıranları bekletmez.
+        """
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            with self._cond:
+                conn, idle_since = self._reserve(deadline)
+
+            checked = False
+            try:
+                if conn is None:
+                    conn = self._connect()
+                    healthy = True
+                elif self._needs_check(idle_since):
+                    checked = True
+                    healthy = self._ping(conn)
+                else:
+                    healthy = True
+            except BaseException:
+                # Slotu geri ver; bekleyen başka bir çağıran yeniden deneyebilsin
+                with self._cond:
+                    self._pending -= 1
+                    self._cond.notify()
+                raise
+
+            with self._cond:
+                self._pending -= 1
+                if checked:
+                    self._stats['health_checks'] += 1
+                if idle_since is None:
+                    self._stats['created'] += 1
+                if healthy and not self._closed:
+                    self._in_use.add(conn)
+                    if idle_since is not None:
+                        self._stats['reused'] += 1
+                    return conn
+                if checked and not healthy:
+                    self._stats['health_check_failures'] += 1
+                self._discard(conn)
+                self._cond.notify()
+
+    def putconn(self, conn, discard=False):
+        """Bağlantıyı havuza iade et"""
+        with self._cond:
+            if conn not in self._in_use:
+                self._discard(conn)
+                return
+
+            self._in_use.discard(conn)
+
+            if discard or self._closed or conn.closed:
+                self._discard(conn)
+            else:
+                try:
+                    # Yarım kalan transaction bir sonraki kullanıcıya sızmasın
+                    if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                        conn.rollback()
+                    self._idle.append((conn, time.monotonic()))
+                except Exception:
+                    self._discard(conn)
+
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """with bloğu için bağlantı al/iade et"""
+        conn = self.getconn()
+        try:
+            yield conn
+        except Exception:
+            self.putconn(conn, discard=bool(conn.closed))
+            raise
+        else:
+            self.putconn(conn)
+
+    def stats(self):
+        """Havuz istatistiklerini döndür"""
+        with self._cond:
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size(),
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                **self._stats
+            }
+
+    def closeall(self):
+        """Tüm boşta bekleyen bağlantıları kapat ve havuzu kapat"""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._cond.notify_all()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process genelinde paylaşılan havuzu döndür (ilk çağrıda oluşturulur)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+def get_connection():
+    """Paylaşılan havuzdan bağlantı al"""
+    return get_pool().getconn()
+
+
+def release_connection(conn, discard=False):
+    """Bağlantıyı paylaşılan havuza iade et"""
+    if conn is None:
+        return
+    if _pool is None:
+        conn.close()
+        return
+    _pool.putconn(conn, discard=discard)
+
+
+@contextmanager
+def connection():
+    """Paylaşılan havuz için with bloğu"""
+    with get_pool().connection() as conn:
+        yield conn
+
+
+def connect_direct(autocommit=False, **overrides):
+    """Havuz dışı, oturuma özel bağlantı (LISTEN, advisory lock vb. için)"""
+    conn = psycopg2.connect(**dict(get_pool().connect_kwargs, **overrides))
+    conn.autocommit = autocommit
+    return conn
+
+
+def pool_stats():
+    """Paylaşılan havuzun istatistikleri (havuz yoksa None)"""
+    return _pool.stats() if _pool is not None else None
+
+
+def close_pool():
+    """Paylaşılan havuzu kapat (bir sonraki get_pool yenisini açar)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
@@ -0,0 +1,218 @@
+import atexit
+import os
+import queue
+import sys
+import threading
+import time
+
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(__file__))
+import db_pool
+
+load_dotenv()
+
+# Bellekte bekleyebilecek en fazla satır; dolunca yeni satırlar düşürülür (istek yolu hiç beklemez)
+EVENT_LOG_QUEUE_SIZE = int(os.getenv('EVENT_LOG_QUEUE_SIZE', '10000'))
+# Bu kadar satır birikince ya da FLUSH_INTERVAL saniye dolunca tek multi-row INSERT
+EVENT_LOG_BATCH_SIZE = int(os.getenv('EVENT_LOG_BATCH_SIZE', '500'))
+EVENT_LOG_FLUSH_INTERVAL = float(os.getenv('EVENT_LOG_FLUSH_INTERVAL', '0.2'))
+# Yazılamayan batch bu kadar kez daha denenir (bekleme her seferinde iki katına çıkar), sonra failed sayılır
+EVENT_LOG_WRITE_RETRIES = int(os.getenv('EVENT_LOG_WRITE_RETRIES', '3'))
+EVENT_LOG_RETRY_DELAY = float(os.getenv('EVENT_LOG_RETRY_DELAY', '0.5'))
+# true ise batch synchronous_commit OFF ile yazılır: WAL fsync beklenmez ama DB çökerse son commit'ler kaybolabilir
+EVENT_LOG_ASYNC_COMMIT = os.getenv('EVENT_LOG_ASYNC_COMMIT', 'false').lower() == 'true'
+
+COLUMNS = ('event_type', 'direction', 'architecture', 'payload', 'status', 'error_message', 'latency_ms')
+INSERT_SQL = f"INSERT INTO event_log ({', '.join(COLUMNS)}) VALUES %s"
+
+
+class EventLogWriter:
+    """
+    event_log satırlarını sınırlı kuyrukta toplayıp arka plan thread'inde toplu yazar.
+    log() kuyruğa koyar ve hemen döner; commit (ve fsync) istek süresine girmez.
+    close() sonrası log() satırı kabul etmez (False döner, dropped sayılır).
+    """
+
+    def __init__(self, queue_size=EVENT_LOG_QUEUE_SIZE, batch_size=EVENT_LOG_BATCH_SIZE,
+                 flush_interval=EVENT_LOG_FLUSH_INTERVAL, get_connection=None, release_connection=None,
+                 write_retries=EVENT_LOG_WRITE_RETRIES, retry_delay=EVENT_LOG_RETRY_DELAY,
+                 async_commit=EVENT_LOG_ASYNC_COMMIT):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.write_retries = write_retries
+        self.retry_delay = retry_delay
+        self.async_commit = async_commit
+        self._get_connection = get_connection or db_pool.get_connection
+        self._release_connection = release_connection or db_pool.release_connection
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stopped = threading.Event()
+        self._closed = False
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.retries = 0
+        self.flushes = 0
+        self.last_flush_ms = 0
+
+    def log(self, event_type, direction, architecture, payload=None, status='SUCCESS',
+            error_message=None, latency_ms=None):
+        """Satırı kuyruğa ekle; kuyruk doluysa ya da writer kapandıysa düşür ve False döndür"""
+        if self._closed:
+            # Kapandıktan sonra kuyruğu okuyacak thread yok
+            with self._lock:
+                self.dropped += 1
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((event_type, direction, architecture, payload, status,
+                                    error_message, latency_ms))
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def stats(self):
+        """Yazılan / bekleyen (backlog) / düşürülen / yazılamayan satır ve tekrar denenen batch sayıları"""
+        with self._lock:
+            return {
+                'backlog': self._queue.qsize(),
+                'written': self.written,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'retries': self.retries,
+                'flushes': self.flushes,
+                'last_flush_ms': self.last_flush_ms
+            }
+
+    def flush(self, timeout=5.0):
+        """Kuyruktaki her satır yazılana (ya da yazılamayana) kadar bekle"""
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout=5.0):
+        """Yeni satırları reddet, kalanları yaz ve thread'i durdur"""
+        self._closed = True
+        if self._thread is None:
+            return True
+        drained = self.flush(timeout)
+        self._stopped.set()
+        self._thread.join(timeout)
+        return drained
+
+    def _ensure_started(self):
+        # fork sonrası (sharded worker'lar) thread çocuğa geçmez; her process kendi thread'ini açar
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    if self._thread is not None:
+                        self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                    self._thread = threading.Thread(target=self._run, name='event-log-writer', daemon=True)
+                    self._thread.start()
+                    self._pid = os.getpid()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            # İlk satırdan itibaren en fazla flush_interval kadar biriktir
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0
+                                 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write(self, batch):
+        """Batch'i yaz; hata olursa write_retries kez daha dene, yine olmazsa failed say"""
+        delay = self.retry_delay
+        for attempt in range(self.write_retries + 1):
+            error = self._write_once(batch)
+            if error is None:
+                return
+            if attempt < self.write_retries:
+                with self._lock:
+                    self.retries += 1
+                print(f"⚠️  event_log batch yazma hatası ({len(batch)} satır), {delay:g}s sonra tekrar: {error}")
+                time.sleep(delay)
+                delay *= 2
+        with self._lock:
+            self.failed += len(batch)
+        print(f"⚠️  event_log batch yazılamadı ({len(batch)} satır): {error}")
+
+    def _write_once(self, batch):
+        start = time.perf_counter()
+        conn = None
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            if self.async_commit:
+                # Opt-in: commit WAL fsync'ini beklemez; DB çökerse son batch'ler kaybolabilir
+                cursor.execute("SET LOCAL synchronous_commit TO OFF")
+            execute_values(cursor, INSERT_SQL, batch, page_size=self.batch_size)
+            conn.commit()
+            cursor.close()
+            with self._lock:
+                self.written += len(batch)
+                self.flushes += 1
+                self.last_flush_ms = int((time.perf_counter() - start) * 1000)
+            return None
+        except Exception as e:
+            if conn is not None:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+            return e
+        finally:
+            self._release_connection(conn)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """Process genelinde paylaşılan writer (ilk çağrıda oluşturulur, çıkışta boşaltılır)"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = EventLogWriter()
+                atexit.register(_writer.close)
+    return _writer
+
+
+def log_event(event_type, direction, architecture, payload=None, status='SUCCESS',
+              error_message=None, latency_ms=None):
+    """Paylaşılan writer üzerinden event_log satırı kuyruğa ekle"""
+    return get_writer().log(event_type, direction, architecture, payload, status,
+                            error_message, latency_ms)
+
+
+def flush(timeout=5.0):
+    """Paylaşılan writer'ın kuyruğunu boşalt (writer yoksa hemen döner)"""
+    return _writer.flush(timeout) if _writer is not None else True
+
+
+def stats():
+    """Paylaşılan writer istatistikleri"""
+    return get_writer().stats()
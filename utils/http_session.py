@@ -0,0 +1,77 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Hedef host sayısı (SOAP, StockMS...) ve host başına açık tutulacak keep-alive bağlantı
+HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '4'))
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '10'))
+HTTP_POOL_BLOCK = os.getenv('HTTP_POOL_BLOCK', 'false').lower() == 'true'
+
+
+def create_session(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE,
+                   pool_block=HTTP_POOL_BLOCK):
+    """Keep-alive bağlantı havuzlu requests.Session oluştur"""
+    session = requests.Session()
+    # Retry'lar çağıran tarafta (send_stock_update); adapter seviyesinde tekrar yok
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                          pool_block=pool_block, max_retries=0)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'Connection': 'keep-alive'})
+    return session
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Process genelinde paylaşılan session'ı döndür (ilk çağrıda oluşturulur)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def warmup(url, connections=1, session=None, timeout=5):
+    """
+    Hedefe paralel HEAD istekleriyle TCP/TLS bağlantılarını önceden aç;
+    ilk gerçek istek handshake maliyeti ödemez. Açılan bağlantı sayısını döndürür.
+    """
+    session = session or get_session()
+    origin = '{0.scheme}://{0.netloc}/'.format(urlsplit(url))
+
+    def open_one(_):
+        try:
+            # Cevap kodu önemli değil; bağlantı havuza iade edilir
+            session.head(origin, timeout=timeout, allow_redirects=False).close()
+            return True
+        except requests.RequestException as e:
+            print(f"⚠️  HTTP warmup hatası ({origin}): {e}")
+            return False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=connections) as executor:
+        opened = sum(executor.map(open_one, range(connections)))
+    print(f"🔥 HTTP warmup: {origin} için {opened}/{connections} bağlantı "
+          f"({(time.perf_counter() - start) * 1000:.0f}ms)")
+    return opened
+
+
+def close_session():
+    """Paylaşılan session'ı kapat (bir sonraki get_session yenisini açar)"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
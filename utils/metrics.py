@@ -1,8 +1,12 @@
 import psycopg2
 import os
+import sys
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 
+sys.path.append(os.path.dirname(__file__))
+import db_pool
+
 load_dotenv()
 
 DB_HOST = os.getenv('DB_HOST', 'localhost')
@@ -12,14 +16,8 @@ DB_USER = os.getenv('DB_USER', 'postgres')
 DB_PASSWORD = os.getenv('DB_PASSWORD', 'postgres')
 
 def get_db_connection():
-    """Database bağlantısı"""
-    return psycopg2.connect(
-        host=DB_HOST,
-        port=DB_PORT,
-        database=DB_NAME,
-        user=DB_USER,
-        password=DB_PASSWORD
-    )
+    """Paylaşılan havuzdan database bağlantısı"""
+    return db_pool.get_connection()
 
 def calculate_percentile(latencies, percentile):
     """Percentile hesapla"""
@@ -33,22 +31,24 @@ def get_performance_metrics(architecture='SOA', hours=24):
     """Performance metriklerini hesapla"""
     
     conn = get_db_connection()
-    cursor = conn.cursor()
     
     since = datetime.now() - timedelta(hours=hours)
     
-    cursor.execute("""
-        SELECT latency_ms, status, timestamp
-        FROM event_log
-        WHERE architecture = %s
-        AND timestamp > %s
-        AND latency_ms IS NOT NULL
-        ORDER BY latency_ms
-    """, (architecture, since))
-    
-    results = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT latency_ms, status, timestamp
+            FROM event_log
+            WHERE architecture = %s
+            AND timestamp > %s
+            AND latency_ms IS NOT NULL
+            ORDER BY latency_ms
+        """, (architecture, since))
+        
+        results = cursor.fetchall()
+        cursor.close()
+    finally:
+        db_pool.release_connection(conn)
     
     if not results:
         return {
@@ -97,6 +97,85 @@ def get_performance_metrics(architecture='SOA', hours=24):
     
     return metrics
 
+def get_breaker_transitions(hours=24):
+    """SOAP circuit breaker geçişleri (event_log'daki CIRCUIT_BREAKER_* satırları)"""
+    conn = get_db_connection()
+    since = datetime.now() - timedelta(hours=hours)
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT event_type, COUNT(*), MAX(timestamp)
+            FROM event_log
+            WHERE event_type LIKE 'CIRCUIT_BREAKER_%%'
+            AND timestamp > %s
+            GROUP BY event_type
+        """, (since,))
+        results = cursor.fetchall()
+        cursor.close()
+    finally:
+        db_pool.release_connection(conn)
+
+    return {
+        event_type.replace('CIRCUIT_BREAKER_', ''): {'count': count, 'last': last}
+        for event_type, count, last in results
+    }
+
+def get_failure_breakdown(architecture='SOA', hours=24):
+    """FAILURE satırlarının hata koduna göre dağılımı (error_message başındaki [code])"""
+    conn = get_db_connection()
+    since = datetime.now() - timedelta(hours=hours)
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT COALESCE(substring(error_message from '^\\[([^]]+)\\]'), 'UNCLASSIFIED') AS code,
+                   COUNT(*)
+            FROM event_log
+            WHERE architecture = %s
+            AND status = 'FAILURE'
+            AND timestamp > %s
+            GROUP BY code
+            ORDER BY COUNT(*) DESC
+        """, (architecture, since))
+        results = cursor.fetchall()
+        cursor.close()
+    finally:
+        db_pool.release_connection(conn)
+
+    return dict(results)
+
+def get_outbox_metrics(hours=24):
+    """Outbox birikimi ve relay throughput'u (migration 005 yoksa None)"""
+    conn = get_db_connection()
+    since = datetime.now() - timedelta(hours=hours)
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT
+                COUNT(*) FILTER (WHERE status = 'PENDING'),
+                COUNT(*) FILTER (WHERE status = 'DEAD'),
+                COUNT(*) FILTER (WHERE status = 'SENT' AND sent_at > %s),
+                EXTRACT(EPOCH FROM NOW() - MIN(created_at) FILTER (WHERE status = 'PENDING'))
+            FROM outbox
+        """, (since,))
+        pending, dead, sent, oldest_pending_s = cursor.fetchone()
+        cursor.close()
+    except psycopg2.errors.UndefinedTable:
+        conn.rollback()
+        return None
+    finally:
+        db_pool.release_connection(conn)
+
+    return {
+        'pending': pending,
+        'dead': dead,
+        'sent': sent,
+        'sent_per_minute': round(sent / (hours * 60), 2),
+        'oldest_pending_s': round(float(oldest_pending_s), 1) if oldest_pending_s is not None else 0.0
+    }
+
 def print_performance_report():
     """Performance raporunu yazdır"""
     
@@ -123,6 +202,24 @@ def print_performance_report():
         print(f"  {soa_metrics['throughput']['requests_per_minute']} req/min")
     else:
         print(f"⚠️  {soa_metrics['error']}")
+
+    transitions = get_breaker_transitions(hours=24)
+    if transitions:
+        print(f"\nCircuit Breaker:")
+        for state, info in sorted(transitions.items()):
+            print(f"  -> {state}: {info['count']}x (son: {info['last']})")
+
+    failures = get_failure_breakdown('SOA', hours=24)
+    if failures:
+        print(f"\nFailure Breakdown:")
+        for code, count in failures.items():
+            print(f"  {code}: {count}")
+
+    outbox = get_outbox_metrics(hours=24)
+    if outbox is not None:
+        print(f"\nOutbox:")
+        print(f"  Bekleyen: {outbox['pending']} (en eski {outbox['oldest_pending_s']}s) | DEAD: {outbox['dead']}")
+        print(f"  Gönderilen: {outbox['sent']} ({outbox['sent_per_minute']} msg/min)")
     
     serverless_metrics = get_performance_metrics('SERVERLESS', hours=24)
     
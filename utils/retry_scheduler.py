@@ -0,0 +1,185 @@
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Zamanı gelen denemeleri çalıştıran thread sayısı (bekleyen retry'lar thread tutmaz)
+RETRY_WORKERS = int(os.getenv('RETRY_WORKERS', '4'))
+
+
+def backoff_delay(attempt, base_delay, max_delay, jitter, rng=random):
+    """
+    attempt. başarısız denemeden sonraki bekleme: base * 2^(attempt-1), max_delay ile sınırlı.
+    jitter oranında aşağı doğru rastgele kaydırılır; aynı anda düşen istekler aynı anda tekrar gelmez.
+    """
+    delay = min(max_delay, base_delay * (2 ** (attempt - 1)))
+    return delay * (1 - jitter * rng.random())
+
+
+class RetryPolicy:
+    """Deneme sayısı, backoff parametreleri ve toplam deadline (saniye, None = sınırsız)"""
+
+    def __init__(self, max_attempts=3, base_delay=5.0, max_delay=30.0, jitter=0.2,
+                 deadline=None, retryable=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.deadline = deadline
+        # Exception -> bool; False dönerse tekrar denenmez
+        self.retryable = retryable or (lambda exc: True)
+
+
+class _RetryTask:
+    __slots__ = ('fn', 'policy', 'future', 'on_retry', 'on_failure', 'attempt', 'deadline_at')
+
+    def __init__(self, fn, policy, future, on_retry, on_failure, deadline_at):
+        self.fn = fn
+        self.policy = policy
+        self.future = future
+        self.on_retry = on_retry
+        self.on_failure = on_failure
+        self.attempt = 0
+        self.deadline_at = deadline_at
+
+
+def _abort(task):
+    """Bekleyen denemeyi iptal et; ilk deneme çalıştıysa Future RUNNING olduğundan exception ile"""
+    if not task.future.cancel():
+        task.future.set_exception(CancelledError('RetryScheduler kapatıldı'))
+
+
+class RetryScheduler:
+    """
+    Delay-queue tabanlı retry zamanlayıcı: bekleyen denemeler (due, seq, task) heap'inde durur,
+    tek timer thread'i zamanı geleni worker havuzuna verir. Çağıran hemen Future alır.
+    """
+
+    def __init__(self, workers=RETRY_WORKERS, clock=time.monotonic, rng=None):
+        self._clock = clock
+        self._rng = rng or random.Random()
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='retry')
+        self._thread = None
+        self._closed = False
+
+    def submit(self, fn, policy=None, on_retry=None, on_failure=None):
+        """
+        fn(attempt) hemen (ilk deneme) zamanlanır. Başarıda Future sonucu fn'in dönüşüdür.
+        on_retry(attempt, exc, delay): her tekrar öncesi. on_failure(exc, attempts): verilirse
+        vazgeçildiğinde Future exception yerine bunun dönüşüyle tamamlanır.
+        """
+        policy = policy or RetryPolicy()
+        future = Future()
+        deadline_at = None if policy.deadline is None else self._clock() + policy.deadline
+        task = _RetryTask(fn, policy, future, on_retry, on_failure, deadline_at)
+        self._schedule(self._clock(), task)
+        return future
+
+    def pending(self):
+        """Heap'te bekleyen (henüz çalışmayan) deneme sayısı"""
+        with self._cond:
+            return len(self._heap)
+
+    def shutdown(self, wait=True):
+        """Timer'ı durdur; bekleyen denemeler iptal edilir"""
+        with self._cond:
+            self._closed = True
+            pending, self._heap = self._heap, []
+            self._cond.notify_all()
+        for _, _, task in pending:
+            _abort(task)
+        self._executor.shutdown(wait=wait)
+
+    def _schedule(self, due, task):
+        with self._cond:
+            if self._closed:
+                _abort(task)
+                return
+            heapq.heappush(self._heap, (due, next(self._seq), task))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='retry-timer', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and not self._heap:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                due = self._heap[0][0]
+                wait = due - self._clock()
+                if wait > 0:
+                    # Daha erken bir deneme eklenirse notify ile uyanılır
+                    self._cond.wait(wait)
+                    continue
+                _, _, task = heapq.heappop(self._heap)
+                self._executor.submit(self._attempt, task)
+
+    def _attempt(self, task):
+        if task.attempt == 0 and not task.future.set_running_or_notify_cancel():
+            return
+
+        task.attempt += 1
+        try:
+            result = task.fn(task.attempt)
+        except Exception as exc:
+            policy = task.policy
+            delay = backoff_delay(task.attempt, policy.base_delay, policy.max_delay,
+                                  policy.jitter, self._rng)
+            due = self._clock() + delay
+            if (task.attempt >= policy.max_attempts or not policy.retryable(exc)
+                    or (task.deadline_at is not None and due > task.deadline_at)):
+                self._give_up(task, exc)
+                return
+            if task.on_retry is not None:
+                task.on_retry(task.attempt, exc, delay)
+            self._schedule(due, task)
+        else:
+            task.future.set_result(result)
+
+    def _give_up(self, task, exc):
+        if task.on_failure is None:
+            task.future.set_exception(exc)
+            return
+        try:
+            task.future.set_result(task.on_failure(exc, task.attempt))
+        except Exception as e:
+            task.future.set_exception(e)
+
+
+_scheduler = None
+_scheduler_pid = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Process genelinde paylaşılan retry zamanlayıcı (ilk çağrıda ve fork sonrası oluşturulur)"""
+    global _scheduler, _scheduler_pid
+    # fork sonrası timer ve worker thread'leri çocuğa geçmez; devralınan zamanlayıcı hiç çalışmaz
+    if _scheduler is None or _scheduler_pid != os.getpid():
+        with _scheduler_lock:
+            if _scheduler is None or _scheduler_pid != os.getpid():
+                _scheduler = RetryScheduler()
+                _scheduler_pid = os.getpid()
+    return _scheduler
+
+
+def shutdown_scheduler(wait=True):
+    """Paylaşılan zamanlayıcıyı kapat (bir sonraki get_scheduler yenisini açar)"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is not None and _scheduler_pid == os.getpid():
+            _scheduler.shutdown(wait=wait)
+        _scheduler = None
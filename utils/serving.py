@@ -0,0 +1,106 @@
+"""
+Flask servisleri (StockMS, OrderMS) için sunucu seçimi.
+
+production: gunicorn, WEB_WORKERS process x WEB_THREADS thread (gthread). Her worker
+WEB_MAX_REQUESTS (+ jitter) istekten sonra yenilenir; elindeki istekler WEB_GRACEFUL_TIMEOUT
+içinde bitirilir. SIGHUP ile tüm worker'lar aynı şekilde yeniden başlatılır.
+dev: Flask geliştirme sunucusu (debug + reloader), sadece yerel geliştirme için.
+"""
+import argparse
+import os
+import sys
+
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(__file__))
+import db_pool
+import event_log_writer
+
+load_dotenv()
+
+SERVE_MODE = os.getenv('SERVE_MODE', 'production')
+WEB_WORKERS = int(os.getenv('WEB_WORKERS', str(min(2 * (os.cpu_count() or 1) + 1, 8))))
+WEB_THREADS = int(os.getenv('WEB_THREADS', '4'))
+# Worker başına istek sayısı dolunca yenile (0 = kapalı); jitter tüm worker'ların aynı anda yenilenmesini önler
+WEB_MAX_REQUESTS = int(os.getenv('WEB_MAX_REQUESTS', '1000'))
+WEB_MAX_REQUESTS_JITTER = int(os.getenv('WEB_MAX_REQUESTS_JITTER', '100'))
+# Yenilenen/durdurulan worker'ın elindeki istekleri bitirmek için süre
+WEB_GRACEFUL_TIMEOUT = int(os.getenv('WEB_GRACEFUL_TIMEOUT', '30'))
+WEB_TIMEOUT = int(os.getenv('WEB_TIMEOUT', '30'))
+WEB_KEEPALIVE = int(os.getenv('WEB_KEEPALIVE', '5'))
+
+
+def worker_exit(server, worker):
+    """Çıkan worker'ın kuyruktaki event_log satırlarını yaz, havuz bağlantılarını kapat"""
+    event_log_writer.flush(timeout=WEB_GRACEFUL_TIMEOUT)
+    db_pool.close_pool()
+
+
+def gunicorn_options(host, port, workers=WEB_WORKERS, threads=WEB_THREADS,
+                     max_requests=WEB_MAX_REQUESTS, max_requests_jitter=WEB_MAX_REQUESTS_JITTER,
+                     graceful_timeout=WEB_GRACEFUL_TIMEOUT, timeout=WEB_TIMEOUT, keepalive=WEB_KEEPALIVE):
+    """
+    gunicorn ayarları. Flask app master'da import edilmiş nesne olarak verilir (preload_app
+    ayarı etkisiz); DB havuzu ve event_log writer ilk kullanımda açıldığından her worker kendininkini açar.
+    """
+    options = {
+        'bind': f'{host}:{port}',
+        'workers': workers,
+        'threads': threads,
+        'worker_class': 'gthread',
+        'max_requests': max_requests,
+        'max_requests_jitter': max_requests_jitter,
+        'graceful_timeout': graceful_timeout,
+        'timeout': timeout,
+        'keepalive': keepalive,
+        'accesslog': None,
+        'errorlog': '-',
+        'worker_exit': worker_exit
+    }
+    # Container'da heartbeat dosyası overlay FS yerine RAM'de tutulur (yavaş diskte worker'lar kill edilmez)
+    if os.path.isdir('/dev/shm'):
+        options['worker_tmp_dir'] = '/dev/shm'
+    return options
+
+
+def run_gunicorn(app, options):
+    """gunicorn'u bu process içinden başlat (arbiter; çıkışta döner)"""
+    from gunicorn.app.base import BaseApplication
+
+    class FlaskApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    FlaskApplication().run()
+
+
+def serve(app, name, default_port, argv=None):
+    """Servis giriş noktası: --mode production (gunicorn) | dev (Flask debug sunucusu)"""
+    parser = argparse.ArgumentParser(description=f'{name} server')
+    parser.add_argument('--mode', choices=['production', 'dev'], default=SERVE_MODE)
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=default_port)
+    parser.add_argument('--workers', type=int, default=WEB_WORKERS)
+    parser.add_argument('--threads', type=int, default=WEB_THREADS)
+    parser.add_argument('--max-requests', type=int, default=WEB_MAX_REQUESTS)
+    args = parser.parse_args(argv)
+
+    if args.mode == 'dev':
+        print(f"🛠️  {name} dev server (debug) → http://{args.host}:{args.port}")
+        app.run(host=args.host, port=args.port, debug=True)
+        return
+
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        print("❌ gunicorn yüklü değil: pip install gunicorn (ya da --mode dev)")
+        sys.exit(1)
+
+    print(f"🚀 {name}: gunicorn {args.workers} worker x {args.threads} thread → "
+          f"http://{args.host}:{args.port} (max_requests={args.max_requests})")
+    run_gunicorn(app, gunicorn_options(args.host, args.port, workers=args.workers,
+                                       threads=args.threads, max_requests=args.max_requests))